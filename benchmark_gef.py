@@ -0,0 +1,100 @@
+"""
+Benchmark voor het inlezen van het datablok van grote GEF bestanden
+Gebruik: python benchmark_gef.py [aantal regels] [gef bestanden]
+Zonder bestanden wordt een sondering met het opgegeven aantal regels gegenereerd
+"""
+
+import mmap
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import StringIO, BytesIO
+
+import numpy as np
+import pandas as pd
+
+from gefxml_reader import Cpt, read_gef_header, parse_gef_data
+
+def maak_gef(bestand, regels):
+    # maak een sondering met hoge resolutie (2 cm) en 6 kolommen
+    header = '\n'.join([
+        '#GEFID= 1, 1, 0',
+        '#COLUMN= 6',
+        '#COLUMNINFO= 1, m, Sondeerlengte, 1',
+        '#COLUMNINFO= 2, MPa, Conusweerstand, 2',
+        '#COLUMNINFO= 3, MPa, Wrijvingsweerstand, 3',
+        '#COLUMNINFO= 4, %, Wrijvingsgetal, 4',
+        '#COLUMNINFO= 5, MPa, Waterspanning u2, 6',
+        '#COLUMNINFO= 6, m, Gecorrigeerde diepte, 11',
+        '#COLUMNSEPARATOR= ;',
+        '#COLUMNVOID= 2, -9999.000000',
+        '#PROCEDURECODE= GEF-CPT-Report, 1, 1, 2',
+        '#RECORDSEPARATOR= !',
+        '#TESTID= benchmark',
+        '#XYID= 31000, 121000.00, 487000.00',
+        '#ZID= 31000, -0.52',
+        '#EOH=',
+        ''])
+    rng = np.random.default_rng(0)
+    diepte = np.arange(1, regels + 1) * 0.02
+    data = np.column_stack([diepte, rng.uniform(0, 30, regels), rng.uniform(0, 0.3, regels), rng.uniform(0, 8, regels), rng.uniform(-0.1, 0.5, regels), diepte * 0.99])
+    with open(bestand, 'w') as f:
+        f.write(header)
+        np.savetxt(f, data, fmt='%.3f', delimiter=';', newline=';!\n')
+
+def data_regex(gefFile):
+    # oude methode: hele bestand als tekst, datablok met een regex, kopie in StringIO
+    with open(gefFile) as f:
+        gef_raw = f.read()
+    match = re.search(re.compile(r'#EOH\s*=\s*(?P<data>(.*\n)*)'), gef_raw)
+    return pd.read_csv(StringIO(match.group('data')), sep=';', skipinitialspace=True, lineterminator='\n', header=None)
+
+def data_offset(gefFile):
+    # nieuwe methode: bytes één keer lezen, datablok vanaf de positie na #EOH
+    with open(gefFile, 'rb') as f:
+        gef_bytes = f.read()
+    header = read_gef_header(gef_bytes)
+    dataBuffer = BytesIO(gef_bytes)
+    dataBuffer.seek(header.data_offset)
+    return pd.read_csv(dataBuffer, sep=';', skipinitialspace=True, header=None, encoding='latin-1')
+
+def data_numpy(gefFile):
+    # numerieke parser: mmap, datablok direct naar een numpy array
+    with open(gefFile, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as gefMap:
+        header = read_gef_header(gefMap)
+        nrOfColumns = int(header.get('COLUMN')) if header.get('COLUMN') is not None else None
+        return parse_gef_data(gefMap, header.data_offset, header.columnseparator, header.recordseparator, header.columnvoid, nrOfColumns)
+
+def meet(functie, gefFile, herhalingen=5):
+    # snelste tijd van een aantal herhalingen en het geheugengebruik van één keer
+    tijden = []
+    for _ in range(herhalingen):
+        start = time.perf_counter()
+        functie(gefFile)
+        tijden.append(time.perf_counter() - start)
+    tracemalloc.start()
+    functie(gefFile)
+    _, piek = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tijden), piek
+
+def laad_cpt(gefFile):
+    Cpt().load_gef(gefFile)
+
+if __name__ == '__main__':
+    regels = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    bestanden = sys.argv[2:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(bestanden) == 0:
+            bestanden = [os.path.join(tmp, f'benchmark_{regels}.gef')]
+            maak_gef(bestanden[0], regels)
+
+        for gefFile in bestanden:
+            print(f'{gefFile} ({os.path.getsize(gefFile) / 1e6:.1f} MB)')
+            for naam, functie in [('regex + StringIO', data_regex), ('offset + BytesIO', data_offset), ('mmap + numpy', data_numpy), ('Cpt.load_gef', laad_cpt)]:
+                tijd, piek = meet(functie, gefFile)
+                print(f'  {naam:<20} {tijd * 1000:8.1f} ms  piekgeheugen {piek / 1e6:6.1f} MB')
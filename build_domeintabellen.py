@@ -0,0 +1,32 @@
+"""
+Maak de bundel sikb_domeintabellen/domeintabellen.json uit de xlsx bestanden met de SIKB domeintabellen
+Bij het inlezen van SIKB0101 worden de tabellen dan uit de bundel gelezen, zonder Excel (openpyxl)
+Na het downloaden van nieuwe domeintabellen van SIKB: zet de xlsx bestanden in sikb_domeintabellen en voer dit script opnieuw uit
+Gebruik: python build_domeintabellen.py [map met xlsx bestanden] --bundle [json bestand]
+"""
+
+__author__ = "Thomas van der Linden"
+__credits__ = ""
+__license__ = "EUPL-1.2"
+__version__ = ""
+__maintainer__ = "Thomas van der Linden"
+__email__ = "t.van.der.linden@amsterdam.nl"
+__status__ = "Dev"
+
+import argparse
+import time
+
+from gefxml_reader import DomainTables
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maak de bundel met SIKB domeintabellen uit de xlsx bestanden')
+    parser.add_argument('folder', nargs='?', default=DomainTables().folder, help='map met de xlsx bestanden')
+    parser.add_argument('--bundle', default=None, help=f'json bestand voor de bundel, standaard {DomainTables.BUNDLE} in de map')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    names = DomainTables(args.folder).compile(args.bundle)
+    print(f'{len(names)} domeintabellen in {time.perf_counter() - start:.1f} s: {", ".join(names)}')
+
+if __name__ == '__main__':
+    main()
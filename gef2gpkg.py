@@ -19,7 +19,7 @@ df = pd.DataFrame()
 
 for f in fileList:
     cpt = Cpt()
-    cpt.load_gef(f)
+    cpt.load_gef(f, metadataOnly=True)
     projectids.append(cpt.projectid)
     projectnames.append(cpt.projectname)
     tests.append(cpt.testid)
@@ -0,0 +1,197 @@
+"""
+Zet een map met sonderingen en boringen (GEF, BRO XML, DINO XML) om in één kolomgeoriënteerd archief (Parquet)
+en lees daaruit weer Cpt en Bore objecten of meetwaarden, zonder de oorspronkelijke bestanden te openen
+Vereist pyarrow
+"""
+
+__author__ = "Thomas van der Linden"
+__credits__ = ""
+__license__ = "EUPL-1.2"
+__version__ = ""
+__maintainer__ = "Thomas van der Linden"
+__email__ = "t.van.der.linden@amsterdam.nl"
+__status__ = "Dev"
+
+import ast
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from gefxml_reader import Cpt, Bore, load
+
+# de archiefmap bevat metadata.parquet met één regel per test
+# en de mappen cpt en bore met de meetwaarden en lagen, verdeeld in partities (project of tegel)
+METADATA_COLUMNS = ['testid', 'type', 'easting', 'northing', 'groundlevel', 'date', 'companyid', 'projectid', 'finaldepth', 'filename', 'source', 'partition']
+
+def partition_of(test, partitionBy='project', tileSize=1000):
+    # de partitie bepaalt in welke map de meetwaarden terechtkomen
+    # filters op project of tegel lezen alleen die map
+    if partitionBy == 'tile':
+        if test.easting is None or test.northing is None:
+            return 'onbekend'
+        return f'{int(test.easting // tileSize * tileSize)}_{int(test.northing // tileSize * tileSize)}'
+    return str(test.projectid) if test.projectid else 'onbekend'
+
+def metadata_row(test, source, partition):
+    try:
+        date = pd.Timestamp(year=test.date['year'], month=test.date['month'], day=test.date['day'])
+    except (KeyError, TypeError, ValueError):
+        date = pd.NaT
+    return {
+        'testid': test.testid, 'type': 'cpt' if isinstance(test, Cpt) else 'bore',
+        'easting': test.easting, 'northing': test.northing, 'groundlevel': test.groundlevel,
+        'date': date, 'companyid': test.companyid, 'projectid': test.projectid,
+        'finaldepth': test.finaldepth, 'filename': getattr(test, 'filename', None),
+        'source': source, 'partition': partition
+    }
+
+def layers_frame(bore):
+    # alle beschrijvingen van een boring onder elkaar, de componenten als tekst
+    layers = []
+    for descriptionLocation, soillayers in bore.soillayers.items():
+        soillayers = soillayers.copy()
+        soillayers.insert(0, 'descriptionLocation', descriptionLocation)
+        if 'components' in soillayers.columns:
+            soillayers['components'] = soillayers['components'].astype(str)
+        layers.append(soillayers)
+    layers = pd.concat(layers, ignore_index=True) if len(layers) > 0 else pd.DataFrame()
+    # kolommen met gemengde typen worden tekst, Parquet heeft één type per kolom
+    for column in layers.columns:
+        if layers[column].dtype == object:
+            layers[column] = layers[column].astype(str).where(layers[column].notna())
+    return layers
+
+def write_batch(archive, kind, frames):
+    if len(frames) == 0:
+        return
+    data = pd.concat(frames, ignore_index=True)
+    pq.write_to_dataset(pa.Table.from_pandas(data, preserve_index=False), os.path.join(archive, kind), partition_cols=['partition'])
+
+def convert(files, archive, partitionBy='project', tileSize=1000, batchSize=1000):
+    # lees alle bestanden in en schrijf ze naar het archief
+    # files is een map of een lijst met bestanden, partitionBy is 'project' of 'tile'
+    # de meetwaarden worden per batchSize bestanden weggeschreven om het geheugengebruik te beperken
+    # geeft een dict terug met per bestand dat niet gelezen kon worden de foutmelding
+    if isinstance(files, str):
+        files = [os.path.join(root, name) for root, _, names in os.walk(files) for name in sorted(names) if name.lower().endswith(('.gef', '.xml'))]
+
+    os.makedirs(archive, exist_ok=True)
+    metadata = []
+    cptFrames, boreFrames = [], []
+    failed = {}
+    for i, path in enumerate(files):
+        try:
+            test = load(path)
+            if not isinstance(test, (Cpt, Bore)):
+                raise ValueError(f'{type(test).__name__} kan niet in het archief')
+            partition = partition_of(test, partitionBy, tileSize)
+            if isinstance(test, Cpt):
+                data = test.data.copy()
+                cptFrames.append(data)
+            else:
+                data = layers_frame(test)
+                boreFrames.append(data)
+            # kolomnamen moeten tekst zijn, bij GEF zijn onbekende kolommen genummerd
+            data.columns = data.columns.astype(str)
+            data.insert(0, 'testid', test.testid)
+            data['partition'] = partition
+            metadata.append(metadata_row(test, path, partition))
+        except Exception as e:
+            failed[path] = repr(e)
+
+        if (i + 1) % batchSize == 0:
+            write_batch(archive, 'cpt', cptFrames)
+            write_batch(archive, 'bore', boreFrames)
+            cptFrames, boreFrames = [], []
+
+    write_batch(archive, 'cpt', cptFrames)
+    write_batch(archive, 'bore', boreFrames)
+
+    metadata = pd.DataFrame(metadata, columns=METADATA_COLUMNS)
+    metadataFile = os.path.join(archive, 'metadata.parquet')
+    if os.path.exists(metadataFile):
+        metadata = pd.concat([pd.read_parquet(metadataFile), metadata], ignore_index=True)
+    metadata.to_parquet(metadataFile, index=False)
+    return failed
+
+class Archive():
+    # lezen uit een archief dat met convert is gemaakt
+    # filters zijn in de vorm van pyarrow, bijvoorbeeld [('type', '==', 'cpt'), ('easting', '>', 120000)]
+    def __init__(self, archive):
+        self.archive = archive
+
+    def metadata(self, filters=None, columns=None):
+        return pq.read_table(os.path.join(self.archive, 'metadata.parquet'), filters=filters, columns=columns).to_pandas()
+
+    def read(self, kind, testids=None, partitions=None, columns=None, filters=None):
+        # lees meetwaarden (kind='cpt') of lagen (kind='bore'), gefilterd op testid en partitie
+        # het filter op partitie slaat hele mappen over, de andere filters worden per rowgroup toegepast
+        path = os.path.join(self.archive, kind)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        partitioning = ds.partitioning(pa.schema([('partition', pa.string())]), flavor='hive')
+        expression = pq.filters_to_expression(filters) if filters else None
+        for field, values in [('testid', testids), ('partition', partitions)]:
+            if values is not None:
+                condition = ds.field(field).isin(list(values))
+                expression = condition if expression is None else expression & condition
+
+        # iedere batch is apart weggeschreven en kan andere kolommen hebben
+        # het schema wordt samengesteld uit de bestanden in de gekozen partities
+        dataset = ds.dataset(path, format='parquet', partitioning=partitioning)
+        partitionFilter = ds.field('partition').isin(list(partitions)) if partitions is not None else None
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments(filter=partitionFilter)]
+        if len(schemas) == 0:
+            return pd.DataFrame()
+        schema = pa.unify_schemas(schemas + [pa.schema([('partition', pa.string())])])
+        dataset = ds.dataset(path, schema=schema, format='parquet', partitioning=partitioning)
+        if columns is not None:
+            columns = ['testid'] + [column for column in columns if column != 'testid']
+        table = dataset.to_table(columns=columns, filter=expression)
+        return table.to_pandas()
+
+    def cpt_data(self, filters=None, columns=None):
+        # meetwaarden van alle sonderingen die aan de filters op de metadata voldoen, in één dataframe
+        metadata = self.metadata(filters=self.combine(filters, ('type', '==', 'cpt')), columns=['testid', 'partition'])
+        return self.read('cpt', metadata['testid'], set(metadata['partition']), columns)
+
+    def cpts(self, filters=None):
+        # Cpt objecten van alle sonderingen die aan de filters op de metadata voldoen
+        metadata = self.metadata(filters=self.combine(filters, ('type', '==', 'cpt')))
+        data = self.read('cpt', metadata['testid'], set(metadata['partition']))
+        data = dict(tuple(data.groupby('testid', sort=False)))
+        for row in metadata.itertuples(index=False):
+            cpt = Cpt()
+            self.set_metadata(cpt, row)
+            cpt.data = data.get(row.testid, pd.DataFrame()).drop(columns=['testid', 'partition'], errors='ignore').dropna(axis='columns', how='all').reset_index(drop=True)
+            yield cpt
+
+    def bores(self, filters=None):
+        # Bore objecten van alle boringen die aan de filters op de metadata voldoen
+        metadata = self.metadata(filters=self.combine(filters, ('type', '==', 'bore')))
+        layers = self.read('bore', metadata['testid'], set(metadata['partition']))
+        layers = dict(tuple(layers.groupby('testid', sort=False)))
+        for row in metadata.itertuples(index=False):
+            bore = Bore()
+            self.set_metadata(bore, row)
+            bore.soillayers = {}
+            boreLayers = layers.get(row.testid, pd.DataFrame(columns=['descriptionLocation']))
+            for descriptionLocation, soillayers in boreLayers.groupby('descriptionLocation', sort=False):
+                soillayers = soillayers.drop(columns=['testid', 'partition', 'descriptionLocation']).dropna(axis='columns', how='all').reset_index(drop=True)
+                if 'components' in soillayers.columns:
+                    soillayers['components'] = soillayers['components'].apply(ast.literal_eval)
+                bore.soillayers[descriptionLocation] = soillayers
+            yield bore
+
+    @staticmethod
+    def combine(filters, condition):
+        return [condition] + list(filters or [])
+
+    @staticmethod
+    def set_metadata(test, row):
+        for attr in ['testid', 'easting', 'northing', 'groundlevel', 'companyid', 'projectid', 'finaldepth', 'filename']:
+            value = getattr(row, attr)
+            setattr(test, attr, None if pd.isna(value) else value)
+        if not pd.isna(row.date):
+            test.date = {'year': row.date.year, 'month': row.date.month, 'day': row.date.day}
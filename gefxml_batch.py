@@ -0,0 +1,319 @@
+"""
+Maak plots van veel sonderingen en boringen tegelijk, verdeeld over meerdere processen
+Gebruik: python gefxml_batch.py [bestanden of mappen] --output ./output --type pdf --workers 8 --report verslag.csv
+Of alles in één pdf met een overzicht vooraan: python gefxml_batch.py [bestanden of mappen] --pdf rapport.pdf
+Met --incremental worden alleen nieuwe en gewijzigde bestanden geplot, zie RenderManifest
+De GUI (gui_plot.py) en de command line gebruiken allebei plot_tests
+"""
+
+__author__ = "Thomas van der Linden"
+__credits__ = ""
+__license__ = "EUPL-1.2"
+__version__ = ""
+__maintainer__ = "Thomas van der Linden"
+__email__ = "t.van.der.linden@amsterdam.nl"
+__status__ = "Dev"
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+
+import matplotlib
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+
+from gefxml_reader import Cpt, Bore, Multibore, load, sniff, new_figure, PLOT_VERSION
+
+# één regel per bestand in het verslag
+REPORT_COLUMNS = ['file', 'status', 'type', 'testid', 'seconds', 'error']
+# A4 staand voor het overzicht en de foutpagina's van een pdf rapport
+A4 = (8.27, 11.69)
+INDEX_ROWS = 80
+
+def find_files(paths):
+    # mappen worden vervangen door de GEF en XML bestanden die erin staan
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(('.gef', '.xml'))]
+        else:
+            files.append(path)
+    return files
+
+def file_hash(f):
+    with open(f, 'rb') as source:
+        return hashlib.blake2b(source.read(), digest_size=20).hexdigest()
+
+class RenderManifest():
+    # houdt in de map met plots bij van welk bronbestand iedere plot is gemaakt
+    # met de hash van de inhoud, de instellingen van de plot en de versie van de plots en matplotlib
+    # een plot wordt alleen opnieuw gemaakt als één daarvan anders is of als de plot er niet meer is
+    # plots van bronbestanden die niet meer bestaan worden verwijderd
+    FILENAME = 'manifest.json'
+
+    def __init__(self, output):
+        self.path = os.path.join(output, self.FILENAME)
+        self.version = f'{PLOT_VERSION}-{matplotlib.__version__}'
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # zonder (leesbaar) manifest wordt alles opnieuw gemaakt
+            self.entries = {}
+
+    @staticmethod
+    def key(f):
+        return os.path.abspath(f)
+
+    def is_current(self, f, hash, settings):
+        entry = self.entries.get(self.key(f))
+        return entry is not None and entry['hash'] == hash and entry['settings'] == settings and entry['version'] == self.version \
+            and all(os.path.exists(output) for output in entry['outputs'])
+
+    def update(self, f, hash, settings, outputs):
+        # plots van de vorige versie die nu niet meer gemaakt worden, bijvoorbeeld door een ander testid, worden verwijderd
+        old = self.entries.get(self.key(f), {}).get('outputs', [])
+        self.remove_outputs([output for output in old if output not in map(os.path.abspath, outputs)])
+        outputs = [os.path.abspath(output) for output in outputs]
+        self.entries[self.key(f)] = {'hash': hash, 'settings': settings, 'version': self.version, 'outputs': outputs}
+
+    def discard(self, f):
+        # na een fout wordt het bestand de volgende keer opnieuw geprobeerd
+        self.entries.pop(self.key(f), None)
+
+    def prune(self):
+        # verwijder de plots van bronbestanden die niet meer bestaan, geeft de verwijderde bronbestanden terug
+        removed = [source for source in self.entries if not os.path.exists(source)]
+        for source in removed:
+            self.remove_outputs(self.entries.pop(source)['outputs'])
+        return removed
+
+    @staticmethod
+    def remove_outputs(outputs):
+        for output in outputs:
+            try:
+                os.remove(output)
+            except FileNotFoundError:
+                pass
+
+    def save(self):
+        # eerst naar een tijdelijk bestand, een afgebroken run laat geen half manifest achter
+        tmpPath = f'{self.path}.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmpPath, self.path)
+
+def plot_file(f, output='./output', interpretCpt=False, outputType='png', projectName='sikb', decimate=False, pdf=None):
+    # lees één bestand in en maak de plot
+    # een fout stopt de batch niet, maar komt in het verslag
+    # met pdf (een geopende PdfPages) wordt de plot een pagina van dat bestand
+    start = time.perf_counter()
+    result = dict.fromkeys(REPORT_COLUMNS)
+    result['file'] = f
+    result['outputs'] = []
+    try:
+        # de boringen uit een SIKB0101 worden niet geplot, zie hieronder, dus ook niet ingelezen
+        # inlezen zou ze bovendien naar ./output schrijven, ook als output een andere map is
+        test = Multibore() if sniff(f).kind == 'sikb' else load(f, checkAddFrictionRatio=True, checkAddDepth=True, projectName=projectName)
+        result['type'] = type(test).__name__
+        result['testid'] = getattr(test, 'testid', None)
+        if isinstance(test, Cpt):
+#            test.interpret() # TODO: dit geeft soms een foutmelding met ontbrekende frictionRatio
+            # iedere worker bouwt de figuur één keer op en vervangt daarna alleen de data, zie CptFigure
+            test.plot(output, outputType=outputType, reuseFigure=True, decimate=decimate, pdf=pdf)
+            result['outputs'].append(test.plotFile)
+            if interpretCpt:
+                cptAsBore = Bore()
+                cptAsBore.from_cpt(test, interpretationModel='Robertson') # 'qcOnly', 'threeType', 'NEN', 'Robertson', 'customInterpretation'
+                # de geïnterpreteerde boringen komen in een submap van output
+                cptAsBoreFolder = os.path.join(output, 'cptasbore')
+                if pdf is None:
+                    os.makedirs(cptAsBoreFolder, exist_ok=True)
+                cptAsBore.plot(path=cptAsBoreFolder, outputType=outputType, pdf=pdf)
+                result['outputs'].append(cptAsBore.plotFile)
+            result['status'] = 'ok'
+        elif isinstance(test, Bore):
+            test.plot(output, outputType=outputType, pdf=pdf)
+            result['outputs'].append(test.plotFile)
+            result['status'] = 'ok'
+        else:
+            # TODO: de boringen uit een SIKB0101 worden (nog) niet geplot
+            result['status'] = 'overgeslagen'
+    except Exception as e:
+        result['status'] = 'fout'
+        result['error'] = f'{type(e).__name__}: {str(e).strip()}'
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def run_batch(files, output='./output', interpretCpt=False, outputType='png', workers=None, chunksize=None, projectName='sikb', decimate=False):
+    # geeft per bestand het resultaat van plot_file, in de volgorde waarin ze klaar zijn
+    # workers is het aantal processen, standaard het aantal cores, bij 1 gebeurt alles in dit proces
+    # de bestanden worden in pakketjes van chunksize verdeeld, dat scheelt overhead bij veel kleine bestanden
+    files = list(files)
+    task = partial(plot_file, output=output, interpretCpt=interpretCpt, outputType=outputType, projectName=projectName, decimate=decimate)
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers == 1:
+        for f in files:
+            yield task(f)
+        return
+
+    if chunksize is None:
+        # ongeveer vier pakketjes per worker, dan wachten aan het eind niet alle workers op één trage
+        chunksize = max(1, min(16, len(files) // (workers * 4)))
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(task, files, chunksize=chunksize):
+            yield result
+
+def print_progress(nr, total, result):
+    print(f'[{nr}/{total}] {result["file"]} {result["status"]}' + (f' {result["error"]}' if result['error'] else ''))
+
+def plot_tests(files, output='./output', interpretCpt=False, outputType='png', workers=None, chunksize=None, report=None, progress=print_progress, projectName='sikb', decimate=False, incremental=False):
+    # plot alle bestanden en geef een verslag terug als dataframe, met één regel per bestand
+    # report is een optioneel csv bestand voor het verslag, progress wordt na ieder bestand aangeroepen
+    # decimate=True dunt de lijnen van sonderingen uit tot de resolutie van de uitvoer, zie Cpt.plot
+    # incremental=True plot alleen nieuwe en gewijzigde bestanden en verwijdert plots van bestanden die er niet meer zijn, zie RenderManifest
+    files = find_files(files)
+    os.makedirs(output, exist_ok=True)
+    results = []
+    if incremental:
+        manifest = RenderManifest(output)
+        settings = {'interpretCpt': interpretCpt, 'outputType': outputType, 'projectName': projectName, 'decimate': decimate}
+        hashes = {f: file_hash(f) for f in files}
+        # bestanden waarvan de plot nog klopt worden overgeslagen
+        current = {f for f in files if manifest.is_current(f, hashes[f], settings)}
+        results += [dict(dict.fromkeys(REPORT_COLUMNS), file=f, status='ongewijzigd') for f in files if f in current]
+        files = [f for f in files if f not in current]
+        manifest.prune()
+
+    total = len(files) + len(results)
+    try:
+        for result in run_batch(files, output, interpretCpt, outputType, workers, chunksize, projectName, decimate):
+            results.append(result)
+            if incremental:
+                if result['status'] == 'ok':
+                    manifest.update(result['file'], hashes[result['file']], settings, result['outputs'])
+                else:
+                    manifest.discard(result['file'])
+            if progress is not None:
+                progress(len(results), total, result)
+    finally:
+        # ook bij afbreken blijft bewaard wat al klaar is
+        if incremental:
+            manifest.save()
+
+    results = pd.DataFrame(results, columns=REPORT_COLUMNS)
+    if report is not None:
+        results.to_csv(report, sep=';', index=False)
+    return results
+
+def format_date(date):
+    try:
+        return f'{date["year"]}-{date["month"]}-{date["day"]}'
+    except (KeyError, TypeError):
+        return ''
+
+def format_coordinate(value):
+    try:
+        return f'{float(value):.2f}'
+    except (TypeError, ValueError):
+        return ''
+
+def index_pages(entries, firstPage):
+    # het overzicht vooraan een pdf rapport, INDEX_ROWS tests per pagina
+    # entries zijn dicts met file, testid, easting, northing en date, firstPage is de pagina van de eerste test
+    header = f'{"pagina":>6}  {"test":<24} {"x":>10} {"y":>10}  {"datum":<10}  bestand'
+    nrOfPages = math.ceil(len(entries) / INDEX_ROWS)
+    for i in range(nrOfPages):
+        lines = [header, '']
+        for j, entry in enumerate(entries[i * INDEX_ROWS:(i + 1) * INDEX_ROWS], start=firstPage + i * INDEX_ROWS):
+            lines.append(f'{j:>6}  {str(entry["testid"])[:24]:<24} {format_coordinate(entry["easting"]):>10} {format_coordinate(entry["northing"]):>10}  {format_date(entry["date"]):<10}  {os.path.basename(entry["file"])[:40]}')
+        fig = new_figure(A4)
+        fig.text(0.06, 0.96, f'Overzicht ({i + 1}/{nrOfPages})', fontsize=14, fontweight='bold', va='top')
+        fig.text(0.06, 0.92, '\n'.join(lines), family='monospace', fontsize=7, va='top')
+        yield fig
+
+def error_page(result):
+    # een test die niet geplot kan worden krijgt toch een pagina, dan klopt het overzicht
+    fig = new_figure(A4)
+    fig.text(0.06, 0.96, os.path.basename(result['file']), fontsize=14, fontweight='bold', va='top')
+    fig.text(0.06, 0.92, f'kon niet worden geplot\n{result["error"]}', fontsize=10, va='top', wrap=True)
+    return fig
+
+def write_pdf_report(files, report='./output/rapport.pdf', index=True, progress=print_progress, projectName='sikb', decimate=False):
+    # schrijf alle sonderingen en boringen als pagina's in één pdf, met optioneel een overzicht vooraan
+    # de pagina's worden één voor één geschreven en de figuur van een sondering wordt hergebruikt, het geheugengebruik blijft gelijk
+    # het lettertype wordt één keer in de pdf opgenomen in plaats van in ieder bestand
+    # geeft een verslag terug als dataframe, zoals plot_tests, met de pagina van iedere test
+    files = find_files(files)
+    os.makedirs(os.path.dirname(os.path.abspath(report)), exist_ok=True)
+
+    # eerst alleen de metadata, voor het overzicht en om te weten welke bestanden een pagina krijgen
+    entries, skipped = [], []
+    for f in files:
+        entry = {'file': f, 'testid': None, 'easting': None, 'northing': None, 'date': None}
+        try:
+            test = load(f, projectName=projectName, metadataOnly=True)
+        except Exception:
+            # de fout komt bij het plotten in het verslag en op een eigen pagina
+            entries.append(entry)
+            continue
+        if not isinstance(test, (Cpt, Bore)):
+            # TODO: de boringen uit een SIKB0101 worden (nog) niet geplot
+            skipped.append(f)
+            continue
+        entry.update({attr: getattr(test, attr, None) for attr in ['testid', 'easting', 'northing', 'date']})
+        entries.append(entry)
+
+    firstPage = math.ceil(len(entries) / INDEX_ROWS) + 1 if index else 1
+    results = []
+    with PdfPages(report) as pdf:
+        if index:
+            for fig in index_pages(entries, firstPage):
+                pdf.savefig(fig)
+
+        for page, entry in enumerate(entries, start=firstPage):
+            result = plot_file(entry['file'], projectName=projectName, decimate=decimate, pdf=pdf)
+            if result['status'] != 'ok':
+                pdf.savefig(error_page(result))
+            result['page'] = page
+            results.append(result)
+            if progress is not None:
+                progress(len(results), len(entries), result)
+
+    results += [dict(dict.fromkeys(REPORT_COLUMNS), file=f, status='overgeslagen') for f in skipped]
+    return pd.DataFrame(results, columns=REPORT_COLUMNS + ['page'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maak plots van GEF en XML bestanden (BRO, DINO, SIKB0101)')
+    parser.add_argument('files', nargs='+', help='bestanden of mappen')
+    parser.add_argument('--output', default='./output', help='map voor de plots')
+    parser.add_argument('--type', dest='outputType', default='png', help='bestandstype van de plots, bijvoorbeeld png of pdf')
+    parser.add_argument('--workers', type=int, default=None, help='aantal processen, standaard het aantal cores')
+    parser.add_argument('--chunksize', type=int, default=None, help='aantal bestanden per pakketje voor een worker')
+    parser.add_argument('--interpret', action='store_true', help='maak ook een interpretatie van de sonderingen als boring')
+    parser.add_argument('--report', default=None, help='csv bestand voor het verslag')
+    parser.add_argument('--decimate', action='store_true', help='dun de lijnen van sonderingen uit tot de resolutie van de uitvoer, geeft kleinere pdf bestanden')
+    parser.add_argument('--pdf', default=None, help='schrijf alle plots als pagina\'s in dit pdf bestand in plaats van losse bestanden')
+    parser.add_argument('--incremental', action='store_true', help='plot alleen nieuwe en gewijzigde bestanden en verwijder plots van bestanden die er niet meer zijn')
+    parser.add_argument('--no-index', dest='index', action='store_false', help='geen overzicht vooraan de pdf')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.pdf is not None:
+        results = write_pdf_report(args.files, args.pdf, args.index, decimate=args.decimate)
+        if args.report is not None:
+            results.to_csv(args.report, sep=';', index=False)
+    else:
+        results = plot_tests(args.files, args.output, args.interpret, args.outputType, args.workers, args.chunksize, args.report, decimate=args.decimate, incremental=args.incremental)
+    counts = results['status'].value_counts()
+    print(f'{len(results)} bestanden in {time.perf_counter() - start:.1f} s: ' + ', '.join(f'{count} {status}' for status, count in counts.items()))
+    return 1 if 'fout' in counts.index else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Cache op schijf voor ingelezen sonderingen en boringen (GEF, BRO XML, DINO XML)
+De cache staat standaard uit, aanzetten met enable_cache(folder)
+"""
+
+__author__ = "Thomas van der Linden"
+__credits__ = ""
+__license__ = "EUPL-1.2"
+__version__ = ""
+__maintainer__ = "Thomas van der Linden"
+__email__ = "t.van.der.linden@amsterdam.nl"
+__status__ = "Dev"
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+class ParseCache():
+    # een bestand per ingelezen test, de sleutel is een hash van de inhoud, de loader, de argumenten en de parserversie
+    # bij meer dan maxSize bytes worden de bestanden verwijderd die het langst niet gebruikt zijn
+    def __init__(self, folder, maxSize=2e9):
+        self.folder = folder
+        self.maxSize = maxSize
+        os.makedirs(self.folder, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in os.scandir(self.folder) if entry.name.endswith('.pkl'))
+
+    def key(self, content, *parts):
+        digest = hashlib.blake2b(content, digest_size=20)
+        for part in parts:
+            digest.update(repr(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, f'{key}.pkl')
+
+    def file_digest(self, path):
+        # de hash van de inhoud van een bestand, per pad, grootte en wijzigingsdatum bewaard in een .digest bestand
+        # alleen als een van die drie veranderd is wordt het hele bestand gelezen
+        stat = os.stat(path)
+        statKey = hashlib.blake2b(repr((os.path.abspath(path), stat.st_size, stat.st_mtime_ns)).encode('utf-8'), digest_size=20).hexdigest()
+        digestPath = os.path.join(self.folder, f'{statKey}.digest')
+        try:
+            with open(digestPath) as f:
+                return f.read()
+        except OSError:
+            pass
+
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+        fd, tmpPath = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(digest)
+        os.replace(tmpPath, digestPath)
+        return digest
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # een beschadigd bestand wordt verwijderd, de test wordt dan opnieuw ingelezen
+            self.remove(path)
+            return None
+        # de wijzigingsdatum geeft aan wanneer een bestand het laatst gebruikt is
+        os.utime(path)
+        return state
+
+    def put(self, key, state):
+        # eerst naar een tijdelijk bestand schrijven, zodat een ander proces nooit een half bestand leest
+        fd, tmpPath = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.size += os.path.getsize(tmpPath)
+        os.replace(tmpPath, self.path(key))
+        if self.size > self.maxSize:
+            self.evict()
+
+    def remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.size -= size
+        except OSError:
+            pass
+
+    def evict(self):
+        # verwijder de bestanden die het langst niet gebruikt zijn tot de cache weer onder 90% van maxSize zit
+        entries = sorted((entry for entry in os.scandir(self.folder) if entry.name.endswith('.pkl')), key=lambda entry: entry.stat().st_mtime)
+        self.size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.size <= 0.9 * self.maxSize:
+                break
+            self.remove(entry.path)
+
+    def clear(self):
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.pkl'):
+                self.remove(entry.path)
+            elif entry.name.endswith('.digest'):
+                os.remove(entry.path)
+
+_cache = None
+
+def enable_cache(folder=os.path.join(os.path.expanduser('~'), '.cache', 'gefxml_viewer'), maxSize=2e9):
+    # zet de cache aan voor alle loaders die met cached zijn gemarkeerd
+    global _cache
+    _cache = ParseCache(folder, maxSize)
+    return _cache
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+def restore(test, key, attr, reload):
+    # lees één attribuut, zoals _data, opnieuw uit de cache, bijvoorbeeld na release_data
+    # staat het niet meer in de cache, dan wordt het bestand opnieuw ingelezen
+    state = _cache.get(key) if _cache is not None else None
+    if state is None or state.get(attr) is None:
+        reload()
+    else:
+        setattr(test, attr, state[attr])
+
+def cached(version):
+    # decorator voor de load_ methodes van Cpt en Bore
+    # de attributen van het object na het inlezen worden bewaard en bij een volgende keer teruggezet
+    # version is de parserversie, na een wijziging in het inlezen worden oude bestanden niet meer gebruikt
+    def decorator(loader):
+        signature = inspect.signature(loader)
+
+        @functools.wraps(loader)
+        def wrapper(self, *args, **kwargs):
+            if _cache is None:
+                return loader(self, *args, **kwargs)
+
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            arguments = dict(arguments.arguments)
+            del arguments['self']
+            # alleen de header of pas later inlezen is goedkoper dan een hash van het hele bestand
+            if arguments.get('metadataOnly') or arguments.get('lazy'):
+                return loader(self, *args, **kwargs)
+
+            # het eerste argument is het bestand, of de bytes van een al ingelezen bestand, of bij fromFile=False de XML zelf
+            source = next(iter(arguments.values()))
+            if isinstance(source, (bytes, bytearray)) or not arguments.get('fromFile', True):
+                content = source.encode('utf-8') if isinstance(source, str) else bytes(source)
+                arguments.pop(next(iter(arguments)))
+            else:
+                content = _cache.file_digest(source).encode('utf-8')
+            # een al gelezen header volgt uit de inhoud en hoort niet in de sleutel
+            arguments.pop('header', None)
+            # de bestandsnaam zit ook in de sleutel, want die wordt bijvoorbeeld als filename bewaard
+            key = _cache.key(content, type(self).__name__, loader.__name__, sorted(arguments.items()), version)
+
+            state = _cache.get(key)
+            if state is None:
+                result = loader(self, *args, **kwargs)
+                # functies om data opnieuw in te lezen worden niet bewaard, de data zelf wel
+                state = {attr: value for attr, value in self.__dict__.items() if not attr.endswith('Loader')}
+                _cache.put(key, state)
+                return result
+
+            self.__dict__.update(state)
+            # in plaats van de functies om data opnieuw in te lezen komt de data dan uit de cache, zodat release_data ook werkt
+            reload = functools.partial(loader, self, *args, **kwargs)
+            for attr in list(self.__dict__):
+                if attr.endswith('Loader') and state.get(attr[:-len('Loader')]) is not None:
+                    setattr(self, attr, functools.partial(restore, self, key, attr[:-len('Loader')], reload))
+            return None
+        return wrapper
+    return decorator
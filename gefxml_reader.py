@@ -10,128 +10,479 @@ __maintainer__ = "Thomas van der Linden"
 __email__ = "t.van.der.linden@amsterdam.nl"
 __status__ = "Dev"
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import partial, lru_cache
+from contextlib import contextmanager
 from typing import OrderedDict
 import pandas as pd
-from io import StringIO
+from io import StringIO, BytesIO
 import numpy as np
 import re
 from matplotlib.gridspec import GridSpec
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from xml.etree.ElementTree import ElementTree
 import xml.etree.ElementTree as ET
 import pyproj
 import ast
 import os
+import mmap
+import warnings
+import textwrap
+import hashlib
+import json
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from gefxml_cache import cached
+
+# verhoog de versie bij iedere wijziging die de uitkomst van het inlezen verandert
+# bestanden in de cache van een oudere versie worden dan niet meer gebruikt
+PARSER_VERSION = 1
+# idem voor de plots, bij een andere versie worden de plots in een map met een manifest opnieuw gemaakt, zie gefxml_batch.py
+PLOT_VERSION = 1
 
 @dataclass
-class Test():
-    def __init__(self):
-        self.type = str()
-    
-    def type_from_gef(self, gefFile):
-        procedure_pattern = re.compile(r'#PROCEDURECODE\s*=\s*(?P<type>.*)\s*')
-        report_pattern = re.compile(r'#REPORTCODE\s*=\s*(?P<type>.*)\s*')
-        
-        with open(gefFile) as f:
-            gef_raw = f.read()
-
+class GefHeader():
+    # alle regels uit de header, per keyword een lijst met de waarden (een keyword kan vaker voorkomen)
+    # data_offset is de positie in bytes van de eerste regel na #EOH
+    keywords: dict = field(default_factory=dict)
+    data_offset: int = 0
+
+    def get(self, keyword):
+        # waarde van het eerste voorkomen van een keyword
         try:
-            match = re.search(procedure_pattern, gef_raw)
-            if 'CPT' in match.group('type').upper():
-                return 'cpt'
-            elif 'BORE' in match.group('type').upper():
-                return 'bore'
-        except:
-            pass
-
+            return self.keywords[keyword][0]
+        except (KeyError, IndexError):
+            return None
+
+    def split(self, keyword):
+        # waarde van het eerste voorkomen van een keyword, opgesplitst op komma's
+        value = self.get(keyword)
+        if value is None:
+            return []
+        return [part.strip() for part in value.split(',')]
+
+    def _date(self, keyword):
         try:
-            match = re.search(report_pattern, gef_raw)
-            if 'CPT' in match.group('type').upper():
+            year, month, day = self.split(keyword)[:3]
+            return {'year': int(year), 'month': int(month), 'day': int(day)}
+        except ValueError:
+            return {}
+
+    @property
+    def gefid(self):
+        return dict(zip(['major', 'minor', 'build'], self.split('GEFID')))
+
+    @property
+    def reportcode(self):
+        return dict(zip(['type', 'major', 'minor', 'build'], self.split('REPORTCODE')))
+
+    @property
+    def procedurecode(self):
+        return dict(zip(['type', 'major', 'minor', 'build'], self.split('PROCEDURECODE')))
+
+    @property
+    def xyid(self):
+        return dict(zip(['coordsys', 'X', 'Y', 'dx', 'dy'], self.split('XYID')))
+
+    @property
+    def zid(self):
+        return dict(zip(['datum', 'Z', 'dZ'], self.split('ZID')))
+
+    @property
+    def startdate(self):
+        return self._date('STARTDATE')
+
+    @property
+    def filedate(self):
+        return self._date('FILEDATE')
+
+    @property
+    def columnseparator(self):
+        # zonder gedeclareerde separator zijn de kolommen gescheiden door spaties
+        return self.get('COLUMNSEPARATOR') or " "
+
+    @property
+    def recordseparator(self):
+        return self.get('RECORDSEPARATOR') or ""
+
+    @property
+    def columninfo(self):
+        # kolomnummers in pandas starten op 0, in gef op 1
+        # de eenheid kan komma's bevatten, parameter en quantitynr staan altijd achteraan
+        columninfo = {}
+        for value in self.keywords.get('COLUMNINFO', []):
+            parts = [part.strip() for part in value.split(',')]
+            try:
+                columninfo[int(parts[0]) - 1] = {
+                    'unit': ','.join(parts[1:-2]).strip(),
+                    'parameter': parts[-2],
+                    'quantitynr': re.match(r'\d*', parts[-1]).group()
+                }
+            except (ValueError, IndexError):
+                pass
+        return columninfo
+
+    @property
+    def columnvoid(self):
+        columnvoid = {}
+        for value in self.keywords.get('COLUMNVOID', []):
+            columnnr, _, voidvalue = value.partition(',')
+            try:
+                columnvoid[int(columnnr) - 1] = float(voidvalue)
+            except ValueError:
+                pass
+        return columnvoid
+
+    def _numbered(self, keyword):
+        # informatie in measurementtext en measurementvar kan meerdere namen hebben
+        # nummers zijn wel gestandardiseerd
+        numbered = {}
+        for value in self.keywords.get(keyword, []):
+            number, _, text = value.partition(',')
+            numbered[number.strip()] = text.strip()
+        return numbered
+
+    @property
+    def measurementtexts(self):
+        return self._numbered('MEASUREMENTTEXT')
+
+    @property
+    def measurementvars(self):
+        return self._numbered('MEASUREMENTVAR')
+
+    @property
+    def comments(self):
+        return list(self.keywords.get('COMMENT', []))
+
+def read_gef_header(gefFile):
+    # lees de header van een GEF in één keer in, tot en met #EOH
+    # gefFile kan een bestandsnaam zijn of de bytes van een al ingelezen bestand (bytes, mmap)
+    # bij een bestandsnaam wordt na #EOH niet verder gelezen
+    if isinstance(gefFile, (bytes, bytearray, mmap.mmap)):
+        eoh = gefFile.find(b'#EOH')
+        # #EOH moet aan het begin van een regel staan
+        while eoh > 0 and gefFile[eoh - 1:eoh] not in (b'\n', b'\r'):
+            eoh = gefFile.find(b'#EOH', eoh + 1)
+        if eoh == -1:
+            data_offset = len(gefFile)
+        else:
+            data_offset = gefFile.find(b'\n', eoh) + 1 or len(gefFile)
+        header_raw = bytes(gefFile[:data_offset])
+    else:
+        lines = []
+        with open(gefFile, 'rb') as f:
+            for line in f:
+                lines.append(line)
+                if line.startswith(b'#EOH'):
+                    break
+        header_raw = b''.join(lines)
+        data_offset = len(header_raw)
+
+    try:
+        header_text = header_raw.decode('utf-8')
+    except UnicodeDecodeError:
+        header_text = header_raw.decode('latin-1')
+
+    header = GefHeader(data_offset=data_offset)
+    for line in header_text.splitlines():
+        if not line.startswith('#') or '=' not in line:
+            continue
+        keyword, value = line[1:].split('=', 1)
+        header.keywords.setdefault(keyword.strip().upper(), []).append(value.strip())
+    return header
+
+# sinds numpy 1.23 is loadtxt in C geschreven, bij oudere versies is np.fromstring sneller
+NUMPY_LOADTXT_C = np.lib.NumpyVersion(np.__version__) >= '1.23.0'
+
+def parse_gef_data(gefData, offset=0, columnseparator=" ", recordseparator="", columnvoid=None, nrOfColumns=None, dtype=np.float64):
+    # zet het numerieke datablok van een GEF direct om in een 2D numpy array, zonder pandas
+    # gefData zijn de bytes van het bestand (bytes of mmap), offset is de positie na #EOH
+    # een ValueError betekent dat het blok niet netjes numeriek is, dan kan pandas het alsnog proberen
+    if columnvoid is None:
+        columnvoid = {}
+    delimiter = columnseparator if columnseparator.strip() != "" else None
+
+    # het aantal kolommen, de recordseparator aan het eind van een regel telt niet mee
+    if nrOfColumns is None:
+        firstLine = ""
+        position = offset
+        while firstLine.strip() == "" and position < len(gefData):
+            end = gefData.find(b'\n', position)
+            end = len(gefData) if end == -1 else end + 1
+            firstLine = bytes(gefData[position:end]).decode('latin-1')
+            position = end
+        nrOfColumns = len([value for value in firstLine.split(delimiter) if value.strip() not in ("", recordseparator)])
+        if firstLine.strip() == "":
+            raise ValueError('geen data gevonden na #EOH')
+    if nrOfColumns == 0:
+        raise ValueError('geen kolommen gevonden na #EOH')
+
+    if NUMPY_LOADTXT_C:
+        # loadtxt leest het blok in stukken vanuit een stream, BytesIO deelt de bytes zonder kopie
+        # uit een mmap wordt het datablok één keer naar het geheugen gekopieerd, dat is sneller dan regel voor regel lezen
+        # door usecols vallen de lege kolom en de recordseparator aan het eind van de regel weg
+        if isinstance(gefData, mmap.mmap):
+            stream = BytesIO(memoryview(gefData)[offset:])
+        else:
+            stream = BytesIO(gefData)
+            stream.seek(offset)
+        with warnings.catch_warnings():
+            # een leeg datablok geeft een warning, dat wordt hieronder een ValueError
+            warnings.simplefilter('ignore', UserWarning)
+            values = np.loadtxt(stream, dtype=dtype, delimiter=delimiter, usecols=range(nrOfColumns), comments=None, encoding='latin-1', ndmin=2)
+    else:
+        # kolom- en recordseparators worden spaties, dan kan numpy het in één keer lezen
+        data = gefData[offset:]
+        # een lege waarde (twee separators na elkaar of een separator aan het begin van een regel) zou dan wegvallen
+        if delimiter is not None:
+            separator = re.escape(delimiter.encode('latin-1'))
+            if re.search(rb'(^|\n|' + separator + rb')[ \t]*' + separator, data):
+                raise ValueError('lege waarde in het datablok')
+        for separator in [columnseparator, recordseparator]:
+            if separator.strip() != "":
+                data = data.replace(separator.encode('latin-1'), b' ')
+        # lege regels aan het begin of eind tellen niet mee
+        data = data.strip()
+        lines = data.count(b'\n') + 1 if len(data) > 0 else 0
+        with warnings.catch_warnings():
+            # oudere numpy versies geven een warning in plaats van een ValueError als niet alles gelezen kan worden
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                values = np.fromstring(data, dtype=dtype, sep=' ')
+            except DeprecationWarning as e:
+                raise ValueError(str(e))
+        # het aantal waarden moet precies in de kolommen passen
+        if values.size != lines * nrOfColumns:
+            raise ValueError(f'{values.size} waarden passen niet in {lines} regels met {nrOfColumns} kolommen')
+        values = values.reshape(lines, nrOfColumns)
+
+    if len(values) == 0:
+        raise ValueError('geen data gevonden na #EOH')
+
+    # vervang de dummy waarden door nan
+    for columnnr, voidvalue in columnvoid.items():
+        if columnnr < nrOfColumns:
+            column = values[:, columnnr]
+            column[column == np.array(voidvalue, dtype=dtype)] = np.nan
+    return values
+
+@contextmanager
+def gef_buffer(gefFile):
+    # de bytes van een GEF: een mmap van het bestand, of de bytes zelf als het bestand al is ingelezen
+    if isinstance(gefFile, (bytes, bytearray, mmap.mmap)):
+        yield gefFile
+    elif os.path.getsize(gefFile) == 0:
+        # van een leeg bestand kan geen mmap gemaakt worden
+        yield b''
+    else:
+        with open(gefFile, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as gefMap:
+            yield gefMap
+
+# de kolommen van de values van een sondering in BRO XML, in deze volgorde
+BRO_CPT_COLUMNS = [
+    "penetrationLength", "depth", "elapsedTime", 
+    "coneResistance", "correctedConeResistance", "netConeResistance", 
+    "magneticFieldStrengthX", "magneticFieldStrengthY", "magneticFieldStrengthZ", 
+    "magneticFieldStrengthTotal", "electricalConductivity", 
+    "inclinationEW", "inclinationNS", "inclinationX", "inclinationY", "inclinationResultant",
+    "magneticInclination", "magneticDeclination",
+    "localFriction",
+    "poreRatio", "temperature", 
+    "porePressureU1", "porePressureU2", "porePressureU3",
+    "frictionRatio"]
+
+def decode_bro_values(text, columns=None, dtype=np.float64):
+    # zet de values van een BRO CPT (waarden gescheiden door , en regels door ;) direct om in een 2D numpy array
+    # columns is een lijst met namen uit BRO_CPT_COLUMNS, alleen die kolommen worden omgezet, in die volgorde
+    # de dummy waarde -999999 wordt nan
+    # een ValueError betekent dat de tekst niet netjes numeriek is, dan kan pandas het alsnog proberen
+    if columns is None:
+        columns = BRO_CPT_COLUMNS
+    unknown = [column for column in columns if column not in BRO_CPT_COLUMNS]
+    if len(unknown) > 0:
+        raise KeyError(f'onbekende kolommen {unknown}')
+    usecols = [BRO_CPT_COLUMNS.index(column) for column in columns]
+
+    if NUMPY_LOADTXT_C:
+        # iedere regel is een los item, door usecols worden de andere kolommen niet omgezet
+        # lege regels, zoals na de laatste ;, worden overgeslagen
+        values = np.loadtxt(text.split(';'), dtype=dtype, delimiter=',', usecols=usecols, comments=None, ndmin=2)
+    else:
+        lines = len([line for line in text.split(';') if line.strip() != ""])
+        with warnings.catch_warnings():
+            # oudere numpy versies geven een warning in plaats van een ValueError als niet alles gelezen kan worden
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                values = np.fromstring(text.replace(';', ','), dtype=dtype, sep=',')
+            except DeprecationWarning as e:
+                raise ValueError(str(e))
+        # het aantal waarden moet precies in de kolommen passen
+        if values.size != lines * len(BRO_CPT_COLUMNS):
+            raise ValueError(f'{values.size} waarden passen niet in {lines} regels met {len(BRO_CPT_COLUMNS)} kolommen')
+        values = values.reshape(lines, len(BRO_CPT_COLUMNS))[:, usecols]
+
+    values[values == -999999] = np.nan
+    return values
+
+@lru_cache(maxsize=None)
+def localname(tag):
+    # de naam van een XML element zonder namespace, '{http://www.broservices.nl/...}broId' wordt 'broId'
+    # dit wordt één keer per verschillende tag uitgerekend
+    return tag.rpartition('}')[2]
+
+@lru_cache(maxsize=None)
+def tag_kind(tag, kinds):
+    # de eerste naam uit kinds die voorkomt in de naam van het element, anders None
+    # voor bestanden waarin de namen van elementen niet vastliggen (SIKB0101), ook één keer per tag uitgerekend
+    name = localname(tag)
+    for kind in kinds:
+        if kind in name:
+            return kind
+    return None
+
+def element_texts(element, removeWhitespace=False):
+    # de teksten van een element en alle onderliggende elementen, op naam zonder namespace
+    # standaard worden alleen regeleinden met de inspringing erna weggehaald, met removeWhitespace alle witruimte
+    if removeWhitespace:
+        return {localname(p.tag): ''.join(p.text.split()) for p in element.iter() if p.text is not None}
+    return {localname(p.tag): ''.join([line if i == 0 else line.lstrip() for i, line in enumerate(p.text.split('\n'))]) for p in element.iter() if p.text is not None}
+
+def dispatch_xml(elements, handlers):
+    # stuur ieder element naar de functie voor zijn naam, elementen zonder functie worden overgeslagen
+    for element in elements:
+        handler = handlers.get(localname(element.tag))
+        if handler is not None:
+            handler(element)
+
+# het aantal bytes aan het begin van een bestand dat wordt gelezen om het soort bestand te bepalen
+SNIFF_SIZE = 65536
+
+@dataclass
+class SniffResult():
+    # het soort bestand, bepaald zonder het hele bestand te lezen
+    # kind is 'cpt', 'bore', 'sikb' of 'dino', format is 'gef' of 'xml'
+    # bij GEF is de header al gelezen en kan die aan de loaders worden meegegeven
+    format: str = None
+    kind: str = None
+    version: str = None
+    header: GefHeader = None
+    root: str = None
+    namespaces: dict = field(default_factory=dict)
+
+def gef_kind(header):
+    # alleen de header is nodig om het type te bepalen
+    for keyword in ['PROCEDURECODE', 'REPORTCODE']:
+        code = header.get(keyword)
+        if code is not None:
+            if 'CPT' in code.upper():
                 return 'cpt'
-            elif 'BORE' in match.group('type').upper():
+            elif 'BORE' in code.upper():
                 return 'bore'
-        except:
-            pass
+    return None
 
-    def type_from_xml(self, xmlFile):
-        with open(xmlFile) as f:
-            raw_xml = f.read()
-        # TODO: dit kan beter, maar er lijkt niet echt een standaard te zijn
-        if 'CPTSTANDARD' in raw_xml.upper():
-            return 'cpt'
-        elif 'SIKB0101' in raw_xml.upper():
-            return 'sikb'
+def sniff(source, size=SNIFF_SIZE):
+    # bepaal het soort bestand uit de eerste size bytes
+    # source is een bestandsnaam of de bytes van een al ingelezen bestand (bytes, mmap)
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        head = bytes(source[:size])
+    else:
+        with open(source, 'rb') as f:
+            head = f.read(size)
+
+    # GEF begint met #GEFID, eventueel na een BOM of witruimte
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'#'):
+        # meestal staat de hele header in het begin, anders wordt verder gelezen tot #EOH
+        if re.search(rb'(^|[\r\n])#EOH', head):
+            header = read_gef_header(head)
         else:
-            return 'bore'
+            header = read_gef_header(bytes(source) if isinstance(source, memoryview) else source)
+        gefid = header.split('GEFID')
+        version = '.'.join(gefid) if gefid else None
+        return SniffResult(format='gef', kind=gef_kind(header), version=version, header=header)
+
+    # bij XML zijn het root element en de namespaces genoeg, daarna wordt gestopt
+    result = SniffResult(format='xml')
+    parser = ET.XMLPullParser(events=('start-ns', 'start'))
+    try:
+        parser.feed(head)
+        for event, item in parser.read_events():
+            if event == 'start-ns':
+                prefix, uri = item
+                result.namespaces[prefix] = uri
+            else:
+                result.root = localname(item.tag)
+                rootNamespace = item.tag[1:].partition('}')[0] if item.tag.startswith('{') else ''
+                version = re.search(r'/(\d+(\.\d+)*)$', rootNamespace)
+                result.version = version.group(1) if version else item.attrib.get('version')
+                break
+    except ET.ParseError:
+        pass
+
+    uris = ' '.join(result.namespaces.values()).lower()
+    if 'sikb0101' in uris:
+        result.kind = 'sikb'
+    elif 'broservices.nl' in uris and 'cpt' in uris:
+        result.kind = 'cpt'
+    elif 'broservices.nl' in uris and 'bhr' in uris:
+        result.kind = 'bore'
+    # zonder bekende namespace wordt in het begin van het bestand gezocht
+    # TODO: dit kan beter, maar er lijkt niet echt een standaard te zijn
+    elif b'CPTSTANDARD' in head.upper():
+        result.kind = 'cpt'
+    elif b'SIKB0101' in head.upper():
+        result.kind = 'sikb'
+    elif b'lithoInterval' in head or b'dinoloket' in head.lower():
+        result.kind = 'dino'
+    else:
+        result.kind = 'bore'
+    return result
 
-    def metadata_from_gef(self, gefFile):
-        filename_pattern = re.compile(r'(.*[\\/])*(?P<filename>.*)\.')
-        gefid_pattern = re.compile(r'#GEFID\s*=\s*(?P<major>\d),\s*(?P<minor>\d),\s*(?P<build>\d)\s*')
-        xydxdy_id_pattern = re.compile(r'#XYID\s*=\s*(?P<coordsys>\d*)\s*,\s*(?P<X>\d*.?\d*)\s*,\s*(?P<Y>\d*.?\d*)\s*,\s*(?P<dx>\d*.?\d*),\s*(?P<dy>\d*.?\d*)\s*')
-        xy_id_pattern = re.compile(r'#XYID\s*=\s*(?P<coordsys>\d*)\s*,\s*(?P<X>\d*.?\d*)\s*,\s*(?P<Y>\d*.?\d*)\s*')
-        z_id_pattern = re.compile(r'#ZID\s*=\s*(?P<datum>\d*)\s*,\s*(?P<Z>.*)\s*')
-        zdz_id_pattern = re.compile(r'#ZID\s*=\s*(?P<datum>\d*)\s*,\s*(?P<Z>.*)\s*,\s*(?P<dZ>.*)\s*')
-        companyid_pattern = re.compile(r'#COMPANYID\s*=\s*(?P<companyid>.*),\s*.*,\s*\d*\s*') 
-        projectid_pattern = re.compile(r'#PROJECTID\s*=\s*(?P<projectid>\d*)\s*')
-        projectname_pattern = re.compile(r'#PROJECTNAME\s*=\s*(?P<projectname>.*)\s*')
-
-        measurementtext_pattern = re.compile(r'#MEASUREMENTTEXT\s*=\s*(?P<number>\d*),\s*(?P<text>.*)\s*')
-        measurementvar_pattern = re.compile(r'#MEASUREMENTVAR\s*=\s*(?P<number>\d*),\s*(?P<text>.*)\s*')
-        comment_pattern = re.compile(r'#COMMENT\s*=\s(?P<text>.*)\s*')
-
-        reportcode_pattern = re.compile(r'#REPORTCODE\s*=\s*(?P<type>.*),\s*(?P<major>\d),\s*(?P<minor>\d),\s*(?P<build>\d)\s*')
-        procedurecode_pattern = re.compile(r'#REPORTCODE\s*=\s*(?P<type>.*),\s*(?P<major>\d),\s*(?P<minor>\d),\s*(?P<build>\d)\s*')
+@dataclass
+class Test():
+    def __init__(self):
+        self.type = str()
+    
+    def type_from_gef(self, gefFile, header=None):
+        # alleen de header is nodig om het type te bepalen
+        if header is None:
+            header = read_gef_header(gefFile)
+        return gef_kind(header)
 
-        # TODO companyid kan eigenlijk niet in een measurementtext voorkomen, misschien als 22 of 23 remarks
-        companyid_in_measurementext_pattern = re.compile(r'#MEASUREMENTTEXT\s*=\s*\d*,\s*(?P<companyid>.*),\s*boorbedrijf\s*')
-        
-        startdate_pattern = re.compile(r'#STARTDATE\s*=\s*(?P<year>\d*),\s*(?P<month>\d*),\s*(?P<day>\d*)\s*')
-        filedate_pattern = re.compile(r'#FILEDATE\s*=\s*(?P<year>\d*),\s*(?P<month>\d*),\s*(?P<day>\d*)\s*')
-        testid_pattern = re.compile(r'#TESTID\s*=\s*(?P<testid>.*)\s*')
+    def type_from_xml(self, xmlFile):
+        # alleen het begin van het bestand wordt gelezen, zie sniff
+        return sniff(xmlFile).kind
 
-        with open(gefFile) as f:
-            gef_raw = f.read()
+    def metadata_from_gef(self, gefFile, header=None):
+        # de header wordt één keer ingelezen en kan door load_gef worden meegegeven
+        if header is None:
+            header = read_gef_header(gefFile)
+        self.header = header
 
+        # bij bytes is er geen bestandsnaam
+        filename_pattern = re.compile(r'(.*[\\/])*(?P<filename>.*)\.')
         try:
             match = re.search(filename_pattern, gefFile)
             self.filename = match.group('filename')
         except:
             pass
-        try:
-            match = re.search(gefid_pattern, gef_raw)
-            self.gefid = match.groupdict()
-        except:
-            pass
 
-        try:
-            match = re.search(reportcode_pattern, gef_raw)
-            self.reportcode = match.groupdict()
-        except:
-            pass
+        self.gefid = header.gefid
+        self.reportcode = header.reportcode
+        self.procedurecode = header.procedurecode
+
+        if header.get('TESTID') is not None:
+            self.testid = header.get('TESTID')
 
         try:
-            match = re.search(procedurecode_pattern, gef_raw)
-            self.procedurecode = match.groupdict()
-        except:
-            pass
-        try:
-            match = re.search(testid_pattern, gef_raw)
-            self.testid = match.group('testid')
-        except:
-            pass
-        try:
-            match = re.search(xydxdy_id_pattern, gef_raw)
-            self.easting = float(match.group('X'))
-            self.northing = float(match.group('Y'))
-            self.srid = match.group('coordsys')
-        except:
-            pass
-        try:
-            match = re.search(xy_id_pattern, gef_raw)
-            self.easting = float(match.group('X'))
-            self.northing = float(match.group('Y'))
-            self.srid = match.group('coordsys')
+            xyid = header.xyid
+            self.easting = float(xyid['X'])
+            self.northing = float(xyid['Y'])
+            self.srid = xyid['coordsys']
         except:
             pass
 
@@ -149,43 +500,31 @@ class Test():
                     self.easting, self.northing = transformer.transform(self.easting, self.northing)
 
         try:
-            match = re.search(zdz_id_pattern, gef_raw)
-            self.groundlevel = float(match.group('Z'))
-        except:
-            pass
-        try:
-            match = re.search(z_id_pattern, gef_raw)
-            self.groundlevel = float(match.group('Z'))
-        except:
-            pass
-        try:
-            match = re.search(companyid_pattern, gef_raw)
-            self.companyid = match.group('companyid')
-        except:
-            pass
-        try:
-            match = re.search(companyid_in_measurementext_pattern, gef_raw)
-            self.companyid = match.group('companyid')
-        except:
-            pass
-        try:
-            match = re.search(projectid_pattern, gef_raw)
-            self.projectid = match.group('projectid')
+            self.groundlevel = float(header.zid['Z'])
         except:
             pass
 
-        try:
-            match = re.search(startdate_pattern, gef_raw)
-            self.startdate = {k: int(v) for k, v in match.groupdict().items()}
-        except:
-            self.startdate = {}
-            pass
-        try:
-            match = re.search(filedate_pattern, gef_raw)
-            self.filedate = {k: int(v) for k, v in match.groupdict().items()}
-        except:
-            self.filedate = {}
-            pass
+        # COMPANYID bestaat uit naam, nummer en landcode, de naam kan komma's bevatten
+        companyid = header.split('COMPANYID')
+        if len(companyid) >= 3:
+            self.companyid = ', '.join(companyid[:-2])
+
+        self.measurementtexts = header.measurementtexts
+        self.measurementvars = header.measurementvars
+        self.comments = header.comments
+
+        # TODO companyid kan eigenlijk niet in een measurementtext voorkomen, misschien als 22 of 23 remarks
+        for text in self.measurementtexts.values():
+            parts = [part.strip() for part in text.split(',')]
+            if len(parts) > 1 and parts[-1].startswith('boorbedrijf'):
+                self.companyid = ', '.join(parts[:-1])
+                break
+
+        if header.get('PROJECTID') is not None:
+            self.projectid = re.match(r'\d*', header.get('PROJECTID')).group()
+
+        self.startdate = header.startdate
+        self.filedate = header.filedate
 
         # instellen van 1 date t.b.v. plot en andere verwerking
         # als alleen startdate gedefinieerd is
@@ -198,55 +537,85 @@ class Test():
         elif len(self.filedate.keys()) == 3:
             self.date = self.filedate
 
-        try:
-            # informatie in measurementtext kan meerdere namen hebben
-            # nummers zijn wel gestandardiseerd
-            matches = re.finditer(measurementtext_pattern, gef_raw)
-            for match in matches:
-                number = match.group('number')
-                text = match.group('text')
-                self.measurementtexts[number] = text
-        except:
-            pass
+        if header.get('PROJECTNAME') is not None:
+            self.projectname = header.get('PROJECTNAME')
+        elif '2' in self.measurementtexts.keys():
+            self.projectname = self.measurementtexts['2']
 
-        try:
-            # informatie in measurementvars kan meerdere namen hebben
-            # nummers zijn wel gestandardiseerd
-            matches = re.finditer(measurementvar_pattern, gef_raw)
-            for match in matches:
-                number = match.group('number')
-                text = match.group('text')
-                self.measurementvars[number] = text
-        except:
-            pass
+    def metadata_from_xml(self, xmlFile, fromFile=True, idTags=['broId'], stopTags=[]):
+        # lees alleen de metadata uit een BRO XML
+        # het inlezen stopt bij het eerste element uit stopTags, de meetwaarden of boorbeschrijving worden niet gelezen
+        if fromFile:
+            source = open(xmlFile, 'rb')
+        else:
+            # xmlFile is dan de string met XML (lezen via API)
+            source = BytesIO(xmlFile.encode('utf-8') if isinstance(xmlFile, str) else xmlFile)
+
+        handlers = self.xml_metadata_handlers(idTags)
+        with source:
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    if localname(element.tag) in stopTags:
+                        break
+                else:
+                    handler = handlers.get(localname(element.tag))
+                    if handler is not None:
+                        handler(element)
 
-        try:
-            # informatie in comments toevoegen aan een lijst
-            matches = re.finditer(comment_pattern, gef_raw)
-            for match in matches:
-                text = match.group('text')
-                self.comments.append(text)
-        except:
-            pass
+        if fromFile:
+            filename_pattern = re.compile(r'(.*[\\/])*(?P<filename>.*)\.')
+            match = re.search(filename_pattern, xmlFile)
+            self.filename = match.group('filename')
 
-        try:
-            match = re.search(projectname_pattern, gef_raw)
-            self.projectname = match.group('projectname')
-        except:
-            if '2' in self.measurementtexts.keys():
-                self.projectname = self.measurementtexts['2']
-            else:
+    def xml_metadata_handlers(self, idTags=['broId']):
+        # functies voor de metadata die in iedere BRO XML op dezelfde manier staat, op naam van het element
+        def set_testid(element):
+            self.testid = element.text
+
+        def set_location(element):
+            location = element_texts(element)
+            self.easting = float(location['pos'].split()[0])
+            self.northing = float(location['pos'].split()[1])
+
+        def set_groundlevel(element):
+            verticalPosition = element_texts(element)
+            self.groundlevel = float(verticalPosition['offset'])
+
+        def set_finaldepth(element):
+            self.finaldepth = float(element.text)
+
+        def set_date(element):
+            date = element_texts(element)
+            try: # een datum is niet verplicht
+                self.date['year'] = int(date['date'].split('-')[0])
+                self.date['month'] = int(date['date'].split('-')[1])
+                self.date['day'] = int(date['date'].split('-')[2])
+            except:
                 pass
 
+        handlers = {tag: set_testid for tag in idTags}
+        handlers.update({
+            'deliveredLocation': set_location,
+            'deliveredVerticalPosition': set_groundlevel,
+            # finalDepth bij een CPT, finalDepthBoring bij een boring
+            'finalDepth': set_finaldepth,
+            'finalDepthBoring': set_finaldepth,
+            'researchReportDate': set_date,
+            'descriptionReportDate': set_date
+        })
+        return handlers
+
 @dataclass(repr=True, eq=True)
 class Cpt(Test):
     
     easting: float = None
     northing: float = None
     groundlevel: float = -9999
-    data: pd.DataFrame() = None
     
     def __init__(self):
+        # de meetwaarden worden via de property data gelezen, zie load_gef en load_xml
+        self._data = None
+        self._dataLoader = None
         self.removedlayers = {}
         self.srid = None
         self.testid = None
@@ -258,55 +627,93 @@ class Cpt(Test):
         self.projectname = None
         self.filedate = {}
         self.testdate = {}
-
-    def load_xml(self, xmlFile, checkAddFrictionRatio=False, checkAddDepth=False, fromFile=True):
+        # het bestand van de laatste plot, zie plot
+        self.plotFile = None
+
+    @property
+    def data(self):
+        # bij lazy laden worden de meetwaarden pas bij de eerste keer opvragen ingelezen
+        # het resultaat blijft bewaard tot release_data
+        if self._data is None and self._dataLoader is not None:
+            self._dataLoader()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    def release_data(self):
+        # geef het geheugen van de meetwaarden vrij
+        # als ze uit een bestand komen, worden ze bij het opvragen opnieuw ingelezen
+        if self._dataLoader is not None:
+            self._data = None
+
+    @cached(PARSER_VERSION)
+    def load_xml(self, xmlFile, checkAddFrictionRatio=False, checkAddDepth=False, fromFile=True, metadataOnly=False, lazy=False, columns=None, dtype=np.float64):
+        # columns beperkt de meetwaarden tot deze kolommen uit BRO_CPT_COLUMNS, de andere worden niet omgezet
+
+        # metadataOnly leest alleen de metadata, het lezen stopt voor de meetwaarden
+        if metadataOnly:
+            self.metadata_from_xml(xmlFile, fromFile, idTags=['broId', 'objectIdAccountableParty'], stopTags=['conePenetrationTest'])
+            return
 
         # lees een CPT in vanuit een BRO XML
-        tree = ElementTree()
+        # de XML wordt met iterparse gelezen in plaats van als volledige ElementTree
+        # alleen de elementen die nodig zijn worden verwerkt, de rest wordt direct weer leeggemaakt
         if fromFile:
-            # Standaard functionaliteit voor wanneer de XML uit een file wordt gelezen
-            tree.parse(xmlFile)
-            root = tree.getroot()
+            source = open(xmlFile, 'rb')
         else:
             # Indien het fromFile argument op False wordt gezet, kan de data uit een string worden gelezen (lezen via API)
             # xmlFile is dan de string met XML 
-            root = ET.fromstring(xmlFile)
-
-        for element in root.iter():
-
-            if 'broId' in element.tag or 'objectIdAccountableParty' in element.tag:
-                self.testid = element.text
-
-            elif 'deliveredLocation' in element.tag:
-                location = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                self.easting = float(location['pos'].split()[0])
-                self.northing = float(location['pos'].split()[1])
-
-            elif 'deliveredVerticalPosition' in element.tag:
-                verticalPosition = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                self.groundlevel = float(verticalPosition['offset'])
-
-            elif 'finalDepth' in element.tag:
-                self.finaldepth = float(element.text)
-
-            elif 'researchReportDate' in element.tag:
-                date = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                try: # een datum is niet verplicht
-                    self.date['year'] = int(date['date'].split('-')[0])
-                    self.date['month'] = int(date['date'].split('-')[1])
-                    self.date['day'] = int(date['date'].split('-')[2])
-                except:
-                    pass
-
-            # er kan een dissipatietest inzitten, hiermee wordt alleen de cpt ingelezen. Die staat in dissipationTest
-            elif 'conePenetrationTest' in element.tag: 
-                for child in element.iter():
-                    if 'values' in child.tag:
-                        self.data = child.text
-
-            elif 'removedLayer' in element.tag:
-                # TODO: maak hier van een Bore() en plot die ook
-                self.removedlayers = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}      
+            source = BytesIO(xmlFile.encode('utf-8') if isinstance(xmlFile, str) else xmlFile)
+
+        # elementen waarvan de onderliggende elementen pas bij het einde worden gelezen
+        containerTags = {'deliveredLocation', 'deliveredVerticalPosition', 'researchReportDate', 'removedLayer'}
+        containerDepth = 0
+        # er kan een dissipatietest inzitten, alleen de values binnen conePenetrationTest zijn de cpt
+        inConePenetrationTest = False
+        values = None
+
+        def set_values(element):
+            nonlocal values
+            if inConePenetrationTest:
+                values = element.text
+
+        def end_cone_penetration_test(element):
+            nonlocal inConePenetrationTest
+            inConePenetrationTest = False
+
+        def set_removedlayers(element):
+            # TODO: maak hier van een Bore() en plot die ook
+            self.removedlayers = element_texts(element)
+
+        handlers = self.xml_metadata_handlers(idTags=['broId', 'objectIdAccountableParty'])
+        handlers.update({
+            'values': set_values,
+            'conePenetrationTest': end_cone_penetration_test,
+            'removedLayer': set_removedlayers
+        })
+
+        with source:
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                name = localname(element.tag)
+                if event == 'start':
+                    if name in containerTags:
+                        containerDepth += 1
+                    elif name == 'conePenetrationTest':
+                        inConePenetrationTest = True
+                    continue
+
+                handler = handlers.get(name)
+                if handler is not None:
+                    handler(element)
+
+                if name in containerTags:
+                    containerDepth -= 1
+                # maak het element leeg als het verwerkt is, zo blijft het geheugengebruik beperkt
+                # binnen een container gebeurt dat pas als de container zelf klaar is
+                if containerDepth == 0:
+                    element.clear()
 
         if fromFile:
             # Dit is enkel nodig als de XML uit een file komt
@@ -314,20 +721,24 @@ class Cpt(Test):
             match = re.search(filename_pattern, xmlFile)
             self.filename = match.group('filename')
 
-        dataColumns = [
-            "penetrationLength", "depth", "elapsedTime", 
-            "coneResistance", "correctedConeResistance", "netConeResistance", 
-            "magneticFieldStrengthX", "magneticFieldStrengthY", "magneticFieldStrengthZ", 
-            "magneticFieldStrengthTotal", "electricalConductivity", 
-            "inclinationEW", "inclinationNS", "inclinationX", "inclinationY", "inclinationResultant",
-            "magneticInclination", "magneticDeclination",
-            "localFriction",
-            "poreRatio", "temperature", 
-            "porePressureU1", "porePressureU2", "porePressureU3",
-            "frictionRatio"]
-        
-        self.data = pd.read_csv(StringIO(self.data), names=dataColumns, sep=",", lineterminator=';')
-        self.data.replace(-999999, np.nan, inplace=True)
+        # de tekst met meetwaarden wordt bewaard, het omzetten naar een dataframe gebeurt in load_xml_data
+        # met lazy=True gebeurt dat pas als data wordt opgevraagd
+        self._data = None
+        self._dataLoader = partial(self.load_xml_data, values, checkAddFrictionRatio, checkAddDepth, columns, dtype)
+        if not lazy:
+            self._dataLoader()
+
+    def load_xml_data(self, values, checkAddFrictionRatio=False, checkAddDepth=False, columns=None, dtype=np.float64):
+        if columns is None:
+            columns = BRO_CPT_COLUMNS
+
+        # zet de meetwaarden direct om in een array en dan in een dataframe
+        # de dummy waarden worden tijdens het omzetten al vervangen door nan
+        try:
+            self.data = pd.DataFrame(decode_bro_values(values, columns, dtype), columns=columns, copy=False)
+        except ValueError:
+            self.data = pd.read_csv(StringIO(values), names=BRO_CPT_COLUMNS, usecols=columns, sep=",", lineterminator=';')[columns]
+            self.data.replace(-999999, np.nan, inplace=True)
 
         # verwijder kolommen die niet gebruikt worden
         self.data.dropna(axis='columns', how='all', inplace=True)
@@ -349,7 +760,12 @@ class Cpt(Test):
         except:
             pass
 
-    def load_gef(self, gefFile, checkAddFrictionRatio=False, checkAddDepth=False):
+    @cached(PARSER_VERSION)
+    def load_gef(self, gefFile, checkAddFrictionRatio=False, checkAddDepth=False, dtype=np.float64, metadataOnly=False, lazy=False, header=None):
+        # gefFile is een bestandsnaam of de bytes van een al ingelezen bestand, header een al gelezen GefHeader (zie load)
+        # dtype=np.float32 halveert het geheugengebruik van de meetwaarden
+        # metadataOnly leest alleen de header, na #EOH wordt niet verder gelezen
+        # lazy=True leest eerst alleen de header, het datablok wordt gelezen als data wordt opgevraagd
         self.columnvoid_values = {}
         self.columninfo = {}
         self.measurementvars = {}
@@ -472,68 +888,75 @@ class Cpt(Test):
             42: 'Orientation between X axis inclination and North. See section 3.7 Sept 2006 N'
         }
 
-        self.metadata_from_gef(gefFile)
-
-        data_pattern = re.compile(r'#EOH\s*=\s*(?P<data>(.*\n)*)')
+        if metadataOnly:
+            self.metadata_from_gef(gefFile, header)
+            self.finaldepth_from_header()
+            return
 
-        columnvoid_pattern = re.compile(r'#COLUMNVOID\s*=\s*(?P<columnnr>\d*),\s*(?P<voidvalue>.*)\s*')
-        columninfo_pattern = re.compile(r'#COLUMNINFO\s*=\s*(?P<columnnr>\d*),\s*(?P<unit>.*),\s*(?P<parameter>.*),\s*(?P<quantitynr>\d*)\s*')
-        columnseparator_pattern = re.compile(r'#COLUMNSEPARATOR\s*=\s*(?P<columnseparator>.*)\s*')
-        recordseparator_pattern = re.compile(r'#RECORDSEPARATOR\s*=\s*(?P<recordseparator>.*)\s*')
+        # alleen de header wordt gelezen, die wordt gedeeld met metadata_from_gef
+        if header is None:
+            header = read_gef_header(gefFile)
+        self.metadata_from_gef(gefFile, header)
 
+        self.columnseparator = header.columnseparator
+        self.recordseparator = header.recordseparator
+        self.columnvoid_values = header.columnvoid
 
-        with open(gefFile) as f:
-            gef_raw = f.read()
+        # informatie in kolommen kan meerdere namen hebben
+        # nummers zijn wel gestandardiseerd
+        for columnnr, info in header.columninfo.items():
+            try:
+                self.columninfo[columnnr] = GEF_COLINFO[info['quantitynr']]
+            except KeyError:
+                pass
+            self.columninfoUnit[columnnr] = info['unit']
+            self.columninfoQuantNr[columnnr] = info['quantitynr']
 
         try:
-            match = re.search(data_pattern, gef_raw)
-            self.data = match.group('data')
-        except:
-            pass
-        try:
-            match = re.search(columnseparator_pattern, gef_raw)
-            self.columnseparator = match.group('columnseparator')
-        except:
-            pass
-        try:
-            match = re.search(recordseparator_pattern, gef_raw)
-            self.recordseparator = match.group('recordseparator')
-        except:
-            pass
+            nrOfColumns = int(header.get('COLUMN'))
+        except (TypeError, ValueError):
+            nrOfColumns = None
+
+        # onthoud waar het datablok begint, de regels voor het inlezen staan in de attributen hierboven
+        # met lazy=True wordt het datablok pas gelezen als data wordt opgevraagd
+        self._data = None
+        self._dataLoader = partial(self.load_gef_data, gefFile, header.data_offset, nrOfColumns, checkAddFrictionRatio, checkAddDepth, dtype)
+        if lazy:
+            # tot die tijd komt de einddiepte uit de header
+            self.finaldepth_from_header()
+        else:
+            self._dataLoader()
+
+    def finaldepth_from_header(self):
+        # de einddiepte staat in measurementvar 16, als die is ingevuld
         try:
-            matches = re.finditer(columnvoid_pattern, gef_raw)
-            for match in matches:
-                columnnr = match.group('columnnr')
-                voidvalue = match.group('voidvalue')
-                self.columnvoid_values[int(columnnr) - 1] = float(voidvalue)
-        except:
+            self.finaldepth = float(self.measurementvars['16'].split(',')[0])
+        except (KeyError, ValueError):
             pass
-        try:
-            # informatie in kolommen kan meerdere namen hebben
-            # nummers zijn wel gestandardiseerd
-            matches = re.finditer(columninfo_pattern, gef_raw)
-            for match in matches:
-                columnnr = match.group('columnnr')
-                quantitynr = match.group('quantitynr')
-                # kolomnummers in pandas starten op 0, in gef op 1 
-                self.columninfo[int(columnnr) - 1] = GEF_COLINFO[quantitynr]
-
-                self.columninfoUnit[int(columnnr) - 1] = match.group('unit')
-                self.columninfoQuantNr[int(columnnr) - 1] = match.group('quantitynr')
 
-        except:
-            pass
-    
+    def load_gef_data(self, gefFile, offset, nrOfColumns=None, checkAddFrictionRatio=False, checkAddDepth=False, dtype=np.float64):
+        # het bestand wordt via een mmap gelezen, vanaf de positie na #EOH
+        # bytes van een al ingelezen bestand worden direct gebruikt
+        with gef_buffer(gefFile) as gefData:
+            # zet de data om in een array en dan in een dataframe, dan kunnen we er wat mee
+            # de dummy waarden worden tijdens het inlezen al vervangen door nan
+            try:
+                values = parse_gef_data(gefData, offset, self.columnseparator, self.recordseparator, self.columnvoid_values, nrOfColumns, dtype)
+                self.data = pd.DataFrame(values, copy=False)
+            except ValueError:
+                # TODO: read_fwf lijkt beter te werken dan csv voor sommige GEF, maar er zijn er ook met gedeclareerde separators, toch?
+                # TODO: maar soms zijn de kolommen niet precies even breed, dan gaat het mis C:/Users/User/PBK/CPT/GEF/002488\002488_S01.GEF
+                # de data begint op de positie na #EOH, de mmap wordt direct door pandas gelezen
+                # de meetwaarden zijn numeriek, latin-1 kan elke byte lezen
+                dataBuffer = gefData if isinstance(gefData, mmap.mmap) else BytesIO(gefData)
+                dataBuffer.seek(offset)
+                self.data = pd.read_csv(dataBuffer, sep=self.columnseparator, skipinitialspace=True, header=None, encoding='latin-1')
+
+                # vervang de dummy waarden door nan
+                for columnnr, voidvalue in self.columnvoid_values.items():
+                    self.data[columnnr] = self.data[columnnr].replace(voidvalue, np.nan)
+                self.data.replace(self.recordseparator, np.nan, inplace=True)
 
-        # zet de data om in een dataframe, dan kunnen we er wat mee
-        # TODO: read_fwf lijkt beter te werken dan csv voor sommige GEF, maar er zijn er ook met gedeclareerde separators, toch?
-        # TODO: maar soms zijn de kolommen niet precies even breed, dan gaat het mis C:/Users/User/PBK/CPT/GEF/002488\002488_S01.GEF
-#        self.data = pd.read_fwf(StringIO(self.data), header=None)         
-        self.data = pd.read_csv(StringIO(self.data), sep=self.columnseparator, skipinitialspace=True, lineterminator='\n', header=None) 
-        
-        # vervang de dummy waarden door nan
-        for columnnr, voidvalue in self.columnvoid_values.items():
-            self.data[columnnr] = self.data[columnnr].replace(voidvalue, np.nan)
         # geef de kolommen andere namen
         self.data = self.data.rename(columns=self.columninfo)
 
@@ -563,7 +986,6 @@ class Cpt(Test):
             # frictionRatio kan ook heel groot zijn, dat geeft vervelende strepen
             self.data = self.data[self.data["frictionRatio"] <= 12]
 
-        self.data.replace(self.recordseparator, np.nan, inplace=True)
         self.data.dropna(axis='columns', how='all', inplace=True)
 
         # sorteer de kolomkoppen om vergelijking van twee dataframes (bijv. gef en xml) mogelijk te maken
@@ -591,129 +1013,58 @@ class Cpt(Test):
                 self.data["frictionRatio"] = 0
 
 
-    def plot(self, path='./output', saveFig=True, outputType='png'):
-        if self.groundlevel == None:
-            self.groundlevel = 0
-
-        y = self.groundlevel - self.data["depth"]
+    def plot(self, path='./output', saveFig=True, outputType='png', reuseFigure=False, decimate=False, pdf=None):
+        # reuseFigure=True gebruikt een figuur die al voor een eerdere sondering is opgebouwd, zie CptFigure
+        # dat is veel sneller bij het plotten van veel sonderingen
+        # decimate=True tekent alleen de punten die op de resolutie van de uitvoer zichtbaar zijn, zie decimate_minmax
+        # dat is de dpi van de figuur bij een afbeelding en DECIMATE_DPI bij pdf of svg, een getal voor decimate is een andere resolutie in dpi
+        # pdf is een geopende PdfPages, de figuur wordt dan als pagina aan dat bestand toegevoegd in plaats van als eigen bestand opgeslagen
+        if pdf is not None:
+            outputType = 'pdf'
+        fig = self.make_figure(outputType, reuseFigure, decimate, layout=saveFig)
 
-        # x,y voor maaiveld in figuur
-        x_maaiveld = [0, 10]
-        y_maaiveld = [self.groundlevel, self.groundlevel]
-
-        # figuur met conusweerstand, wrijving, wrijvingsgetal, helling en waterspanning
-        # TODO: dit kunnen we ook op dezelfde manier doen als bij de boringen, zodat de verticale schaal altijd hetzelfde is
-        # TODO: dat is wel lastiger met pdf maken
-
-        colors = {'qc': 'red', 'fs': 'blue', 'Rf': 'green', 'inclination': 'grey', 'porepressure': 'black'}
-        fig = plt.figure(figsize=(8.3 * 2,11.7 * 2)) # 8.3 x 11.7 inch is een A4
-        gs = GridSpec(2, 1, height_ratios=[10,1])
-
-        ax = fig.add_subplot(gs[0, 0])
-        axes = [ax, ax.twiny(), ax.twiny()]
-
-        # Rf plot vanaf rechts
-        axes[2].invert_xaxis()  
-
-        porePressures = ["porePressureU1", "porePressureU2", "porePressureU3"]
-        for porePressure in porePressures:
-            if porePressure in self.data.columns and not self.data[porePressure].isnull().all():
-                axes.append(ax.twiny())
-                axes[-1].plot(self.data[porePressure], y, label=porePressure[-2:], linewidth=1.25, color=colors['porepressure'], linestyle='-.')
-                axes[-1].set_xlabel("u [Mpa]", loc='left')
-                axes[-1].legend()
-                axes[-1].set_xlim([-1, 1])
-                axes[-1].spines['top'].set_position(('axes', 1.02))
-                axes[-1].spines['top'].set_bounds(0,1)
-                axes[-1].xaxis.label.set_color(colors['porepressure'])
-                axes[-1].set_xticks([0,0.25,0.5,0.75,1.0])
-                axes[-1].legend() 
-
-
-        # maak een plot met helling, aan de rechterkant
-        inclinations = ["inclinationEW", "inclinationNS", "inclinationX", "inclinationY", "inclinationResultant"]
-        inclination_plots = 0
-        for inclination in inclinations:
-            if inclination in self.data.columns and not self.data[inclination].isnull().all():
-                if inclination_plots == 0:
-                    axes.append(ax.twiny())
-                    axes[-1].invert_xaxis()
-                    axes[-1].set_xlim([40, 0])
-                    axes[-1].spines['top'].set_position(('axes', 1.02))
-                    axes[-1].spines['top'].set_bounds(10,0)
-                    axes[-1].set_xlabel("helling [deg]", loc='right')
-                    axes[-1].xaxis.label.set_color(colors['inclination'])
-                    axes[-1].set_xticks([0,2,4,6,8,10])
-                axes[-1].plot(self.data[inclination], y, label=re.sub(r'inclination', '', inclination), linewidth=1.25, color=colors['inclination'])
-                inclination_plots += 1
-        if inclination_plots > 0:
-            axes[-1].legend() 
-
-        # plot data
-        axes[0].plot(self.data['coneResistance'], y, label='qc [MPa]', linewidth=1.25, color=colors['qc'])
-        axes[1].plot(self.data["localFriction"], y, label='fs [MPa]', linewidth=1.25, color=colors['fs'], linestyle='--')
-        axes[2].plot(self.data["frictionRatio"], y, label='Rf [%]', linewidth=1.25, color=colors['Rf'])   
-
-        # plot maaiveld, bestaat uit een streep en een arcering
-        axes[0].plot(x_maaiveld, y_maaiveld, color='black')
-        axes[0].barh(self.groundlevel, width=10, height=-0.4, align='edge', hatch='/\/', color='#ffffffff')
-
-        # stel de teksten in voor de labels
-        axes[0].set_ylabel("Niveau [m t.o.v. NAP]")
-        axes[0].set_xlabel("qc [MPa]")
-        axes[1].set_xlabel("fs [MPa]", loc='left')
-        axes[2].set_xlabel("Rf [%]", loc='right')
-
-        # verplaats de x-assen zodat ze niet overlappen       
-        axes[1].spines['top'].set_bounds(0,1)
-        axes[2].spines['top'].set_bounds(15,0)
-
-        # kleur de labels van de x-assen hetzelfde als de data
-        axes[0].xaxis.label.set_color(colors['qc'])
-        axes[1].xaxis.label.set_color(colors['fs'])
-        axes[2].xaxis.label.set_color(colors['Rf'])
-
-        # stel de min en max waarden van de assen in
-        axes[0].set_xlim([0, 40]) # conusweerstand
-        axes[1].set_xlim([0, 2]) # plaatselijke wrijving 
-        axes[2].set_xlim([40, 0]) # wrijvingsgetal
-        
-        axes[1].set_xticks([0,0.5,1.0])
-        axes[2].set_xticks([0,2,4,6,8,10,12])
-
-        # metadata in plot
-        stempel = fig.add_subplot(gs[1, 0])
-        stempel.set_axis_off()
-        plt.text(0.05, 0.6, f'Sondering: {self.testid}\nx-coördinaat: {self.easting}\ny-coördinaat: {self.northing}\nmaaiveld: {self.groundlevel}\n', ha='left', va='top', fontsize=14, fontweight='bold')
-        plt.text(0.35, 0.6, f'Uitvoerder: {self.companyid}\nDatum: {self.date["year"]}-{self.date["month"]}-{self.date["day"]}\nProjectnummer: {self.projectid}\nProjectnaam: {self.projectname}', ha='left', va='top', fontsize=14, fontweight='bold')
-        plt.text(0.05, 0, 'Ingenieursbureau Gemeente Amsterdam - Team WGM - Vakgroep Geotechniek', fontsize=13.5)
-
-        # maak het grid
-        ax.minorticks_on()
-        ax.tick_params(which='major', color='black')
-        ax.tick_params(which='minor', color='black')
-        ax.grid(which='major', linestyle='-', linewidth='0.15', color='black')
-        ax.grid(which='minor', linestyle='-', linewidth='0.1')
-        ax.grid(visible=True, which='both')
-
-        if saveFig:
+        if saveFig and pdf is not None:
+            pdf.savefig(fig)
+        elif saveFig:
             # sla de figuur op
-            plt.tight_layout()
-            plt.savefig(fname=f"./output/{self.filename}.{outputType}")
-            plt.close('all')
+            self.plotFile = f"{path}/{self.filename}.{outputType}"
+            fig.savefig(fname=self.plotFile)
 
             # andere optie voor bestandsnaam
             save_as_projectid_fromfile = False
             if save_as_projectid_fromfile:
                 if self.projectid is not None: # TODO: dit moet ergens anders. Moet ook projectid uit mapid kunnen halen
-                    plt.savefig(fname=f"./output/{self.projectid}_{self.testid}.{outputType}")
-                    plt.close('all')
+                    fig.savefig(fname=f"{path}/{self.projectid}_{self.testid}.{outputType}")
                 elif self.projectname is not None:
-                    plt.savefig(fname=f"{path}/{self.projectname}_{self.testid}.{outputType}")
-                    plt.close('all')
+                    fig.savefig(fname=f"{path}/{self.projectname}_{self.testid}.{outputType}")
 
         return fig
 
+    def render(self, outputType='png', reuseFigure=False, decimate=False, file=None):
+        # de plot als bytes in plaats van als bestand, zie render_figure
+        fig = self.make_figure(outputType, reuseFigure, decimate)
+        return render_figure(fig, outputType, file)
+
+    def make_figure(self, outputType='png', reuseFigure=False, decimate=False, layout=True):
+        # de figuur wordt zonder pyplot gemaakt, er is geen gedeelde toestand tussen aanroepen
+        # layout=False slaat tight_layout over, dat is alleen nodig bij opslaan
+        if self.groundlevel == None:
+            self.groundlevel = 0
+
+        if reuseFigure:
+            cptFigure = cpt_figure(*CptFigure.layout_of(self))
+        else:
+            cptFigure = CptFigure(*CptFigure.layout_of(self))
+        fig = cptFigure.update(self)
+        if layout:
+            cptFigure.tight_layout()
+
+        # het uitdunnen gebeurt als de plaats van de assen vastligt, dan vallen de rijen precies op de pixels
+        if decimate is True:
+            decimate = DECIMATE_DPI if outputType in ['pdf', 'svg', 'eps', 'ps'] else fig.dpi
+        if decimate:
+            cptFigure.decimate(self, decimate)
+        return fig
 
     def check_add_depth(self):
         # soms is er geen diepte, maar wel sondeerlengte aanwezig
@@ -853,6 +1204,259 @@ class Cpt(Test):
 
         return self.data
 
+def new_figure(figsize):
+    # een Figure die niet door pyplot wordt beheerd, die hoeft niet gesloten te worden en kan in iedere thread worden gemaakt
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def render_figure(fig, outputType='png', file=None):
+    # schrijf de figuur naar file (een geopend bestand of een andere stream), of geef zonder file de bytes terug
+    # dit gebruikt geen pyplot en kan vanuit meerdere threads tegelijk worden aangeroepen, bijvoorbeeld in een webservice
+    if file is not None:
+        fig.savefig(file, format=outputType)
+        return None
+    buffer = BytesIO()
+    fig.savefig(buffer, format=outputType)
+    return buffer.getvalue()
+
+# de resolutie waarvoor de lijnen in een pdf of svg van Cpt.plot met decimate=True worden uitgedund, genoeg om af te drukken
+DECIMATE_DPI = 300
+
+def decimate_minmax(x, y, rows):
+    # dun een lijn uit met x als functie van y (de diepte), zonder dat de figuur verandert
+    # rows is voor ieder punt de pixelrij in de uitvoer
+    # van de opeenvolgende punten in één rij blijven het eerste, laatste, kleinste en grootste over
+    # daarmee blijven pieken behouden en is de getekende lijn op deze resolutie gelijk aan die met alle punten
+    # nan onderbreekt de lijn en blijft daarom altijd staan
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bins = np.array(rows, dtype=np.float64)
+    isnan = np.isnan(x) | np.isnan(y)
+    # ieder nan punt is een eigen rij
+    bins[isnan] = -1 - np.arange(isnan.sum())
+    newRun = np.r_[True, bins[1:] != bins[:-1]]
+    starts = np.flatnonzero(newRun)
+    ends = np.r_[starts[1:], len(x)] - 1
+
+    # binnen iedere rij gesorteerd op x: de eerste is het minimum, de laatste het maximum
+    runs = np.cumsum(newRun) - 1
+    order = np.lexsort((x, runs))
+    keep = np.unique(np.concatenate([starts, ends, order[starts], order[ends]]))
+    return x[keep], y[keep]
+
+class CptFigure():
+    # de figuur van Cpt.plot, met conusweerstand, wrijving, wrijvingsgetal, helling en waterspanning
+    # de assen, het grid en het stempel worden één keer opgebouwd, per sondering worden alleen de lijnen, de verticale as en de teksten aangepast
+    # welke assen er zijn hangt af van de waterspanningen en hellingen in de sondering, zie layout_of
+    # TODO: dit kunnen we ook op dezelfde manier doen als bij de boringen, zodat de verticale schaal altijd hetzelfde is
+    # TODO: dat is wel lastiger met pdf maken
+    FIGSIZE = (8.3 * 2,11.7 * 2) # 8.3 x 11.7 inch is een A4
+    COLORS = {'qc': 'red', 'fs': 'blue', 'Rf': 'green', 'inclination': 'grey', 'porepressure': 'black'}
+    POREPRESSURES = ["porePressureU1", "porePressureU2", "porePressureU3"]
+    INCLINATIONS = ["inclinationEW", "inclinationNS", "inclinationX", "inclinationY", "inclinationResultant"]
+
+    def __init__(self, porePressures=(), inclinations=(), fig=None):
+        # zonder fig wordt een Figure gemaakt die niet door pyplot wordt beheerd, met een eigen Agg canvas
+        self.porePressures = porePressures
+        self.inclinations = inclinations
+        self.fig = new_figure(self.FIGSIZE) if fig is None else fig
+        # tight_layout gaat uit van de standaard marges, die worden voor iedere sondering teruggezet
+        self.subplotpars = {attr: getattr(self.fig.subplotpars, attr) for attr in ['left', 'right', 'bottom', 'top', 'wspace', 'hspace']}
+        # per kolom de lijn waarvan de data wordt vervangen
+        self.lines = {}
+        colors = self.COLORS
+
+        gs = GridSpec(2, 1, height_ratios=[10,1])
+
+        ax = self.fig.add_subplot(gs[0, 0])
+        axes = [ax, ax.twiny(), ax.twiny()]
+
+        # Rf plot vanaf rechts
+        axes[2].invert_xaxis()  
+
+        for porePressure in porePressures:
+            axes.append(ax.twiny())
+            self.lines[porePressure], = axes[-1].plot([], [], label=porePressure[-2:], linewidth=1.25, color=colors['porepressure'], linestyle='-.')
+            axes[-1].set_xlabel("u [Mpa]", loc='left')
+            axes[-1].legend()
+            axes[-1].set_xlim([-1, 1])
+            axes[-1].spines['top'].set_position(('axes', 1.02))
+            axes[-1].spines['top'].set_bounds(0,1)
+            axes[-1].xaxis.label.set_color(colors['porepressure'])
+            axes[-1].set_xticks([0,0.25,0.5,0.75,1.0])
+            axes[-1].legend() 
+
+        # maak een plot met helling, aan de rechterkant
+        if len(inclinations) > 0:
+            axes.append(ax.twiny())
+            axes[-1].invert_xaxis()
+            axes[-1].set_xlim([40, 0])
+            axes[-1].spines['top'].set_position(('axes', 1.02))
+            axes[-1].spines['top'].set_bounds(10,0)
+            axes[-1].set_xlabel("helling [deg]", loc='right')
+            axes[-1].xaxis.label.set_color(colors['inclination'])
+            axes[-1].set_xticks([0,2,4,6,8,10])
+            for inclination in inclinations:
+                self.lines[inclination], = axes[-1].plot([], [], label=re.sub(r'inclination', '', inclination), linewidth=1.25, color=colors['inclination'])
+            axes[-1].legend() 
+
+        # plot data
+        self.lines['coneResistance'], = axes[0].plot([], [], label='qc [MPa]', linewidth=1.25, color=colors['qc'])
+        self.lines['localFriction'], = axes[1].plot([], [], label='fs [MPa]', linewidth=1.25, color=colors['fs'], linestyle='--')
+        self.lines['frictionRatio'], = axes[2].plot([], [], label='Rf [%]', linewidth=1.25, color=colors['Rf'])   
+
+        # plot maaiveld, bestaat uit een streep en een arcering
+        self.maaiveld, = axes[0].plot([0, 10], [0, 0], color='black')
+        self.arcering = axes[0].barh(0, width=10, height=-0.4, align='edge', hatch='/\/', color='#ffffffff').patches[0]
+
+        # stel de teksten in voor de labels
+        axes[0].set_ylabel("Niveau [m t.o.v. NAP]")
+        axes[0].set_xlabel("qc [MPa]")
+        axes[1].set_xlabel("fs [MPa]", loc='left')
+        axes[2].set_xlabel("Rf [%]", loc='right')
+
+        # verplaats de x-assen zodat ze niet overlappen       
+        axes[1].spines['top'].set_bounds(0,1)
+        axes[2].spines['top'].set_bounds(15,0)
+
+        # kleur de labels van de x-assen hetzelfde als de data
+        axes[0].xaxis.label.set_color(colors['qc'])
+        axes[1].xaxis.label.set_color(colors['fs'])
+        axes[2].xaxis.label.set_color(colors['Rf'])
+
+        # stel de min en max waarden van de assen in
+        axes[0].set_xlim([0, 40]) # conusweerstand
+        axes[1].set_xlim([0, 2]) # plaatselijke wrijving 
+        axes[2].set_xlim([40, 0]) # wrijvingsgetal
+        
+        axes[1].set_xticks([0,0.5,1.0])
+        axes[2].set_xticks([0,2,4,6,8,10,12])
+
+        # metadata in plot
+        stempel = self.fig.add_subplot(gs[1, 0])
+        stempel.set_axis_off()
+        self.stempel = [
+            stempel.text(0.05, 0.6, '', ha='left', va='top', fontsize=14, fontweight='bold'),
+            stempel.text(0.35, 0.6, '', ha='left', va='top', fontsize=14, fontweight='bold')
+        ]
+        stempel.text(0.05, 0, 'Ingenieursbureau Gemeente Amsterdam - Team WGM - Vakgroep Geotechniek', fontsize=13.5)
+
+        # maak het grid
+        ax.minorticks_on()
+        ax.tick_params(which='major', color='black')
+        ax.tick_params(which='minor', color='black')
+        ax.grid(which='major', linestyle='-', linewidth='0.15', color='black')
+        ax.grid(which='minor', linestyle='-', linewidth='0.1')
+        ax.grid(visible=True, which='both')
+
+        self.axes = axes
+
+    @classmethod
+    def layout_of(cls, cpt):
+        # de waterspanningen en hellingen die in de sondering zitten bepalen de assen van de figuur
+        porePressures = tuple(column for column in cls.POREPRESSURES if column in cpt.data.columns and not cpt.data[column].isnull().all())
+        inclinations = tuple(column for column in cls.INCLINATIONS if column in cpt.data.columns and not cpt.data[column].isnull().all())
+        return porePressures, inclinations
+
+    def update(self, cpt):
+        # vervang de data, het maaiveld en de teksten in het stempel door die van cpt
+        groundlevel = 0 if cpt.groundlevel is None else cpt.groundlevel
+        y = groundlevel - cpt.data["depth"]
+        for column, line in self.lines.items():
+            line.set_data(cpt.data[column], y)
+
+        self.maaiveld.set_ydata([groundlevel, groundlevel])
+        self.arcering.set_y(groundlevel)
+
+        self.stempel[0].set_text(f'Sondering: {cpt.testid}\nx-coördinaat: {cpt.easting}\ny-coördinaat: {cpt.northing}\nmaaiveld: {cpt.groundlevel}\n')
+        self.stempel[1].set_text(f'Uitvoerder: {cpt.companyid}\nDatum: {cpt.date["year"]}-{cpt.date["month"]}-{cpt.date["day"]}\nProjectnummer: {cpt.projectid}\nProjectnaam: {cpt.projectname}')
+
+        # de verticale as volgt de nieuwe data, de horizontale assen liggen vast
+        for ax in self.axes:
+            ax.set_autoscaley_on(True)
+            ax.relim()
+        for ax in self.axes:
+            ax.autoscale_view()
+        return self.fig
+
+    def decimate(self, cpt, dpi):
+        # dun de lijnen uit voor een uitvoer met deze resolutie, zie decimate_minmax
+        # de verticale as blijft zoals die bij alle punten is
+        ylim = self.axes[0].get_ylim()
+        groundlevel = 0 if cpt.groundlevel is None else cpt.groundlevel
+        y = (groundlevel - cpt.data["depth"]).to_numpy(dtype=np.float64)
+        # de pixelrij van ieder punt in de uitvoer
+        rows = np.floor(self.axes[0].transData.transform(np.column_stack([np.zeros(len(y)), y]))[:, 1] * dpi / self.fig.dpi)
+        for column, line in self.lines.items():
+            line.set_data(*decimate_minmax(cpt.data[column], y, rows))
+        self.axes[0].set_ylim(ylim)
+
+    def tight_layout(self):
+        # begin steeds bij dezelfde marges, dan is het resultaat hetzelfde als bij een nieuwe figuur
+        self.fig.subplots_adjust(**self.subplotpars)
+        self.fig.tight_layout()
+
+_cptFigures = threading.local()
+
+def cpt_figure(porePressures=(), inclinations=()):
+    # één CptFigure per combinatie van assen, die wordt voor alle volgende sonderingen hergebruikt
+    # iedere thread heeft eigen figuren, een figuur kan niet door twee threads tegelijk worden gevuld
+    cache = getattr(_cptFigures, 'cache', None)
+    if cache is None:
+        cache = _cptFigures.cache = lru_cache(maxsize=16)(CptFigure)
+    return cache(porePressures, inclinations)
+
+class CptRecord():
+    # compacte sondering om grote aantallen sonderingen tegelijk in het geheugen te houden
+    # de metadata staat in slots in plaats van in een __dict__ met losse dicts
+    # de meetwaarden staan in één 2D array, iedere rij is één grootheid en ligt aaneengesloten in het geheugen
+    # met dtype=np.float32 is het geheugengebruik van de meetwaarden de helft
+    METADATA = ('testid', 'filename', 'easting', 'northing', 'groundlevel', 'srid', 'finaldepth', 'date', 'companyid', 'projectid', 'projectname')
+    __slots__ = METADATA + ('columns', 'values')
+
+    def __init__(self, columns=(), values=None, **metadata):
+        for attr in self.METADATA:
+            setattr(self, attr, metadata.get(attr))
+        self.columns = tuple(columns)
+        self.values = np.empty((len(self.columns), 0)) if values is None else values
+
+    @classmethod
+    def from_cpt(cls, cpt, dtype=np.float64):
+        # alleen de numerieke kolommen worden bewaard, interpretaties (tekst) niet
+        data = cpt.data.select_dtypes('number')
+        values = np.array(data.to_numpy(dtype=dtype).T, order='C')
+        return cls(data.columns, values, **{attr: getattr(cpt, attr, None) for attr in cls.METADATA})
+
+    def __getitem__(self, column):
+        # de meetwaarden van één grootheid, zonder kopie
+        return self.values[self.columns.index(column)]
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def __repr__(self):
+        return f'CptRecord(testid={self.testid!r}, columns={list(self.columns)}, length={len(self)}, dtype={self.values.dtype})'
+
+    @property
+    def data(self):
+        # dataframe met de meetwaarden, de transpose van values is precies de opslag van een pandas blok
+        # er wordt dus niet gekopieerd
+        return pd.DataFrame(self.values.T, columns=list(self.columns), copy=False)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def to_cpt(self):
+        # een volledige Cpt, bijvoorbeeld om te plotten of te interpreteren
+        # de meetwaarden worden gekopieerd zodat wijzigingen de record niet aanpassen
+        cpt = Cpt()
+        for attr in self.METADATA:
+            setattr(cpt, attr, getattr(self, attr))
+        cpt.data = self.data.astype(np.float64)
+        return cpt
+
 @dataclass
 class Bore(Test):
     #TODO: uitbreiden voor BHR-P en BHR-G, deels werkt het al
@@ -868,12 +1472,41 @@ class Bore(Test):
         self.testid = None
         self.date = {}
         self.finaldepth = None
+        # de lagen worden via de property soillayers gelezen, zie load_gef en load_xml
+        self._soillayersLoader = None
         self.soillayers = {}
         self.analyses = []
         self.metadata = {}
         self.descriptionquality = None
-
-    def load_xml(self, xmlFile, fromFile=True):
+        # het bestand van de laatste plot, zie plot
+        self.plotFile = None
+
+    @property
+    def soillayers(self):
+        # bij lazy laden worden de lagen pas bij de eerste keer opvragen ingelezen
+        # het resultaat blijft bewaard tot release_data
+        if self._soillayers is None and self._soillayersLoader is not None:
+            self._soillayersLoader()
+        return self._soillayers
+
+    @soillayers.setter
+    def soillayers(self, soillayers):
+        self._soillayers = soillayers
+
+    def release_data(self):
+        # geef het geheugen van de lagen vrij
+        # als ze uit een bestand komen, worden ze bij het opvragen opnieuw ingelezen
+        if self._soillayersLoader is not None:
+            self._soillayers = None
+
+    @cached(PARSER_VERSION)
+    def load_xml(self, xmlFile, fromFile=True, metadataOnly=False, lazy=False):
+
+        # metadataOnly leest alleen de metadata, het lezen stopt voor de boorbeschrijving
+        if metadataOnly:
+            self.metadata_from_xml(xmlFile, fromFile, idTags=['broId', 'requestReference'], stopTags=['descriptiveBoreholeLog'])
+            self.metadata = {"easting": self.easting, "northing": self.northing, "groundlevel": self.groundlevel, "testid": self.testid, "date": self.date, "finaldepth": self.finaldepth}
+            return
 
         # lees een boring in vanuit een BRO XML
         # TODO: werkt nog niet voor IMBRO_A
@@ -887,50 +1520,44 @@ class Bore(Test):
             # xmlFile is dan de string met XML 
             root = ET.fromstring(xmlFile)
 
-        for element in root.iter():
-
-            if 'broId' in element.tag or 'requestReference' in element.tag: 
-                self.testid = element.text
+        layers = {}
+
+        def add_layers(element):
+            for child in element.iter():
+                name = localname(child.tag)
+                if name == 'descriptionLocation':
+                    descriptionLocation = child.text
+                    soillayers = []
+                elif name == 'layer':
+                    soillayers.append(element_texts(child, removeWhitespace=True))
+            layers[descriptionLocation] = soillayers
+
+        def add_analyses(element):
+            for child in element.iter():
+                if localname(child.tag) == 'investigatedInterval':
+                    self.analyses.append(element_texts(child, removeWhitespace=True))
+            self.analyses = pd.DataFrame().from_dict(self.analyses)
+            self.analyses = self.analyses.astype(float, errors='ignore')
+
+        handlers = self.xml_metadata_handlers(idTags=['broId', 'requestReference'])
+        handlers.update({
+            'descriptiveBoreholeLog': add_layers,
+            'boreholeSampleAnalysis': add_analyses
+        })
+        dispatch_xml(root.iter(), handlers)
 
-            if 'deliveredLocation' in element.tag:
-                location = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                self.easting = float(location['pos'].split()[0])
-                self.northing = float(location['pos'].split()[1])
-
-            elif 'deliveredVerticalPosition' in element.tag:
-                verticalPosition = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                self.groundlevel = float(verticalPosition['offset'])
-
-            elif 'finalDepthBoring' in element.tag:
-                self.finaldepth = float(element.text)
-
-            elif 'descriptionReportDate' in element.tag:
-                date = {re.sub(r'{.*}', '', p.tag) : re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
-                self.date['year'] = int(date['date'].split('-')[0])
-                self.date['month'] = int(date['date'].split('-')[1])
-                self.date['day'] = int(date['date'].split('-')[2])
-            
+        self.metadata = {"easting": self.easting, "northing": self.northing, "groundlevel": self.groundlevel, "testid": self.testid, "date": self.date, "finaldepth": self.finaldepth}
 
-            elif 'descriptiveBoreholeLog' in element.tag:
-                for child in element.iter():
-                    if 'descriptionQuality' in child.tag:
-                        descriptionquality = child.text
-                    elif 'descriptionLocation' in child.tag:
-                        descriptionLocation = child.text
-                        soillayers = []
-                    elif 'layer' in child.tag:
-                        soillayers.append({re.sub(r'{.*}', '', p.tag) : re.sub(r'\s*', '', p.text) for p in child.iter() if p.text is not None})
-                # zet soillayers om in dataframe om het makkelijker te verwerken
-                self.soillayers[descriptionLocation] = pd.DataFrame(soillayers) 
-
-            elif 'boreholeSampleAnalysis' in element.tag:
-                for child in element.iter():
-                    if 'investigatedInterval' in child.tag:
-                        self.analyses.append({re.sub(r'{.*}', '', p.tag) : re.sub(r'\s*', '', p.text) for p in child.iter() if p.text is not None})
-                self.analyses = pd.DataFrame().from_dict(self.analyses)
-                self.analyses = self.analyses.astype(float, errors='ignore')
+        # de lagen per beschrijving worden bewaard, het omzetten naar dataframes gebeurt in load_xml_soillayers
+        # met lazy=True gebeurt dat pas als soillayers wordt opgevraagd
+        self._soillayers = None
+        self._soillayersLoader = partial(self.load_xml_soillayers, layers)
+        if not lazy:
+            self._soillayersLoader()
 
-        self.metadata = {"easting": self.easting, "northing": self.northing, "groundlevel": self.groundlevel, "testid": self.testid, "date": self.date, "finaldepth": self.finaldepth}
+    def load_xml_soillayers(self, layers):
+        # zet soillayers om in dataframe om het makkelijker te verwerken
+        self.soillayers = {descriptionLocation: pd.DataFrame(soillayers) for descriptionLocation, soillayers in layers.items()}
 
         for descriptionLocation, soillayers in self.soillayers.items():
             # TODO: mogelijk verwarrend om soillayers en self.soillayers te combineren
@@ -948,49 +1575,65 @@ class Bore(Test):
             self.soillayers[descriptionLocation]["upper_NAP"] = self.groundlevel - soillayers["upperBoundary"] 
             self.soillayers[descriptionLocation]["lower_NAP"] = self.groundlevel - soillayers["lowerBoundary"] 
 
-    def load_dino_xml13(self, xmlFile):
+    @cached(PARSER_VERSION)
+    def load_dino_xml13(self, xmlFile, fromFile=True):
         # lees een boring in vanuit een dinoloket XML v1.3
-        tree = ElementTree()
-        tree.parse(xmlFile)
-        root = tree.getroot()
+        # met fromFile=False is xmlFile de XML zelf (string of bytes)
+        if fromFile:
+            tree = ElementTree()
+            tree.parse(xmlFile)
+            root = tree.getroot()
+        else:
+            root = ET.fromstring(xmlFile)
 
         soillayers = []
-
-        for element in root.iter():
-
-            if 'identification' in element.tag: 
-                self.testid = element.attrib['id']
-
-            elif 'coordinateX' in element.tag:
-                self.easting = float(element.text)
-            elif 'coordinateY' in element.tag:
-                self.northing = float(element.text)
-
-            elif 'elevation' in element.tag:
-                if element.attrib['UoM'] == 'CENTIMETER':
-                    toM = 100
-                elif element.attrib['UoM'] == 'METER':
-                    toM = 1
-                self.groundlevel = float(element.attrib['levelValue']) / toM
-
-            elif 'borehole' in element.tag:
-                if element.attrib['baseDepthUoM'] == 'CENTIMETER':
-                    baseDepthToM = 100
-                elif element.attrib['baseDepthUoM'] == 'METER':
-                    baseDepthToM = 1
-                self.finaldepth = float(element.attrib['baseDepth']) / baseDepthToM
-
-            elif 'lithoDescr' in element.tag:
-                if element.attrib['layerDepthUoM'] == 'CENTIMETER':
-                    layerToM = 100
-                elif element.attrib['layerDepthUoM'] == 'METER':
-                    layerToM = 1
-            
-            elif 'lithoInterval' in element.tag:
-                soillayer = {child.tag: child.attrib['code'] for child in element.iter() if 'code' in child.attrib.keys()}
-                soillayer['topDepth'] = float(element.attrib['topDepth']) / layerToM
-                soillayer['baseDepth'] = float(element.attrib['baseDepth']) / layerToM
-                soillayers.append(soillayer)
+        layerToM = 1
+
+        def set_testid(element):
+            self.testid = element.attrib['id']
+
+        def set_easting(element):
+            self.easting = float(element.text)
+
+        def set_northing(element):
+            self.northing = float(element.text)
+
+        def set_groundlevel(element):
+            if element.attrib['UoM'] == 'CENTIMETER':
+                toM = 100
+            elif element.attrib['UoM'] == 'METER':
+                toM = 1
+            self.groundlevel = float(element.attrib['levelValue']) / toM
+
+        def set_finaldepth(element):
+            if element.attrib['baseDepthUoM'] == 'CENTIMETER':
+                baseDepthToM = 100
+            elif element.attrib['baseDepthUoM'] == 'METER':
+                baseDepthToM = 1
+            self.finaldepth = float(element.attrib['baseDepth']) / baseDepthToM
+
+        def set_layer_unit(element):
+            nonlocal layerToM
+            if element.attrib['layerDepthUoM'] == 'CENTIMETER':
+                layerToM = 100
+            elif element.attrib['layerDepthUoM'] == 'METER':
+                layerToM = 1
+
+        def add_layer(element):
+            soillayer = {localname(child.tag): child.attrib['code'] for child in element.iter() if 'code' in child.attrib.keys()}
+            soillayer['topDepth'] = float(element.attrib['topDepth']) / layerToM
+            soillayer['baseDepth'] = float(element.attrib['baseDepth']) / layerToM
+            soillayers.append(soillayer)
+
+        dispatch_xml(root.iter(), {
+            'identification': set_testid,
+            'coordinateX': set_easting,
+            'coordinateY': set_northing,
+            'elevation': set_groundlevel,
+            'borehole': set_finaldepth,
+            'lithoDescr': set_layer_unit,
+            'lithoInterval': add_layer
+        })
             
         self.soillayers['veld'] = pd.DataFrame(soillayers) 
         
@@ -1000,7 +1643,14 @@ class Bore(Test):
 
         self.soillayers = self.add_components_NEN()
 
-    def load_gef(self, gefFile):
+    @cached(PARSER_VERSION)
+    def load_gef(self, gefFile, metadataOnly=False, lazy=False, header=None):
+        # gefFile is een bestandsnaam of de bytes van een al ingelezen bestand, header een al gelezen GefHeader (zie load)
+        # metadataOnly leest alleen de header, na #EOH wordt niet verder gelezen
+        # lazy=True leest eerst alleen de header, het datablok wordt gelezen als soillayers wordt opgevraagd
+        if metadataOnly:
+            self.metadata_from_gef(gefFile, header)
+            return
 
         self.columninfo = {}
         self.columnvoid_values = {}
@@ -1019,66 +1669,58 @@ class Bore(Test):
             '9': 'grindmediaan'
         }
 
-        data_pattern = re.compile(r'#EOH\s*=\s*(?P<data>(.*\n)*)')
+        # alleen de header wordt gelezen, die wordt gedeeld met metadata_from_gef
+        if header is None:
+            header = read_gef_header(gefFile)
+        self.metadata_from_gef(gefFile, header)
 
-        columnvoid_pattern = re.compile(r'#COLUMNVOID\s*=\s*(?P<columnnr>\d*),\s*(?P<voidvalue>.*)\s*')
-        columninfo_pattern = re.compile(r'#COLUMNINFO\s*=\s*(?P<columnnr>\d*),\s*(?P<unit>.*),\s*(?P<parameter>.*),\s*(?P<quantitynr>\d*)\s*')
-        columnseparator_pattern = re.compile(r'#COLUMNSEPARATOR\s*=\s*(?P<columnseparator>.*)\s*')
-        recordseparator_pattern = re.compile(r'#RECORDSEPARATOR\s*=\s*(?P<recordseparator>.*)\s*')
+        self.columnseparator = header.columnseparator
+        self.recordseparator = header.recordseparator
+        self.columnvoid_values = header.columnvoid
 
-        self.metadata_from_gef(gefFile)
+        # informatie in kolommen kan meerdere namen hebben
+        # nummers zijn wel gestandardiseerd
+        for columnnr, info in header.columninfo.items():
+            try:
+                self.columninfo[columnnr] = GEF_COLINFO[info['quantitynr']]
+            except KeyError:
+                pass
 
-        with open(gefFile) as f:
-            gef_raw = f.read()
+        # TODO: deze namen kloppen wellicht niet helemaal
+        self.columninfo[max(self.columninfo.keys()) + 1] = 'soilName'
+        self.columninfo[max(self.columninfo.keys()) + 1] = 'toelichting'
+        self.columninfo[max(self.columninfo.keys()) + 1] = 'materialproperties'
 
+        # onthoud waar het datablok begint, de regels voor het inlezen staan in de attributen hierboven
+        # met lazy=True wordt het datablok pas gelezen als soillayers wordt opgevraagd
+        # de einddiepte volgt uit de lagen en is tot die tijd onbekend
+        self._soillayers = None
+        self._soillayersLoader = partial(self.load_gef_soillayers, gefFile, header.data_offset)
+        if not lazy:
+            self._soillayersLoader()
+
+    def load_gef_soillayers(self, gefFile, offset):
+        # de data begint op de positie na #EOH
+        # een boring bevat ook tekst, decoderen gaat direct vanuit de memoryview zonder tussenkopie van de bytes
+        if isinstance(gefFile, (bytes, bytearray)):
+            gef_bytes = gefFile
+        else:
+            with open(gefFile, 'rb') as f:
+                gef_bytes = f.read()
+        dataView = memoryview(gef_bytes)[offset:]
         try:
-            match = re.search(data_pattern, gef_raw)
-            self.soillayers['veld'] = match.group('data') # TODO: lab toevoegen
-        except:
-            pass
+            dataText = str(dataView, 'utf-8') # TODO: lab toevoegen
+        except UnicodeDecodeError:
+            dataText = str(dataView, 'latin-1')
 
-        try:
-            match = re.search(columnseparator_pattern, gef_raw)
-            self.columnseparator = match.group('columnseparator')
-        except:
-            pass
-        try:
-            match = re.search(recordseparator_pattern, gef_raw)
-            self.recordseparator = match.group('recordseparator')
-        except:
-            pass
-        try:
-            matches = re.finditer(columnvoid_pattern, gef_raw)
-            for match in matches:
-                columnnr = match.group('columnnr')
-                voidvalue = match.group('voidvalue')
-                self.columnvoid_values[int(columnnr) - 1] = float(voidvalue)
-        except:
-            pass
-        try:
-            # informatie in kolommen kan meerdere namen hebben
-            # nummers zijn wel gestandardiseerd
-            matches = re.finditer(columninfo_pattern, gef_raw)
-            for match in matches:
-                columnnr = match.group('columnnr')
-                quantitynr = match.group('quantitynr')
-                # kolomnummers in pandas starten op 0, in gef op 1 
-                self.columninfo[int(columnnr) - 1] = GEF_COLINFO[quantitynr]
-        except:
-            pass
-        
         # zet de data om in een dataframe, dan kunnen we er wat mee    
-        self.soillayers['veld'] = pd.read_csv(StringIO(self.soillayers['veld']), sep=self.columnseparator, skipinitialspace=True, header=None)
+        self.soillayers = {}
+        self.soillayers['veld'] = pd.read_csv(StringIO(dataText), sep=self.columnseparator, skipinitialspace=True, header=None)
         
         # vervang de dummy waarden door nan
         for columnnr, voidvalue in self.columnvoid_values.items():
             self.soillayers['veld'][columnnr] = self.soillayers['veld'][columnnr].replace(voidvalue, np.nan)
 
-        # TODO: deze namen kloppen wellicht niet helemaal
-        self.columninfo[max(self.columninfo.keys()) + 1] = 'soilName'
-        self.columninfo[max(self.columninfo.keys()) + 1] = 'toelichting'
-        self.columninfo[max(self.columninfo.keys()) + 1] = 'materialproperties'
-
         # geef de kolommen andere namen
         self.soillayers['veld'] = self.soillayers['veld'].rename(columns=self.columninfo)
 
@@ -1171,8 +1813,25 @@ class Bore(Test):
         return self.soillayers
 
 
-    def plot(self, path='./output', saveFig=True, outputType='png'):
+    def plot(self, path='./output', saveFig=True, outputType='png', pdf=None):
+        # pdf is een geopende PdfPages, de figuur wordt dan als pagina aan dat bestand toegevoegd in plaats van als eigen bestand opgeslagen
+        fig = self.make_figure()
+
+        if saveFig:
+            if pdf is not None:
+                pdf.savefig(fig)
+            else:
+                self.plotFile = f'{path}/{self.testid}.{outputType}'
+                fig.savefig(fname=self.plotFile)
+
+        return fig
+
+    def render(self, outputType='png', file=None):
+        # de plot als bytes in plaats van als bestand, zie render_figure
+        return render_figure(self.make_figure(), outputType, file)
 
+    def make_figure(self):
+        # de figuur wordt zonder pyplot gemaakt, er is geen gedeelde toestand tussen aanroepen
         materials = {0: 'grind', 1: 'zand', 2: 'klei', 3: 'leem', 4: 'veen', 5: 'silt', 6: 'overig'}
         colorsDict = {0: "orange", 1: "yellow", 2: "green", 3: "", 4: "brown", 5: "grey", 6: "black"} # NEN-EN-ISO 14688-1 style, geen leem
         colorsDictNEN5104 = {0: "grey", 1: "yellow", 2: "steelblue", 3: "yellowgreen", 4: "brown", 5: "", 6: "black"} # NEN5104 style, geen silt
@@ -1206,7 +1865,7 @@ class Bore(Test):
             nrOfLogs += 1 # TODO: waarde moet afhankelijk van aantal meetkolommen
 
         # maak een diagram 
-        fig = plt.figure(figsize=(width, max(self.finaldepth + 2, 4.5))) 
+        fig = new_figure((width, max(self.finaldepth + 2, 4.5)))
         gs = GridSpec(nrows=2, ncols=2 * nrOfLogs, height_ratios=[self.finaldepth, 2], width_ratios=width_ratios, figure=fig)
         axes = []
 
@@ -1216,46 +1875,18 @@ class Bore(Test):
             axes.append(fig.add_subplot(gs[0, i * 2 + 1], sharey=axes[0])) # toelichting 
         
             # maak een eenvoudige plot van een boring
-            uppers = list(soillayers["upper_NAP"])
-            lowers = list(soillayers["lower_NAP"])
-            components = list(soillayers["components"])
-
-            for upper, lower, component in reversed(list(zip(uppers, lowers, components))):
-                left = 0
-                try: # TODO: kan dit beter. Gemaakt vanwege een geval met component = nan (lab boring van Anthony Moddermanstraat)
-                    for comp, nr in component.items():
-                        barPlot = axes[i * 2].barh(lower, width=comp, left=left, height=upper-lower, color=colorsDict[nr], hatch=hatchesDict[nr], edgecolor="black", align="edge")
-                        left += comp
-                except:
-                    pass
+            self.plot_soilcolumn(axes[i * 2], soillayers, colorsDict, hatchesDict)
 
             axes[i * 2].set_ylim([self.groundlevel - self.finaldepth, self.groundlevel])
             axes[i * 2].set_xticks([])
             axes[i * 2].set_ylabel('diepte [m t.o.v. NAP]')
-            plt.title(descriptionLocation) 
 
             # voeg de beschrijving toe
-            for layer in soillayers.itertuples():
-                y = (getattr(layer, "lower_NAP") + getattr(layer, "upper_NAP")) / 2
-                propertiesText = ""
-                # TODO: deze materialproperty werken niet voor SIKB
-                for materialproperty in ['tertiaryConstituent', 'colour', 'dispersedInhomogeneity', 'carbonateContentClass',
-                                            'organicMatterContentClass', 'mixed', 'sandMedianClass', 'grainshape', # TODO: sandMedianClass kan ook mooi visueel
-                                            'sizeFraction', 'angularity', 'sphericity', 'fineSoilConsistency',
-                                            'organicSoilTexture', 'organicSoilConsistency', 'peatTensileStrength']:
-                    # TODO: dit werkt nog niet goed
-                    if materialproperty in soillayers.columns:
-                        value = getattr(layer, materialproperty)
-                        try:
-                            np.isnan(value)
-                        except:
-                            propertiesText += f', {value}'
-                text = f'{getattr(layer, "soilName")}{propertiesText}'
-                axes[i * 2 + 1].text(0, y, text, wrap=True)
+            self.plot_descriptions(axes[i * 2 + 1], soillayers)
+            if len(soillayers) > 0:
                 # verberg de assen van de beschrijving
                 axes[i * 2 + 1].set_axis_off() 
-
-                plt.title(descriptionLocation)
+            axes[i * 2 + 1].set_title(descriptionLocation)
         
         # als er analyses zijn uitgevoerd, deze ook toevoegen
         # TODO: filteren welke wel / niet of samen
@@ -1267,24 +1898,75 @@ class Bore(Test):
             for j, col in enumerate([col for col in self.analyses.columns if col not in ['beginDepth', 'endDepth']]):
                 axes.append(fig.add_subplot(gs[0, i * 2 + 2 + j], sharey=axes[0]))
                 axes[i * 2 + 2 + j].plot(self.analyses[col], averageDepth, '.')
-                plt.title(col)
+                axes[i * 2 + 2 + j].set_title(col)
 
         # voeg een stempel toe
         axes.append(fig.add_subplot(gs[1,:])) # stempel
         # verberg de assen van de stempel
         axes[-1].set_axis_off()
         # tekst voor de stempel
-        plt.text(0.05, 0.6, f'Boring: {self.testid}\nx-coördinaat: {self.easting}\ny-coördinaat: {self.northing}\nmaaiveld: {self.groundlevel}\nkwaliteit: {self.descriptionquality}\ndatum: {self.date["year"]}-{self.date["month"]}-{self.date["day"]}', fontsize=14, fontweight='bold')
-        plt.text(0.05, 0.2, 'Ingenieursbureau Gemeente Amsterdam Vakgroep Geotechniek Python ', fontsize=10)
+        axes[-1].text(0.05, 0.6, f'Boring: {self.testid}\nx-coördinaat: {self.easting}\ny-coördinaat: {self.northing}\nmaaiveld: {self.groundlevel}\nkwaliteit: {self.descriptionquality}\ndatum: {self.date["year"]}-{self.date["month"]}-{self.date["day"]}', fontsize=14, fontweight='bold')
+        axes[-1].text(0.05, 0.2, 'Ingenieursbureau Gemeente Amsterdam Vakgroep Geotechniek Python ', fontsize=10)
 
-#        plt.tight_layout() # TODO: werkt niet met text die wrapt
-
-        if saveFig:
-            plt.savefig(fname=f'{path}/{self.testid}.{outputType}')
-            plt.close('all')
+#        fig.tight_layout() # TODO: werkt niet met text die wrapt
 
         return fig
 
+    def plot_soilcolumn(self, ax, soillayers, colorsDict, hatchesDict):
+        # de boorstaat: per laag een balk per component, met de breedte van het aandeel
+        # alle balken van hetzelfde materiaal vormen samen één pad, met één keer kleur en arcering
+        # dat tekent veel sneller en geeft een kleinere pdf dan een barh per balk
+        rectangles = {}
+        for upper, lower, component in zip(soillayers["upper_NAP"], soillayers["lower_NAP"], soillayers["components"]):
+            # TODO: kan dit beter. Gemaakt vanwege een geval met component = nan (lab boring van Anthony Moddermanstraat)
+            if not isinstance(component, dict):
+                continue
+            left = 0
+            for comp, nr in component.items():
+                # TODO: leem heeft geen kleur in colorsDict, de rest van de laag blijft dan leeg
+                if colorsDict.get(nr, '') == '':
+                    break
+                rectangles.setdefault(nr, []).append([(left, lower), (left + comp, lower), (left + comp, upper), (left, upper)])
+                left += comp
+
+        for nr, verts in rectangles.items():
+            patch = PathPatch(Path.make_compound_path_from_polys(np.array(verts)), facecolor=colorsDict[nr], edgecolor='black', hatch=hatchesDict[nr])
+            # net als bij barh valt de linkerkant van iedere balk niet binnen de marge van de as
+            patch.sticky_edges.x.extend(np.unique([vert[0][0] for vert in verts]))
+            ax.add_patch(patch)
+        ax.autoscale_view()
+
+    def plot_descriptions(self, ax, soillayers, fontsize=None):
+        # de beschrijving van iedere laag, één tekst per laag
+        # de tekst wordt vooraf afgebroken op de ruimte tot de rand van de figuur, zoals wrap=True dat bij iedere keer tekenen deed
+        if fontsize is None:
+            fontsize = rcParams['font.size']
+        fig = ax.get_figure()
+        # ruimte in tekens, uitgaande van een gemiddelde breedte van 0.6 keer de lettergrootte
+        widthInPoints = (fig.bbox.x1 - ax.bbox.x0) / fig.dpi * 72
+        nrOfCharacters = max(int(widthInPoints / (0.6 * fontsize)), 10)
+
+        # boringen uit een sondering (from_cpt) hebben geen soilName
+        soilNameColumn = 'soilName' if 'soilName' in soillayers.columns else 'geotechnicalSoilName'
+        # TODO: deze materialproperty werken niet voor SIKB
+        materialproperties = [materialproperty for materialproperty in ['tertiaryConstituent', 'colour', 'dispersedInhomogeneity', 'carbonateContentClass',
+                                    'organicMatterContentClass', 'mixed', 'sandMedianClass', 'grainshape', # TODO: sandMedianClass kan ook mooi visueel
+                                    'sizeFraction', 'angularity', 'sphericity', 'fineSoilConsistency',
+                                    'organicSoilTexture', 'organicSoilConsistency', 'peatTensileStrength'] if materialproperty in soillayers.columns]
+
+        for layer in soillayers.itertuples():
+            y = (getattr(layer, "lower_NAP") + getattr(layer, "upper_NAP")) / 2
+            propertiesText = ""
+            for materialproperty in materialproperties:
+                # TODO: dit werkt nog niet goed
+                value = getattr(layer, materialproperty)
+                try:
+                    np.isnan(value)
+                except:
+                    propertiesText += f', {value}'
+            text = textwrap.fill(f'{getattr(layer, soilNameColumn)}{propertiesText}', nrOfCharacters, break_long_words=False)
+            ax.text(0, y, text, fontsize=fontsize)
+
     def from_cpt(self, cpt, interpretationModel='Robertson'):
 
         # maak een object alsof het een boring is
@@ -1388,35 +2070,476 @@ class Bore(Test):
         soillayers["components"] = soillayers["soilName"].map(soil_names_dict_dicts)
         return soillayers
 
+def sikb_depth(element):
+    # diepte in m uit een value element van SIKB0101, de eenheid is m, cm of mm
+    # de eenheid staat nog weleens op cm, maar is dan eigenlijk m. Dit is te herkennen aan 2 (of meer) decimalen
+    if re.match(r"-?\d*\.\d{2}", element.text):
+        toM = 1
+    elif '19' in element.attrib['uom']:
+        toM = 0.01
+    elif '66' in element.attrib['uom']:
+        toM = 0.001
+    else:
+        toM = 1
+    return float(element.text) * toM
+
+def attribute_containing(element, part):
+    # de waarde van het laatste attribuut met part in de naam, bijvoorbeeld 'id' voor gml:id of 'href' voor xlink:href
+    value = None
+    for key, attributeValue in element.attrib.items():
+        if part in key:
+            value = attributeValue
+    return value
+
+@lru_cache(maxsize=None)
+def sikb_crs(srsName):
+    return pyproj.Proj(projparams=srsName)
+
+@lru_cache(maxsize=None)
+def sikb_transformer(srsName):
+    # van het stelsel in het bestand naar RD, hetzelfde als pyproj.transform maar één keer per stelsel opgezet
+    return pyproj.Transformer.from_proj(sikb_crs(srsName), sikb_crs('epsg:28992'))
+
+class SikbIndex():
+    # de relaties en eigenschappen uit een SIKB0101 XML, in één keer door het bestand
+    # start en end worden voor ieder element aangeroepen, in de volgorde van het bestand zoals bij iterparse
+    # attributen zijn bij start al bekend, de tekst van een element pas bij end
+    # van alle features worden alleen de koppelingen op id en de eigenschappen bewaard, geen elementen
+    # met stream komen de boringen al tijdens het inlezen beschikbaar, zie iter_sikb0101
+    def __init__(self):
+        self.boreholes = {} # om Layer te koppelen aan Borehole
+        self.layers = {} # om Analysis te koppelen aan Layer
+        self.samples = {} # om analyses te koppelen aan Sample
+        self.filters = {} # om Sample te koppelen aan Filter
+        self.properties = {} # voor eigenschappen
+        self.uppers = {} # voor niveaus van Layer, Sample en Filter
+        self.lowers = {} # voor niveaus van Layer, Sample en Filter
+        self.boreXYZ = {}
+        self.projectNumber = None
+        # codes uit de tekst van elementen per observatie, in de volgorde van het bestand, worden bij tables toegevoegd
+        self.observations = {}
+        self.orphans = [] # codes voor de eerste observatie
+        # om te bepalen of een boring compleet is
+        self.seen = set() # ids van alle features die al helemaal zijn ingelezen
+        self.members = {} # de lagen en filters per boring
+        self.parts = {} # de observaties per laag, de monsters per filter en de analyses per monster
+
+        # de elementen waar we nu in zitten
+        self.borehole, self.groundLevel, self.geometry = None, None, None
+        self.owners = {} # Layer, Sample of Filter waarin de koppelingen staan
+        self.boreId, self.crs = None, None
+        # het laatste feature uit een featureMember en de laatste observatie
+        self.featureId, self.observationId = None, None
+
+    def parse(self, source):
+        # source is een bestandsnaam of een geopend bestand
+        for _ in self.stream(source):
+            pass
+        return self
+
+    def stream(self, source):
+        # zoals parse, maar geeft tussendoor de id van iedere boring waarvan alles wat eraan gekoppeld is is ingelezen
+        # ieder element direct onder de root wordt leeggemaakt als het is verwerkt, het hele bestand staat dus nooit in het geheugen
+        # boringen die verwijzen naar features die niet in het bestand staan komen aan het eind
+        root = None
+        depth = 0
+        done = set()
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                self.start(element)
+                continue
+            depth -= 1
+            self.end(element)
+            if depth != 1:
+                continue
+
+            featureId = attribute_containing(element[0], 'id') if len(element) > 0 else None
+            root.clear()
+            if featureId is None:
+                continue
+            self.seen.add(featureId)
+            boreId = self.bore_of(featureId)
+            if boreId is not None and boreId not in done and self.complete(boreId):
+                done.add(boreId)
+                yield boreId
+
+        for boreId in list(self.boreXYZ):
+            if boreId not in done:
+                yield boreId
+
+    def bore_of(self, featureId):
+        # de boring zelf, een laag of filter van een boring, of via de koppelingen een observatie, monster of analyse daarvan
+        if featureId in self.boreXYZ:
+            return featureId
+        for _ in range(4): # analyse, monster, filter, boring is de langste keten
+            if featureId in self.boreholes:
+                return self.boreholes[featureId]
+            featureId = self.layers.get(featureId) or self.samples.get(featureId) or self.filters.get(featureId)
+            if featureId is None:
+                return None
+        return None
+
+    def complete(self, boreId):
+        return boreId in self.seen and all(featureId in self.seen for featureId in self.ids(boreId))
+
+    def ids(self, boreId):
+        # de lagen en filters van een boring en wat daaraan gekoppeld is: observaties, monsters en analyses
+        ids = set()
+        todo = list(self.members.get(boreId, []))
+        while todo:
+            featureId = todo.pop()
+            if featureId not in ids:
+                ids.add(featureId)
+                todo.extend(self.parts.get(featureId, []))
+        return ids
+
+    def discard(self, boreId):
+        # eigenschappen van een boring die al is verwerkt zijn niet meer nodig, de koppelingen blijven bewaard
+        for featureId in self.ids(boreId):
+            for table in [self.properties, self.observations, self.uppers, self.lowers, self.parts]:
+                table.pop(featureId, None)
+        self.boreXYZ.pop(boreId, None)
+        self.members.pop(boreId, None)
+
+    def start(self, element):
+        tag = element.tag
+        kind = tag_kind(tag, ('Borehole', 'reportNumber', 'featureMember'))
+        if kind == 'Borehole':
+            self.borehole = element
+            boreId = attribute_containing(element, 'id')
+            if boreId is not None:
+                self.boreId = str(boreId)
+                self.boreXYZ.setdefault(self.boreId, {})
+
+        if self.borehole is not None:
+            childKind = tag_kind(tag, ('relatedSamplingFeature', 'groundLevel', 'geometry'))
+            # lagen koppelen aan boringen
+            if childKind == 'relatedSamplingFeature':
+                layerId = attribute_containing(element, 'href')
+                if layerId is not None:
+                    self.boreholes[layerId.replace('#', '')] = self.boreId
+                    self.members.setdefault(self.boreId, []).append(layerId.replace('#', ''))
+            elif childKind == 'groundLevel':
+                self.groundLevel = element
+            elif childKind == 'geometry':
+                self.geometry = element
+            if self.geometry is not None and 'srsName' in element.attrib:
+                srsName = element.attrib['srsName']
+                self.crs = sikb_transformer(f"{srsName.split(':')[-3]}:{srsName.split(':')[-1]}")
+
+
+        # analyses koppelen aan Layer, Sample en Filter
+        for ownerKind in ['Layer', 'Sample', 'Filter']:
+            if tag_kind(tag, (ownerKind,)):
+                ownerId = attribute_containing(element, 'id')
+                if ownerId is not None:
+                    self.owners[ownerKind] = (element, ownerId)
+        if self.owners and tag_kind(tag, ('relatedSamplingFeature', 'relatedObservation')):
+            analysisId = attribute_containing(element, 'href')
+            if analysisId is not None:
+                analysisId = analysisId.replace('#', '')
+                for ownerKind, (_, ownerId) in self.owners.items():
+                    {'Layer': self.layers, 'Sample': self.samples, 'Filter': self.filters}[ownerKind][analysisId] = ownerId
+                    self.parts.setdefault(ownerId, []).append(analysisId)
+
+        # alle observaties
+        if tag_kind(tag, ('Analysis', 'Characteristic')):
+            observationId = attribute_containing(element, 'id')
+            if observationId is not None:
+                self.observationId = observationId
+                self.observations.setdefault(observationId, [])
+
+    def end(self, element):
+        tag = element.tag
+        text = element.text
+
+        if self.borehole is not None:
+            if self.groundLevel is not None and tag_kind(tag, ('value',)):
+                self.boreXYZ[self.boreId]['groundlevel'] = sikb_depth(element)
+            elif self.geometry is not None and tag_kind(tag, ('pos',)) and text is not None and ' ' in text and self.crs is not None:
+                longitude = float(text.split()[0])
+                latitude = float(text.split()[1])
+                y, x = self.crs.transform(latitude, longitude)
+                self.boreXYZ[self.boreId]['easting'] = x
+                self.boreXYZ[self.boreId]['northing'] = y
+            elif not tag_kind(tag, ('relatedSamplingFeature', 'groundLevel', 'geometry')) and localname(tag).endswith('name'):
+                self.boreXYZ[self.boreId]['name'] = text
+
+        kind = tag_kind(tag, ('Borehole', 'reportNumber', 'featureMember'))
+        if kind == 'reportNumber':
+            self.projectNumber = text # TODO: dit moet aan alle boringen worden toegewezen
+        elif kind == 'featureMember':
+            # de featureMember is nu compleet
+            self.feature_member(element)
+
+        # codes in de tekst, bij de laatste observatie ervoor
+        if text is not None and ('urn:immetingen:' in text or 'urn:imsikb0101:' in text):
+            if self.observationId is None:
+                self.orphans.append((text, tag))
+            else:
+                self.observations[self.observationId].append((text, tag))
+
+        # de elementen waar we nu in zitten bijwerken
+        if element is self.borehole:
+            self.borehole = None
+        if element is self.groundLevel:
+            self.groundLevel = None
+        if element is self.geometry:
+            self.geometry = None
+        for ownerKind, (owner, _) in list(self.owners.items()):
+            if element is owner:
+                del self.owners[ownerKind]
+
+    def feature_member(self, element):
+        # de Layer, Filter of Sample in een featureMember met de diepte, en de observaties die erbij horen
+        # de volgorde waarin de features worden toegevoegd bepaalt de volgorde van de kolommen, die is hetzelfde als voorheen:
+        # direct na de Layer, Filter of Sample wordt het laatste element van de featureMember behandeld, daarna de rest
+        elements = list(element.iter())
+        depths = [(depthKind, value) for child in elements for depthKind in [tag_kind(child.tag, ('upperDepth', 'lowerDepth'))] if depthKind is not None
+                  for value in child.iter() if tag_kind(value.tag, ('value',))]
+        remarks = [child.text for child in elements if tag_kind(child.tag, ('remarks',)) and child.text is not None]
+
+        def observation(child):
+            if tag_kind(child.tag, ('relatedObservation',)):
+                for baby in child.iter():
+                    observationId = attribute_containing(baby, 'href')
+                    if observationId is not None:
+                        self.featureId = observationId.replace('#', '')
+                        self.properties.setdefault(self.featureId, {})
+            # grondsoort inlezen
+            # TODO: dit werkt niet met standaardbestanden. Dit moet er dus eigenlijk uit. Staat er nog om de code niet te laten crashen.
+            elif child.text is not None and 'Grondsoort:' in child.text and self.featureId in self.properties: # er is ook GrondsoortMediaan
+                for grondsoort in remarks:
+                    self.properties[self.featureId]['soilName'] = grondsoort
+
+        self.featureId = None
+        for child in elements:
+            featureId = next((value for key, value in child.attrib.items() if 'id' in key), None) if tag_kind(child.tag, ('Layer', 'Filter', 'Sample')) else None
+            if featureId is None:
+                observation(child)
+                continue
+            self.featureId = featureId
+            if featureId not in self.properties:
+                self.uppers[featureId] = {}
+                self.lowers[featureId] = {}
+                self.properties[featureId] = {} # TODO: hier probeer ik de overstap te maken naar depths in een aparte tabel, maar weet nog niet hoe dat te doen. Code werkt voor depths in properties
+            for depthKind, value in depths:
+                # in m voor de niveaus, zoals in het bestand voor de eigenschappen
+                if depthKind == 'upperDepth':
+                    self.uppers[featureId] = sikb_depth(value)
+                    self.properties[featureId]['upper'] = float(value.text)
+                else:
+                    self.lowers[featureId] = sikb_depth(value)
+                    self.properties[featureId]['lower'] = float(value.text)
+            observation(elements[-1])
+
+    def tables(self, ids=None):
+        # de eigenschappen en vervuilingen, met de codes uit de tekst van elementen erbij
+        # eerst de features uit de featureMembers, daarna de observaties in de volgorde van het bestand
+        # met ids alleen van die features en observaties, bijvoorbeeld van één boring
+        properties = {featureId: dict(values) for featureId, values in self.properties.items() if ids is None or featureId in ids}
+        polutions = {}
+
+        def add_code(observationId, text, tag):
+            # met parameter in de text kan het zowel een materiaal zijn als een hoeveelheid, daarom wordt deze apart behandeld
+            if 'parameter' in text and ':' in text:
+                if observationId in polutions:
+                    if tag_kind(tag, ('quantity',)):
+                        polutions[observationId]['parameter_quantity'] = int(text.split(':')[-1])
+                    elif tag_kind(tag, ('parameter',)):
+                        polutions[observationId]['parameter_material'] = int(text.split(':')[-1])
+            else:
+                try:
+                    properties[observationId][text.split(':')[2]] = int(text.split(':')[-1])
+                except:
+                    pass
+
+        # voor de eerste observatie horen codes bij het laatste feature uit de featureMembers
+        for text, tag in self.orphans:
+            add_code(self.featureId, text, tag)
+        for observationId, codes in self.observations.items():
+            if ids is not None and observationId not in ids:
+                continue
+            properties.setdefault(observationId, {})
+            polutions.setdefault(observationId, {}) # TODO: nu zowel properties als polutions dat is niet nodig, maar ook niet heel ernstig
+            for text, tag in codes:
+                add_code(observationId, text, tag)
+        return properties, polutions
+
+def sikb_source(xmlFile, fromFile=True):
+    # met fromFile=False is xmlFile de XML zelf (string of bytes)
+    if fromFile:
+        return xmlFile
+    return StringIO(xmlFile) if isinstance(xmlFile, str) else BytesIO(xmlFile)
+
+def sikb_properties(properties, layers, boreholes):
+    # eigenschappen omzetten in een dataframe
+    properties = pd.DataFrame().from_dict(properties).T
+
+    # koppel de analyses aan lagen en lagen aan boringen
+    properties['layer'] = properties.index.map(layers)
+    properties['layer'] = np.where(properties['layer'].isna(), properties.index, properties['layer']) # sommige eigenschappen zijn gekoppeld aan Layer, andere aan Analysis of Characteristic
+    properties['bore'] = properties['layer'].map(boreholes)
+
+    # soms worden er andere domeintabellen gebruikt dan de namen in de XML
+    # TODO: geen onderbouwing hiervoor gevonden. Het is een aanname
+    # TODO: zowel kleur als Kleur komt voor
+    # TODO: de 'urn:imsikb0101:' moeten omgezet worden naar iets anders. ubicode is bijv. VerdachteActiviteit 
+    # TODO: de 'urn:imsikb0101:' heel veel domeintabellen moeten nog gedownload
+    columnsDict = {
+        'Grondsoort': 'Bodemsoort', 
+        'GrondsoortMediaan': 'BodemsoortMediaan',
+        'ubicode': 'VerdachteActiviteit'}
+    properties.rename(columns=columnsDict, inplace=True)
+    return properties
+
+def sikb_layers(properties):
+    # per laag de eigenschappen samenvoegen en de codes voor alle lagen in één keer omzetten in tekst
+    layerProperties = properties.groupby('layer', as_index=False).max()[properties.columns]
+    return code2text(layerProperties).set_index(layerProperties['layer'].to_numpy())
+
+def sikb_bore(boreId, boreData, boreXYZ):
+    # maak een Bore van de lagen van één boring uit sikb_layers
+    # TODO: zou dit beter zijn als method voor de class Bore?
+    bore = Bore()
+    bore.soillayers = {}
+
+    layers = {}
+    for layerNr, layerData in boreData.iterrows():
+        layerData = Bodemsoort2components(layerData)
+        layerData.dropna(inplace=True)
+
+        if all(param in layerData.index for param in ['upper', 'lower', 'Bodemsoort']): # anders plot het later niet
+            layers[layerNr] = layerData
+    
+    bore.soillayers['veld'] = pd.DataFrame().from_dict(layers).T
+    bore.soillayers['veld'].rename(columns={'Bodemsoort': 'soilName'}, inplace=True)
+
+    # soms is de lower kleiner dan upper, dat is niet volgens de conventie
+    # dan de kolommen omdraaien
+    if bore.soillayers['veld']['upper'].gt(bore.soillayers['veld']['lower']).all():
+        bore.soillayers['veld'].rename(columns={'upper': 'lower', 'lower': 'upper'}, inplace=True)
+
+    try:
+        bore.testid = boreXYZ[boreId]['name']
+    except:
+        bore.testid = boreId
+
+    try:
+        bore.groundlevel = boreXYZ[boreId]['groundlevel']
+    except:
+        bore.groundlevel = None
+    
+    try:
+        bore.easting = boreXYZ[boreId]['easting']
+        bore.northing = boreXYZ[boreId]['northing']
+    except:
+        bore.easting = 0
+        bore.northing = 0                    
+
+    if bore.groundlevel is not None and 'upper' in bore.soillayers['veld'].columns:
+        bore.soillayers['veld']['upper_NAP'] = bore.groundlevel - bore.soillayers['veld']['upper']
+        bore.soillayers['veld']['lower_NAP'] = bore.groundlevel - bore.soillayers['veld']['lower']
+        bore.finaldepth = bore.soillayers['veld']['upper_NAP'].max() - bore.soillayers['veld']['lower_NAP'].min() # lengte van de boring
+    return bore
+
+def iter_sikb0101(xmlFile, fromFile=True, batchSize=20, errors=None):
+    # geeft de boringen uit een SIKB0101 XML één voor één, zodra de lagen en de observaties van een boring zijn ingelezen
+    # zo kan een boring al geplot of weggeschreven worden terwijl de rest van het bestand nog wordt gelezen
+    # alleen de koppelingen tussen features blijven in het geheugen, de eigenschappen van een boring worden na gebruik weggegooid
+    # de boringen worden per batchSize samen omgezet in dataframes, dat is veel sneller dan per boring, met batchSize=1 komt iedere boring direct
+    # een boring die niet gemaakt kan worden stopt het lezen met een ValueError met de id van de boring
+    # met een dict voor errors gaat het lezen door en komt de foutmelding per boring in errors, zoals bij Multibore.load_xml_sikb0101
+    # er worden geen bestanden weggeschreven, zie daarvoor Multibore.load_xml_sikb0101
+    index = SikbIndex()
+    boreIds = []
+    for boreId in index.stream(sikb_source(xmlFile, fromFile)):
+        boreIds.append(boreId)
+        if len(boreIds) >= batchSize:
+            yield from sikb_batch(index, boreIds, errors)
+            boreIds = []
+    yield from sikb_batch(index, boreIds, errors)
+
+def sikb_batch(index, boreIds, errors=None):
+    # maak Bores van complete boringen uit een SikbIndex, in de volgorde van boreIds, zie iter_sikb0101 voor errors
+    ids = set().union(*[index.ids(boreId) for boreId in boreIds])
+    properties, _ = index.tables(ids)
+    boreXYZ = {boreId: index.boreXYZ.get(boreId, {}) for boreId in boreIds}
+    for boreId in boreIds:
+        index.discard(boreId)
+    if len(properties) == 0:
+        return
+
+    boreGroups = dict(tuple(sikb_layers(sikb_properties(properties, index.layers, index.boreholes)).groupby('bore')))
+    for boreId in boreIds:
+        if boreId not in boreGroups:
+            continue
+        try:
+            bore = sikb_bore(boreId, boreGroups[boreId], boreXYZ)
+        except Exception as e:
+            error = f'{type(e).__name__}: {str(e).strip()}'
+            if errors is None:
+                raise ValueError(f'boring {boreId}: {error}') from e
+            errors[boreId] = error
+            continue
+        yield bore
+
+def sikb_bore_task(task, folder):
+    # maak één boring en schrijf de csv met lagen in folder, voor Multibore.load_xml_sikb0101, ook in een pool
+    # een fout stopt de andere boringen niet, maar komt in result['error']
+    # result['row'] is de regel voor de kaart met alle boringen, die ontbreekt bij een fout
+    boreId, boreData, boreXYZ, peilbuisAanwezig = task
+    result = {'boreId': boreId, 'bore': None, 'row': None, 'error': None}
+    try:
+        bore = sikb_bore(boreId, boreData, {boreId: boreXYZ})
+        result['bore'] = bore
+
+        try:
+            onderkant = bore.soillayers['veld']['lower_NAP'].min()
+        except:
+            onderkant = None
+
+        # schrijf een csv weg als er lagen in de boorbeschrijving zitten. Als je alles meteen omzet naar een plot, dan crasht het bij grote hoeveelheden boringen
+        if len(bore.soillayers['veld']) > 0:
+            bore.soillayers['veld'].to_csv(f'{folder}/{bore.testid}_{boreId}.csv', sep=';')
+            boorbeschrijving = True
+        else:
+            boorbeschrijving = False
+
+        result['row'] = (bore.easting, bore.northing, f'{bore.testid}_{boreId}', bore.groundlevel, onderkant, peilbuisAanwezig, boorbeschrijving)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {str(e).strip()}'
+    return result
+
 @dataclass
 class Multibore():
     def __init__(self):
         self.bores = []
+        self.errors = {} # per boring die niet ingelezen kon worden de foutmelding
 
-    def load_xml_sikb0101(self, xmlFile, projectName): 
+    def load_xml_sikb0101(self, xmlFile, projectName, fromFile=True, fileName=None, workers=1, poolType='process', chunksize=None, progress=None): 
 
         # lees boringen in vanuit een SIKB0101 XML
         # anders dan de BRO komen alle boringen van een project in 1 bestand
-        tree = ElementTree()
-        tree.parse(xmlFile)
-        root = tree.getroot()
-
-        boreholes = {} # om Layer te koppelen aan Borehole
-        layers = {} # om Analysis te koppelen aan Layer
-        samples = {} # om analyses te koppelen aan Sample
-        filters = {} # om Sample te koppelen aan Filter
-        properties = {} # voor eigenschappen 
-        uppers = {} # voor niveaus van Layer, Sample en Filter
-        lowers = {} # voor niveaus van Layer, Sample en Filter
-        polutions = {} # voor vervuiling
-        boreXYZ = {}
-
-        # nodig voor omzetten latlong in rd
-        rd = pyproj.Proj(projparams='epsg:28992')
-
-        # vul de dictionary boreholes met keys voor de boringen
-        
-        # TODO: dit moet opgeschoond
+        # met fromFile=False is xmlFile de XML zelf (string of bytes), fileName is dan de naam voor de uitvoer
+        # de boringen worden gemaakt door workers processen (poolType='process') of threads (poolType='thread'), bij 1 gebeurt alles hier
+        # de volgorde van de boringen en de uitvoer is altijd hetzelfde, fouten per boring komen in self.errors
+        # let op: met processen moet het aanroepende script onder if __name__ == '__main__' staan (Windows)
+        # alle koppelingen en eigenschappen in één keer door het bestand, zie SikbIndex
+        # om boringen al tijdens het inlezen te verwerken, zie iter_sikb0101
+        # progress wordt na iedere boring aangeroepen met het volgnummer, het aantal boringen en het resultaat, zoals in gefxml_batch
+        index = SikbIndex().parse(sikb_source(xmlFile, fromFile))
+        boreholes = index.boreholes # om Layer te koppelen aan Borehole
+        layers = index.layers # om Analysis te koppelen aan Layer
+        samples = index.samples # om analyses te koppelen aan Sample
+        filters = index.filters # om Sample te koppelen aan Filter
+        uppers = index.uppers # voor niveaus van Layer, Sample en Filter
+        lowers = index.lowers # voor niveaus van Layer, Sample en Filter
+        boreXYZ = index.boreXYZ
+        properties, polutions = index.tables() # voor eigenschappen en vervuiling
 
         # TODO: geometries en fs zijn voor uitvoer tijdens test
         xs = []
@@ -1430,209 +2553,10 @@ class Multibore():
         from shapely.geometry import Point
         import geopandas as gpd
 
-
-        for element in root.iter():
-            # vul de dictionaries voor de boringen met lagen
-            if 'Borehole' in element.tag:
-                for key in element.attrib.keys():
-                    if 'id' in key:
-                        boreId = str(element.attrib[key])
-                        if boreId not in boreXYZ.keys():
-                            boreXYZ[boreId] = {}
-                    for child in element.iter():
-                        # lagen koppelen aan boringen
-                        if 'relatedSamplingFeature' in child.tag:
-                            for key in child.attrib.keys():
-                                if 'href' in key:
-                                    layerId = child.attrib[key].replace('#', '')
-                                    boreholes[layerId] = boreId
-                        elif 'groundLevel' in child.tag:
-                            for p in child.iter(): 
-                                if 'value' in p.tag:
-
-                                    # bepaal de eenheid van de inmeting, m, cm of mm
-                                    # de eenheid staat nog weleens op cm, maar is dan eigenlijk m. Dit is te herkennen aan 2 (of meer) decimalen
-                                    if re.match(r"-?\d*\.\d{2}", p.text):
-                                        unit = 'm'
-                                        toM = 1
-                                    elif '19' in p.attrib['uom']:
-                                        unit = 'cm'
-                                        toM = 0.01
-                                    elif '66' in p.attrib['uom']:
-                                        unit = 'mm'
-                                        toM = 0.001
-                                    else:
-                                        unit = 'm'
-                                        toM = 1
-
-                                    boreXYZ[boreId]['groundlevel'] = float(p.text) * toM
-                        elif 'geometry' in child.tag:
-                            for p in child.iter(): 
-                                if 'srsName' in p.attrib.keys():
-                                    srs = f"{p.attrib['srsName'].split(':')[-3]}:{p.attrib['srsName'].split(':')[-1]}"
-                                    crs = pyproj.Proj(projparams=srs)
-                                if 'pos' in p.tag and ' ' in p.text: 
-                                    longitude = float(p.text.split()[0])
-                                    latitude = float(p.text.split()[1])
-                                    y, x = pyproj.transform(crs, rd, latitude, longitude)
-                                    boreXYZ[boreId]['easting'] =  x
-                                    boreXYZ[boreId]['northing'] = y
-                        elif child.tag.endswith('name'):
-                            boreXYZ[boreId]['name'] = child.text
-            elif 'reportNumber' in element.tag:
-                projectNumber = element.text # TODO: dit moet aan alle boringen worden toegewezen
-
-            # lagen inlezen
-            # TODO: dit is niet mooi, maar het werkt wel.
-            elif 'featureMember' in element.tag:
-                featureId, upperDepth, lowerDepth, grondsoort = None, None, None, None
-                for child in element.iter():
-                    # bepaal de id van de featureMember
-                    # deze komt altijd voor de andere waarden
-                    for key in child.attrib.keys():
-                        if any(tag in child.tag for tag in ['Layer', 'Filter', 'Sample']) and 'id' in key:
-                            featureId = child.attrib[key]
-                            if featureId not in properties.keys():
-                                uppers[featureId] = {} 
-                                lowers[featureId] = {} 
-                                properties[featureId] = {} # TODO: hier probeer ik de overstap te maken naar depths in een aparte tabel, maar weet nog niet hoe dat te doen. Code werkt voor depths in properties
-                            for child in element.iter():
-                                if 'upperDepth' in child.tag:
-                                    for inmeting in child.iter():
-                                        if 'value' in inmeting.tag:
-                                            upperDepth = float(inmeting.text)
-                                            
-                                            # bepaal de eenheid van de inmeting, m, cm of mm
-                                            # de eenheid staat nog weleens op cm, maar is dan eigenlijk m. Dit is te herkennen aan 2 (of meer) decimalen
-                                            if re.match(r"-?\d*\.\d{2}", inmeting.text):
-                                                unit = 'm'
-                                                toM = 1
-                                            elif '19' in inmeting.attrib['uom']:
-                                                unit = 'cm'
-                                                toM = 0.01
-                                            elif '66' in inmeting.attrib['uom']:
-                                                unit = 'mm'
-                                                toM = 0.001
-                                            else:
-                                                unit = 'm'
-                                                toM = 1
-
-                                            uppers[featureId] = upperDepth * toM 
-                                            properties[featureId]['upper'] = upperDepth 
-                                elif 'lowerDepth' in child.tag:
-                                    for inmeting in child.iter():
-                                        if 'value' in inmeting.tag:
-                                            lowerDepth = float(inmeting.text)
-
-                                            # bepaal de eenheid van de inmeting, m, cm of mm
-                                            # de eenheid staat nog weleens op cm, maar is dan eigenlijk m. Dit is te herkennen aan 2 (of meer) decimalen
-                                            if re.match(r"-?\d*\.\d{2}", inmeting.text):
-                                                unit = 'm'
-                                                toM = 1
-                                            elif '19' in inmeting.attrib['uom']:
-                                                unit = 'cm'
-                                                toM = 0.01
-                                            elif '66' in inmeting.attrib['uom']:
-                                                unit = 'mm'
-                                                toM = 0.001
-                                            else:
-                                                unit = 'm'
-                                                toM = 1
-
-                                            lowers[featureId] = lowerDepth * toM 
-                                            properties[featureId]['lower'] = lowerDepth 
-
-
-                    if 'relatedObservation' in child.tag: # TODO: is deze wel nodig? Wordt hierboven ook al gedaan
-                        for baby in child.iter():
-                            for key in baby.attrib.keys():
-                                if 'href' in key:
-                                    featureId = baby.attrib[key].replace('#', '')
-                                    if featureId not in properties.keys():
-                                        properties[featureId] = {}
-
-                    # grondsoort inlezen 
-                    # TODO: dit werkt niet met standaardbestanden. Dit moet er dus eigenlijk uit. Staat er nog om de code niet te laten crashen.
-                    elif child.text is not None:
-                        if 'Grondsoort:' in child.text: # er is ook GrondsoortMediaan
-                            for inmeting in element.iter():
-                                if 'remarks' in inmeting.tag and inmeting.text is not None:
-                                    grondsoort = inmeting.text
-                                    properties[featureId]['soilName'] = grondsoort
-
-
-        # maak een dictionary om dingen ids te koppelen aan layer ids
-        for element in root.iter():
-            if 'Layer' in element.tag:
-                for key in element.attrib.keys():
-                    if 'id' in key:
-                        layerId = element.attrib[key]
-                    for child in element.iter():
-                        # analyses koppelen aan layers
-                        if 'relatedSamplingFeature' in child.tag or 'relatedObservation' in child.tag:
-                            for key in child.attrib.keys():
-                                if 'href' in key:
-                                    analysisId = child.attrib[key].replace('#', '')
-                                    layers[analysisId] = layerId
-
-            # maak een dictionary om dingen ids te koppelen aan sample ids
-            if 'Sample' in element.tag:
-                for key in element.attrib.keys():
-                    if 'id' in key:
-                        sampleId = element.attrib[key]
-                    for child in element.iter():
-                        if 'relatedSamplingFeature' in child.tag or 'relatedObservation' in child.tag:
-                            for key in child.attrib.keys():
-                                if 'href' in key:
-                                    analysisId = child.attrib[key].replace('#', '')
-                                    samples[analysisId] = sampleId
-
-            # maak een dictionary om dingen ids te koppelen aan filter ids
-            if 'Filter' in element.tag:
-                for key in element.attrib.keys():
-                    if 'id' in key:
-                        sampleId = element.attrib[key]
-                    for child in element.iter():
-                        if 'relatedSamplingFeature' in child.tag or 'relatedObservation' in child.tag:
-                            for key in child.attrib.keys():
-                                if 'href' in key:
-                                    analysisId = child.attrib[key].replace('#', '')
-                                    filters[analysisId] = sampleId
-
-
-            # alle observaties inlezen
-            if element.attrib.keys() is not None:
-                for key in element.attrib.keys():
-                    if 'id' in key and any(tag in element.tag for tag in ['Analysis', 'Characteristic']):                           
-                            featureId = element.attrib[key]
-                            if featureId not in properties.keys():
-                                properties[featureId] = {}
-                            if featureId not in polutions.keys(): # TODO: nu zowel properties als polutions dat is niet nodig, maar ook niet heel ernstig
-                                polutions[featureId] = {}
-
-            if element.text is not None: 
-                if 'urn:immetingen:' in element.text or 'urn:imsikb0101:' in element.text:
-                    # met parameter in de text kan het zowel een materiaal zijn als een hoeveelheid, daarom wordt deze apart behandeld
-                    if 'parameter' in element.text and ':' in element.text:
-                        if 'quantity' in element.tag:
-                            polutions[featureId]['parameter_quantity'] = int(element.text.split(':')[-1])
-                        elif 'parameter' in element.tag:
-                            polutions[featureId]['parameter_material'] = int(element.text.split(':')[-1])
-                    else:
-                        try:
-                            properties[featureId][element.text.split(':')[2]] = int(element.text.split(':')[-1])
-                        except:
-                            pass
-
-        # eigenschappen omzetten in een dataframe
-        properties = pd.DataFrame().from_dict(properties).T
+        # eigenschappen omzetten in een dataframe, gekoppeld aan lagen en boringen
+        properties = sikb_properties(properties, layers, boreholes)
         polutions = pd.DataFrame().from_dict(polutions).T
 
-        # koppel de analyses aan lagen en lagen aan boringen
-        properties['layer'] = properties.index.map(layers)
-        properties['layer'] = np.where(properties['layer'].isna(), properties.index, properties['layer']) # sommige eigenschappen zijn gekoppeld aan Layer, andere aan Analysis of Characteristic
-        properties['bore'] = properties['layer'].map(boreholes)
-
         # metingen moeten uiteindelijk aan een boring en een diepte interval gekoppeld worden
         polutions['sample'] = polutions.index.map(samples)
         polutions['filter'] = polutions['sample'].map(filters)
@@ -1643,109 +2567,56 @@ class Multibore():
         # TODO: toevoegen waarde van de meting. Wat gebruiken we daar? numericValue of alphanumericValue? Kan ug/l of mg/l zijn, mogelijk nog meer.
         # TODO: kan een sample ook gekoppeld zijn aan iets anders dan een filter?
 
-
-        # soms worden er andere domeintabellen gebruikt dan de namen in de XML
-        # TODO: geen onderbouwing hiervoor gevonden. Het is een aanname
-        # TODO: zowel kleur als Kleur komt voor
-        # TODO: de 'urn:imsikb0101:' moeten omgezet worden naar iets anders. ubicode is bijv. VerdachteActiviteit 
-        # TODO: de 'urn:imsikb0101:' heel veel domeintabellen moeten nog gedownload
-        columnsDict = {
-            'Grondsoort': 'Bodemsoort', 
-            'GrondsoortMediaan': 'BodemsoortMediaan',
-            'ubicode': 'VerdachteActiviteit'}
-        properties.rename(columns=columnsDict, inplace=True)
-        
         # make een mapje om bestanden per project (invoer XML) weg te schrijven
-        fileName = xmlFile.split('/')[-1].replace('.xml', '')
+        if fileName is None:
+            fileName = xmlFile.split('/')[-1].replace('.xml', '') if fromFile else projectName
         if not os.path.isdir(f'./output/{projectName}'):
             os.mkdir(f'./output/{projectName}')
         if not os.path.isdir(f'./output/{projectName}/{fileName}'):
             os.mkdir(f'./output/{projectName}/{fileName}')
 
-        aantal_boringen = len(properties['bore'].unique())
+        layerProperties = sikb_layers(properties)
         
-        for boreId, boreData in properties.groupby('bore'): 
-            
-            if type(boreId) != float: # er kan een nan inzitten, dat is data type float
-                try: 
-                    print(f'{boreId} van {aantal_boringen} boringen')
-
-                    # TODO: zou dit beter zijn als method voor de class Bore?
-                    bore = Bore()
-                    bore.soillayers = {}
-
-                    layers = {}
-                    for layerNr, layerData in boreData.groupby('layer'):
-                        layerData = layerData.max(skipna=True)
-                        layerData = code2text(layerData)
-                        layerData = Bodemsoort2components(layerData)
-                        layerData.dropna(inplace=True)
-
-                        if all(param in layerData.index for param in ['upper', 'lower', 'Bodemsoort']): # anders plot het later niet
-                            layers[layerNr] = layerData
-                    
-                    bore.soillayers['veld'] = pd.DataFrame().from_dict(layers).T
-                    bore.soillayers['veld'].rename(columns={'Bodemsoort': 'soilName'}, inplace=True)
-                
-                    # soms is de lower kleiner dan upper, dat is niet volgens de conventie
-                    # dan de kolommen omdraaien
-                    if bore.soillayers['veld']['upper'].gt(bore.soillayers['veld']['lower']).all():
-                        bore.soillayers['veld'].rename(columns={'upper': 'lower', 'lower': 'upper'}, inplace=True)
-
-                    try:
-                        bore.testid = boreXYZ[boreId]['name']
-                    except:
-                        bore.testid = boreId
-
-                    try:
-                        bore.groundlevel = boreXYZ[boreId]['groundlevel']
-                    except:
-                        bore.groundlevel = None
-                    
-                    try:
-                        bore.easting = boreXYZ[boreId]['easting']
-                        bore.northing = boreXYZ[boreId]['northing']
-                    except:
-                        bore.easting = 0
-                        bore.northing = 0                    
-
-                    if bore.groundlevel is not None and 'upper' in bore.soillayers['veld'].columns:
-                        bore.soillayers['veld']['upper_NAP'] = bore.groundlevel - bore.soillayers['veld']['upper']
-                        bore.soillayers['veld']['lower_NAP'] = bore.groundlevel - bore.soillayers['veld']['lower']
-                        bore.finaldepth = bore.soillayers['veld']['upper_NAP'].max() - bore.soillayers['veld']['lower_NAP'].min() # lengte van de boring
-                        self.bores.append(bore)
-                    else:
-                        self.bores.append(bore)
-
-                    try:
-                        onderkant = bore.soillayers['veld']['lower_NAP'].min()
-                    except:
-                        onderkant = None
-                    
-                    # check of er een peilbuis aanwezig is
-                    if boreId in polutions['bore'].unique():
-                        peilbuisAanwezig = True
-                    else:
-                        peilbuisAanwezig = False
-
-
-                    # schrijf een csv weg als er lagen in de boorbeschrijving zitten. Als je alles meteen omzet naar een plot, dan crasht het bij grote hoeveelheden boringen
-                    if len(bore.soillayers['veld']) > 0:
-                        bore.soillayers['veld'].to_csv(f'./output/{projectName}/{fileName}/{bore.testid}_{boreId}.csv', sep=';')
-                        boorbeschrijving = True
-                    else:
-                        boorbeschrijving = False
-
-                    geometries.append(Point(bore.easting, bore.northing)) 
-                    xs.append(bore.easting)
-                    ys.append(bore.northing)
-                    fs.append(f'{bore.testid}_{boreId}')
-                    groundlevels.append(bore.groundlevel)
+        # check of er een peilbuis aanwezig is
+        peilbuisBores = set(polutions['bore'].unique())
+        tasks = [(boreId, boreData, boreXYZ.get(boreId, {}), boreId in peilbuisBores) for boreId, boreData in layerProperties.groupby('bore')
+                 if type(boreId) != float] # er kan een nan inzitten, dat is data type float
+        task = partial(sikb_bore_task, folder=f'./output/{projectName}/{fileName}')
+
+        workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+        if workers == 1:
+            results = map(task, tasks)
+        else:
+            if chunksize is None:
+                # ongeveer vier pakketjes per worker, zoals in gefxml_batch
+                chunksize = max(1, min(16, len(tasks) // (workers * 4)))
+            pool = ThreadPool(workers) if poolType == 'thread' else multiprocessing.Pool(workers)
+            # imap geeft de resultaten in de volgorde van tasks, ook als ze in een andere volgorde klaar zijn
+            results = pool.imap(task, tasks, chunksize=chunksize)
+
+        try:
+            for nr, result in enumerate(results, start=1):
+                boreId = result['boreId']
+                if progress is not None:
+                    progress(nr, len(tasks), result)
+                if result['bore'] is not None:
+                    self.bores.append(result['bore'])
+                if result['error'] is not None:
+                    self.errors[boreId] = result['error']
+                if result['row'] is not None:
+                    x, y, f, groundlevel, onderkant, peilbuisAanwezig, boorbeschrijving = result['row']
+                    geometries.append(Point(x, y))
+                    xs.append(x)
+                    ys.append(y)
+                    fs.append(f)
+                    groundlevels.append(groundlevel)
                     depths.append(onderkant)
                     peilbuizen.append(peilbuisAanwezig)
                     boorbeschrijvingen.append(boorbeschrijving)
-                except Exception as e:
-                    print(boreId, e)
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
 
         # maak een csv met locaties en bestandsnamen en of er een boorbeschrijving en een peilbuis aanwezig is
         kaart = pd.DataFrame()
@@ -1763,24 +2634,135 @@ class Multibore():
         kaart = gpd.GeoDataFrame(kaart, geometry='geometry').set_crs(epsg=28992)
         kaart.to_file(f'./output/{projectName}/{fileName}.geojson', driver='GeoJSON') 
 
-def code2text(series):
+def load(source, checkAddFrictionRatio=False, checkAddDepth=False, projectName='sikb', metadataOnly=False):
+    # lees een GEF, BRO XML, DINO XML of SIKB0101 XML in als Cpt, Bore of Multibore
+    # source is een bestandsnaam of de bytes van een bestand
+    # het bestand wordt één keer gelezen, dezelfde bytes worden gebruikt om het soort te bepalen en om in te lezen
+    # checkAddFrictionRatio en checkAddDepth gelden alleen voor sonderingen, projectName alleen voor SIKB0101
+    # metadataOnly=True leest alleen de metadata, een DINO XML wordt wel helemaal ingelezen en van een SIKB0101 worden de boringen niet ingelezen
+    if isinstance(source, (bytes, bytearray)):
+        content = source
+        filename = None
+    else:
+        with open(source, 'rb') as f:
+            content = f.read()
+        filename = re.search(r'(.*[\\/])*(?P<filename>.*)\.', source).group('filename')
+
+    sniffed = sniff(content)
+    if sniffed.format == 'gef':
+        # de header is bij het bepalen van het soort al gelezen
+        if sniffed.kind == 'cpt':
+            test = Cpt()
+            test.load_gef(content, checkAddFrictionRatio=checkAddFrictionRatio, checkAddDepth=checkAddDepth, metadataOnly=metadataOnly, header=sniffed.header)
+        elif sniffed.kind == 'bore':
+            test = Bore()
+            test.load_gef(content, metadataOnly=metadataOnly, header=sniffed.header)
+        else:
+            raise ValueError(f'onbekend soort GEF: {sniffed.header.get("REPORTCODE") or sniffed.header.get("PROCEDURECODE")}')
+    elif sniffed.kind == 'cpt':
+        test = Cpt()
+        test.load_xml(content, checkAddFrictionRatio=checkAddFrictionRatio, checkAddDepth=checkAddDepth, fromFile=False, metadataOnly=metadataOnly)
+    elif sniffed.kind == 'dino':
+        test = Bore()
+        test.load_dino_xml13(content, fromFile=False)
+    elif sniffed.kind == 'sikb':
+        test = Multibore()
+        if not metadataOnly:
+            test.load_xml_sikb0101(content, projectName, fromFile=False, fileName=filename)
+        return test
+    else:
+        test = Bore()
+        test.load_xml(content, fromFile=False, metadataOnly=metadataOnly)
+
+    if filename is not None:
+        test.filename = filename
+    return test
+
+class DomainTables():
+    # de domeintabellen van SIKB, per tabel een Series met de omschrijving bij iedere code
+    # iedere tabel wordt bij het eerste gebruik één keer ingelezen en daarna steeds hergebruikt
+    # de naam van een tabel is de naam van de eigenschap in de XML, zoals Bodemsoort of Kleur
+    # de tabellen komen uit de bundel domeintabellen.json, die wordt met build_domeintabellen.py gemaakt uit de xlsx bestanden
+    # een tabel die niet in de bundel staat, of waarvan het xlsx bestand sindsdien is gewijzigd, wordt uit het xlsx bestand gelezen
+    BUNDLE = 'domeintabellen.json'
+    # verhoog de versie als de opbouw van de bundel verandert, een oude bundel wordt dan niet meer gebruikt
+    BUNDLE_VERSION = 1
+
+    def __init__(self, folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sikb_domeintabellen')):
+        self.folder = folder
+        self.tables = {}
+        self._bundle = None
+
+    @property
+    def bundle(self):
+        if self._bundle is None:
+            try:
+                with open(os.path.join(self.folder, self.BUNDLE), encoding='utf-8') as f:
+                    bundle = json.load(f)
+                self._bundle = bundle['tables'] if bundle.get('version') == self.BUNDLE_VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self._bundle = {}
+        return self._bundle
+
+    def table(self, name):
+        # None als er geen (leesbare) tabel is, dat wordt ook onthouden
+        if name not in self.tables:
+            xlsxFile = os.path.join(self.folder, f'{name}.xlsx')
+            compiled = self.bundle.get(name)
+            # het xlsx bestand vergelijken kost alleen een hash, geen Excel
+            if compiled is not None and (not os.path.exists(xlsxFile) or compiled['source'] == self.digest(xlsxFile)):
+                self.tables[name] = pd.Series(compiled['texts'], index=compiled['codes'])
+            else:
+                try:
+                    self.tables[name] = self.read_xlsx(xlsxFile)
+                except Exception:
+                    self.tables[name] = None
+        return self.tables[name]
+
+    @staticmethod
+    def read_xlsx(xlsxFile):
+        domeintabel = pd.read_excel(xlsxFile)
+        return pd.Series(domeintabel['Omschrijving'].to_numpy(), index=domeintabel['ID'].to_numpy())
+
+    @staticmethod
+    def digest(path):
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+
+    def compile(self, bundle=None):
+        # lees alle xlsx bestanden in de map en schrijf ze samen in de bundel, geeft de namen van de tabellen terug
+        tables = {}
+        for name in sorted(os.listdir(self.folder)):
+            if name.endswith('.xlsx'):
+                xlsxFile = os.path.join(self.folder, name)
+                table = self.read_xlsx(xlsxFile)
+                tables[name[:-len('.xlsx')]] = {'source': self.digest(xlsxFile), 'codes': table.index.tolist(), 'texts': table.tolist()}
+        bundle = os.path.join(self.folder, self.BUNDLE) if bundle is None else bundle
+        with open(bundle, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.BUNDLE_VERSION, 'tables': tables}, f, ensure_ascii=False, separators=(',', ':'))
+        self.tables = {}
+        self._bundle = None
+        return list(tables)
+
+    def translate(self, frame):
+        # zet de codes in alle kolommen waarvoor een tabel is in één keer om in tekst
+        # een code die niet in de tabel staat blijft staan
+        frame = frame.copy()
+        for column in frame.columns:
+            table = self.table(column) if isinstance(column, str) else None
+            if table is not None:
+                known = frame[column].isin(table.index)
+                frame[column] = frame[column].map(table).where(known, frame[column])
+        return frame
+
+domainTables = DomainTables()
+
+def code2text(values):
     # functie om codes gebruikt in de XML op te zoeken in de domeintabellen van SIKB
-    seriesTranslated = {}
-    for index, value in series.iteritems():
-        try:
-            # lees de tabel met coderingen in
-            domeintabel = pd.read_excel(f'./sikb_domeintabellen/{index}.xlsx')
-            # maak een dict voor de uitvoering
-            translation = {k:v for (k,v) in zip(domeintabel['ID'], domeintabel['Omschrijving'])}
-            # zet de codering om in leesbare tekst            
-            seriesTranslated[index] = translation[value]
-        except:
-            seriesTranslated[index] = value
-            pass
-
-    seriesTranslated = pd.Series(seriesTranslated)
-     
-    return seriesTranslated
+    # values is een Series met de eigenschappen van één laag, of een DataFrame met een rij per laag
+    if isinstance(values, pd.Series):
+        return domainTables.translate(values.to_frame().T).iloc[0]
+    return domainTables.translate(values)
 
 def Bodemsoort2components(series):
     # functie om de naamgeving gebruikt in SIKB om te zetten in de dictionary met waarden zoals gebruikt voor het plotten van boringen
@@ -63,10 +63,10 @@ df = pd.DataFrame()
 def gef2gpkg(files):
     for f in files:
         try:
-            testType = Test().load_gef(f)
+            testType = Test().type_from_gef(f)
             if testType == 'cpt':
                 cpt = Cpt()
-                cpt.load_gef(f)
+                cpt.load_gef(f, metadataOnly=True)
                 projectids.append(cpt.projectid)
                 projectnames.append(cpt.projectname)
                 tests.append(cpt.testid)
@@ -76,7 +76,7 @@ def gef2gpkg(files):
 
             elif testType == 'bore':
                 bore = Bore()
-                bore.load_gef(f)
+                bore.load_gef(f, metadataOnly=True)
                 projectids.append(bore.projectid)
                 projectnames.append(bore.projectname)
                 tests.append(bore.testid)
@@ -82,33 +82,38 @@ def gef_xml2shp(files):
         print(f)
         if f.lower().endswith('gef'):
             try:
-                testType = Test().load_gef(f)
+                testType = Test().type_from_gef(f)
                 types.append(testType)
                 fileids.append(f)
                 if testType == 'cpt':
                     test = Cpt()
-                    test.load_gef(f)
+                    test.load_gef(f, metadataOnly=True)
                     projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates = appendData(test, projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates)
                 elif testType == 'bore':
                     test = Bore()
-                    test.load_gef(f)
+                    test.load_gef(f, metadataOnly=True)
                     projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates = appendData(test, projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates)
             except:
                 print(f'{f} fout in bestand')
                 pass
         elif f.lower().endswith('xml'):
             try:
-                testType = Test().load_xml(f)
+                testType = Test().type_from_xml(f)
                 types.append(testType)
                 fileids.append(f)
                 if testType == 'cpt':
                     test = Cpt()
-                    test.load_gef(f)
+                    test.load_xml(f, metadataOnly=True)
                     projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates = appendData(test, projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates)
 
                 elif testType == 'bore':
                     test = Bore()
-                    test.load_gef(f)
+                    test.load_xml(f, metadataOnly=True)
+                    projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates = appendData(test, projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates)
+
+                elif testType == 'dino':
+                    test = Bore()
+                    test.load_dino_xml13(f)
                     projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates = appendData(test, projectids, projectnames, tests, companies, geometries, xs, ys, zs, dates)
             except:
                 print(f'{f} fout in bestand')
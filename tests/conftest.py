@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+import matplotlib
+import pytest
+
+# de modules staan in de map boven tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+matplotlib.use('Agg')
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+@pytest.fixture
+def data():
+    return DATA
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # een lege werkmap met de map output, zoals de loaders en plots standaard verwachten
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output').mkdir()
+    return tmp_path
+
+@pytest.fixture
+def assert_expected():
+    # vergelijk met de uitkomst van de oorspronkelijke parsers (commit 83ed408) voor de bestanden in data, zie data/expected
+    # de data staat erin als DataFrame.to_json(orient='split'), zo is het vergelijken onafhankelijk van de pandas versie
+    def check(name, test, frame):
+        with open(os.path.join(DATA, 'expected', f'{name}.json')) as f:
+            expected = json.load(f)
+        assert {attr: getattr(test, attr, None) for attr in expected['metadata']} == expected['metadata']
+        assert json.loads(frame.to_json(orient='split')) == expected['data']
+    return check
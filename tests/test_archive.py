@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from gefxml_archive import Archive, convert
+from gefxml_reader import load
+
+TESTS = ['cpt.gef', 'cpt.xml', 'bore.gef', 'bore.xml', 'dino.xml']
+
+@pytest.fixture
+def archive(data, tmp_path):
+    archive = str(tmp_path / 'archief')
+    failed = convert([os.path.join(data, name) for name in TESTS + ['sikb.xml']], archive, batchSize=2)
+    # een SIKB bestand is een Multibore, dat kan niet in het archief
+    assert list(failed) == [os.path.join(data, 'sikb.xml')]
+    return Archive(archive)
+
+def test_metadata(data, archive):
+    metadata = archive.metadata()
+    assert list(metadata['source']) == [os.path.join(data, name) for name in TESTS]
+    assert list(metadata['type']) == ['cpt', 'cpt', 'bore', 'bore', 'bore']
+    for row in metadata.itertuples(index=False):
+        test = load(row.source)
+        assert (row.testid, row.easting, row.northing, row.groundlevel) == (test.testid, test.easting, test.northing, test.groundlevel)
+
+# de volgorde van de kolommen volgt het gezamenlijke schema van het archief, die wordt niet vergeleken
+def test_cpts_same_as_loaded(data, archive):
+    cpts = {cpt.testid: cpt for cpt in archive.cpts()}
+    for name in ['cpt.gef', 'cpt.xml']:
+        test = load(os.path.join(data, name))
+        cpt = cpts[test.testid]
+        assert (cpt.easting, cpt.northing, cpt.groundlevel, cpt.finaldepth, cpt.date) == (test.easting, test.northing, test.groundlevel, test.finaldepth, test.date)
+        pd.testing.assert_frame_equal(cpt.data, test.data.dropna(axis='columns', how='all'), check_column_type=False, check_like=True)
+
+def test_bores_same_as_loaded(data, archive):
+    bores = {bore.testid: bore for bore in archive.bores()}
+    for name in ['bore.gef', 'bore.xml', 'dino.xml']:
+        test = load(os.path.join(data, name))
+        bore = bores[test.testid]
+        assert list(bore.soillayers) == list(test.soillayers)
+        expected = test.soillayers['veld']
+        expected.columns = expected.columns.astype(str)
+        pd.testing.assert_frame_equal(bore.soillayers['veld'], expected.dropna(axis='columns', how='all'), check_column_type=False, check_like=True)
+
+def test_filters(archive):
+    # filters op de metadata, alleen de meetwaarden van de gekozen sonderingen worden gelezen
+    data = archive.cpt_data(filters=[('testid', '==', 'CPT000000012345')], columns=['depth', 'coneResistance'])
+    assert set(data['testid']) == {'CPT000000012345'}
+    assert list(data.columns) == ['testid', 'depth', 'coneResistance']
+    assert len(data) == 400
@@ -0,0 +1,131 @@
+import json
+import os
+import re
+import shutil
+from functools import partial
+
+import pandas as pd
+import pytest
+
+import gefxml_batch
+from gefxml_batch import plot_tests, write_pdf_report
+
+def copy_data(data, folder, names):
+    folder.mkdir()
+    for name in names:
+        shutil.copy(os.path.join(data, name), folder)
+    return str(folder)
+
+def test_plot_tests_output_folder(data, tmp_path, monkeypatch):
+    # alle plots komen in de opgegeven map, niets in ./output
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef', 'bore.gef'])
+
+    report = plot_tests([folder], output='out', workers=1, progress=None)
+
+    assert list(report['status']) == ['ok', 'ok'], report['error'].tolist()
+    assert sorted(os.listdir('out')) == ['B01.png', 'cpt.png']
+    assert not os.path.exists('output')
+
+@pytest.mark.skipif(not hasattr(pd.DataFrame, 'append'), reason='Cpt.interpret en Bore.from_cpt gebruiken DataFrame.append (pandas < 2)')
+def test_plot_tests_cpt_as_bore_folder(data, tmp_path, monkeypatch):
+    # de als boring geïnterpreteerde sonderingen komen in output/cptasbore
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef'])
+
+    load = gefxml_batch.load
+    def load_interpreted(*args, **kwargs):
+        test = load(*args, **kwargs)
+        test.interpret()
+        return test
+    monkeypatch.setattr(gefxml_batch, 'load', load_interpreted)
+
+    report = plot_tests([folder], output='out', interpretCpt=True, workers=1, progress=None)
+
+    assert list(report['status']) == ['ok'], report['error'].tolist()
+    assert os.listdir(os.path.join('out', 'cptasbore')) == [f'{report["testid"][0]}.png']
+    assert not os.path.exists('output')
+
+def test_plot_tests_pool_same_as_serial(data, tmp_path, monkeypatch):
+    # met een pool van processen dezelfde plots als in één proces, een fout of SIKB bestand stopt de batch niet
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef', 'bore.gef', 'cpt.xml', 'bore.xml', 'sikb.xml'])
+    (tmp_path / 'data' / 'kapot.gef').write_bytes(b'#GEFID= 1, 1, 0\n#EOH=\n')
+
+    serial = plot_tests([folder], output='serieel', workers=1, progress=None)
+    pool = plot_tests([folder], output='pool', workers=2, chunksize=1, progress=None, report='verslag.csv')
+
+    columns = ['file', 'status', 'type', 'testid']
+    serial = serial.sort_values('file').reset_index(drop=True)
+    pool = pool.sort_values('file').reset_index(drop=True)
+    pd.testing.assert_frame_equal(pool[columns], serial[columns])
+    assert list(serial['status']) == ['ok', 'ok', 'ok', 'ok', 'fout', 'overgeslagen'], serial['error'].tolist()
+    assert serial['error'][4].startswith('ValueError')
+    assert sorted(os.listdir('pool')) == sorted(os.listdir('serieel'))
+    assert len(pd.read_csv('verslag.csv', sep=';')) == 6
+    # een SIKB bestand wordt niet ingelezen en schrijft dus ook niets naar ./output
+    assert not os.path.exists('output')
+
+def test_main(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef'])
+    gefxml_batch.main([folder, '--output', 'plots', '--type', 'pdf', '--workers', '1', '--report', 'verslag.csv'])
+    assert os.listdir('plots') == ['cpt.pdf']
+    assert list(pd.read_csv('verslag.csv', sep=';')['status']) == ['ok']
+
+def pdf_pages(pdfFile):
+    with open(pdfFile, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page\b', f.read()))
+
+@pytest.mark.parametrize('index, indexRows, firstPage', [(False, 80, 1), (True, 80, 2), (True, 2, 3)])
+def test_write_pdf_report(data, tmp_path, monkeypatch, index, indexRows, firstPage):
+    # één pagina per test, ook voor een test met een fout, met het overzicht vooraan, SIKB wordt overgeslagen
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(gefxml_batch, 'INDEX_ROWS', indexRows)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef', 'bore.gef', 'sikb.xml'])
+    (tmp_path / 'data' / 'kapot.gef').write_bytes(b'#GEFID= 1, 1, 0\n#EOH=\n')
+
+    report = write_pdf_report([folder], os.path.join('rapport', 'rapport.pdf'), index=index, progress=None)
+
+    assert list(report['status']) == ['ok', 'ok', 'fout', 'overgeslagen']
+    assert list(report['page'][:3]) == [firstPage, firstPage + 1, firstPage + 2]
+    assert pdf_pages(os.path.join('rapport', 'rapport.pdf')) == firstPage + 2
+    assert not os.path.exists('output')
+
+def statuses(report):
+    return dict(zip(report['file'].map(os.path.basename), report['status']))
+
+def test_incremental(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef', 'bore.gef'])
+    run = partial(plot_tests, [folder], output='out', workers=1, progress=None, incremental=True)
+
+    assert statuses(run()) == {'bore.gef': 'ok', 'cpt.gef': 'ok'}
+    assert sorted(os.listdir('out')) == ['B01.png', 'cpt.png', 'manifest.json']
+    # zonder wijzigingen wordt niets opnieuw geplot
+    assert statuses(run()) == {'bore.gef': 'ongewijzigd', 'cpt.gef': 'ongewijzigd'}
+
+    # een gewijzigd bestand of een verwijderde plot wordt opnieuw geplot
+    with open(os.path.join(folder, 'cpt.gef'), 'ab') as f:
+        f.write(b'10.02;6.084;0.0454;0.75;0.080;9.92;!\n')
+    os.remove(os.path.join('out', 'B01.png'))
+    assert statuses(run()) == {'bore.gef': 'ok', 'cpt.gef': 'ok'}
+
+    # andere instellingen maken alles opnieuw, de plots die niet meer gemaakt worden verdwijnen
+    assert statuses(run(outputType='pdf')) == {'bore.gef': 'ok', 'cpt.gef': 'ok'}
+    assert sorted(os.listdir('out')) == ['B01.pdf', 'cpt.pdf', 'manifest.json']
+
+    # de plots van een verwijderd bestand worden verwijderd
+    os.remove(os.path.join(folder, 'bore.gef'))
+    assert statuses(run(outputType='pdf')) == {'cpt.gef': 'ongewijzigd'}
+    assert sorted(os.listdir('out')) == ['cpt.pdf', 'manifest.json']
+
+def test_incremental_retries_errors(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = copy_data(data, tmp_path / 'data', ['cpt.gef'])
+    (tmp_path / 'data' / 'kapot.gef').write_bytes(b'#GEFID= 1, 1, 0\n#EOH=\n')
+    run = partial(plot_tests, [folder], output='out', workers=1, progress=None, incremental=True)
+    assert statuses(run()) == {'cpt.gef': 'ok', 'kapot.gef': 'fout'}
+    assert statuses(run()) == {'cpt.gef': 'ongewijzigd', 'kapot.gef': 'fout'}
+    with open(os.path.join('out', 'manifest.json')) as f:
+        assert list(json.load(f)) == [os.path.abspath(os.path.join(folder, 'cpt.gef'))]
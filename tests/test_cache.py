@@ -0,0 +1,114 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import gefxml_reader
+from gefxml_cache import enable_cache, disable_cache
+from gefxml_reader import Cpt, Bore
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = enable_cache(str(tmp_path / 'cache'))
+    yield cache
+    disable_cache()
+
+def no_parsing(*args, **kwargs):
+    raise AssertionError('het bestand wordt opnieuw ingelezen')
+
+def no_xml_parsing(monkeypatch):
+    # het inlezen van XML gaat via ElementTree, iterparse, fromstring of XMLPullParser
+    monkeypatch.setattr(gefxml_reader, 'ElementTree', no_parsing)
+    for name in ['iterparse', 'fromstring', 'XMLPullParser']:
+        monkeypatch.setattr(gefxml_reader.ET, name, no_parsing)
+
+def test_cache_hit_same_as_parsed(data, cache, monkeypatch):
+    gefFile = os.path.join(data, 'cpt.gef')
+    parsed = Cpt()
+    parsed.load_gef(gefFile)
+
+    monkeypatch.setattr(gefxml_reader, 'parse_gef_data', no_parsing)
+    cpt = Cpt()
+    cpt.load_gef(gefFile)
+    pd.testing.assert_frame_equal(cpt.data, parsed.data)
+    assert (cpt.testid, cpt.easting, cpt.northing, cpt.groundlevel) == (parsed.testid, parsed.easting, parsed.northing, parsed.groundlevel)
+
+def test_release_data_after_cache_hit(data, cache, monkeypatch):
+    gefFile = os.path.join(data, 'cpt.gef')
+    Cpt().load_gef(gefFile)
+
+    monkeypatch.setattr(gefxml_reader, 'parse_gef_data', no_parsing)
+    cpt = Cpt()
+    cpt.load_gef(gefFile)
+    expected = cpt.data.copy()
+    cpt.release_data()
+    assert cpt._data is None
+    # de meetwaarden komen weer uit de cache, niet uit het bestand
+    pd.testing.assert_frame_equal(cpt.data, expected)
+
+def test_release_data_after_eviction(data, cache):
+    # staat de test niet meer in de cache, dan wordt het bestand opnieuw ingelezen
+    bore = Bore()
+    bore.load_gef(os.path.join(data, 'bore.gef'))
+    bore = Bore()
+    bore.load_gef(os.path.join(data, 'bore.gef'))
+    expected = bore.soillayers['veld'].copy()
+    cache.clear()
+    bore.release_data()
+    assert bore._soillayers is None
+    pd.testing.assert_frame_equal(bore.soillayers['veld'], expected)
+
+def test_unchanged_file_is_not_hashed_again(data, cache, tmp_path):
+    # zolang pad, grootte en wijzigingsdatum gelijk zijn, wordt de inhoud niet opnieuw gelezen
+    gefFile = str(tmp_path / 'cpt.gef')
+    shutil.copy(os.path.join(data, 'cpt.gef'), gefFile)
+    first = Cpt()
+    first.load_gef(gefFile)
+    stat = os.stat(gefFile)
+
+    with open(gefFile, 'r+b') as f:
+        content = f.read()
+        f.seek(0)
+        f.write(content.replace(b'#TESTID= ', b'#TESTID= X', 1)[:len(content)])
+    os.utime(gefFile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    unchanged = Cpt()
+    unchanged.load_gef(gefFile)
+    assert unchanged.testid == first.testid
+
+    # met een andere wijzigingsdatum wordt de inhoud wel opnieuw gelezen
+    os.utime(gefFile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    changed = Cpt()
+    changed.load_gef(gefFile)
+    assert changed.testid == f'X{first.testid}'
+
+@pytest.mark.parametrize('kind, name, loader', [(Cpt, 'cpt.xml', 'load_xml'), (Bore, 'bore.xml', 'load_xml'), (Bore, 'dino.xml', 'load_dino_xml13')])
+def test_xml_cache_hit_same_as_parsed(data, cache, monkeypatch, kind, name, loader):
+    xmlFile = os.path.join(data, name)
+    parsed = kind()
+    getattr(parsed, loader)(xmlFile)
+
+    no_xml_parsing(monkeypatch)
+    test = kind()
+    getattr(test, loader)(xmlFile)
+    frame = (lambda test: test.data) if kind is Cpt else (lambda test: test.soillayers['veld'])
+    pd.testing.assert_frame_equal(frame(test), frame(parsed))
+    assert (test.testid, test.easting, test.northing, test.groundlevel, test.finaldepth) == (parsed.testid, parsed.easting, parsed.northing, parsed.groundlevel, parsed.finaldepth)
+
+def test_arguments_in_key(data, cache, monkeypatch):
+    # met andere argumenten of als bytes is het een andere sleutel
+    gefFile = os.path.join(data, 'cpt.gef')
+    Cpt().load_gef(gefFile)
+    parsed = []
+    parse_gef_data = gefxml_reader.parse_gef_data
+    def count_parsing(*args, **kwargs):
+        parsed.append(args)
+        return parse_gef_data(*args, **kwargs)
+    monkeypatch.setattr(gefxml_reader, 'parse_gef_data', count_parsing)
+
+    Cpt().load_gef(gefFile, checkAddDepth=True)
+    with open(gefFile, 'rb') as f:
+        Cpt().load_gef(f.read())
+    assert len(parsed) == 2
+    Cpt().load_gef(gefFile, checkAddDepth=True)
+    assert len(parsed) == 2
@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gefxml_reader import Cpt, CptRecord
+
+@pytest.fixture
+def cpt(data):
+    cpt = Cpt()
+    cpt.load_gef(os.path.join(data, 'cpt.gef'))
+    return cpt
+
+def test_round_trip(cpt):
+    record = CptRecord.from_cpt(cpt)
+    assert not hasattr(record, '__dict__')
+    assert len(record) == len(cpt.data)
+    roundTrip = record.to_cpt()
+    pd.testing.assert_frame_equal(roundTrip.data, cpt.data)
+    assert (roundTrip.testid, roundTrip.easting, roundTrip.northing, roundTrip.groundlevel, roundTrip.date) == (cpt.testid, cpt.easting, cpt.northing, cpt.groundlevel, cpt.date)
+
+def test_columns_without_copy(cpt):
+    record = CptRecord.from_cpt(cpt)
+    np.testing.assert_array_equal(record['coneResistance'], cpt.data['coneResistance'])
+    assert np.shares_memory(record['coneResistance'], record.values)
+    assert np.shares_memory(record.data.to_numpy(), record.values)
+
+def test_float32(cpt):
+    record = CptRecord.from_cpt(cpt, dtype=np.float32)
+    assert record.nbytes == CptRecord.from_cpt(cpt).nbytes // 2
+    # een Cpt uit de record rekent weer in float64, de record verandert niet mee
+    roundTrip = record.to_cpt()
+    assert (roundTrip.data.dtypes == np.float64).all()
+    roundTrip.data['coneResistance'] *= 2
+    np.testing.assert_allclose(record['coneResistance'], cpt.data['coneResistance'], rtol=1e-6)
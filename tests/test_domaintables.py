@@ -0,0 +1,115 @@
+import importlib.util
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import build_domeintabellen
+from gefxml_reader import DomainTables, code2text, domainTables
+
+# de xlsx bestanden lezen vereist openpyxl, de bundel niet
+needs_openpyxl = pytest.mark.skipif(importlib.util.find_spec('openpyxl') is None, reason='openpyxl is niet geïnstalleerd')
+
+def baseline_code2text(series):
+    # zoals code2text eerder per eigenschap het xlsx bestand las
+    seriesTranslated = {}
+    for index, value in series.items():
+        try:
+            domeintabel = pd.read_excel(os.path.join(domainTables.folder, f'{index}.xlsx'))
+            translation = {k:v for (k,v) in zip(domeintabel['ID'], domeintabel['Omschrijving'])}
+            seriesTranslated[index] = translation[value]
+        except:
+            seriesTranslated[index] = value
+    return pd.Series(seriesTranslated)
+
+def layers():
+    # bekende en onbekende codes, codes als tekst, lege waarden en kolommen zonder tabel
+    return pd.DataFrame({
+        'Bodemsoort': [1, 2, 3, 99999, np.nan],
+        'Kleur': [1, 2, '3', 4, 5],
+        'BodemsoortMediaan': [1, 1, 2, 2, 3],
+        'upper': [0., 0.5, 1., 1.5, 2.],
+        'geenTabel': ['a', 'b', 'c', 'd', 'e'],
+    }, dtype=object)
+
+@needs_openpyxl
+def test_code2text_same_as_baseline():
+    frame = layers()
+    translated = code2text(frame)
+    for i, row in frame.iterrows():
+        expected = baseline_code2text(row)
+        assert translated.loc[i].tolist() == expected.tolist()
+        assert code2text(row).tolist() == expected.tolist()
+
+@needs_openpyxl
+def test_tables_read_once(monkeypatch):
+    tables = DomainTables(domainTables.folder)
+    reads = []
+    read_xlsx = DomainTables.read_xlsx
+    def counting_read_xlsx(xlsxFile):
+        reads.append(xlsxFile)
+        return read_xlsx(xlsxFile)
+    monkeypatch.setattr(DomainTables, 'read_xlsx', staticmethod(counting_read_xlsx))
+    monkeypatch.setattr(DomainTables, 'BUNDLE', 'geen_bundel.json')
+    for _ in range(3):
+        tables.translate(layers())
+    assert sorted(map(os.path.basename, reads)) == ['Bodemsoort.xlsx', 'BodemsoortMediaan.xlsx', 'Kleur.xlsx', 'geenTabel.xlsx', 'upper.xlsx']
+
+def xlsx_names(folder):
+    return sorted(name[:-len('.xlsx')] for name in os.listdir(folder) if name.endswith('.xlsx'))
+
+def no_excel(xlsxFile):
+    raise ImportError('openpyxl')
+
+def test_bundle_up_to_date():
+    # staat een tabel niet (meer) goed in de bundel, dan wordt stilletjes het xlsx bestand gelezen
+    bundle = DomainTables().bundle
+    assert sorted(bundle) == xlsx_names(domainTables.folder)
+    for name, compiled in bundle.items():
+        assert compiled['source'] == DomainTables.digest(os.path.join(domainTables.folder, f'{name}.xlsx')), name
+
+def test_translate_without_excel(monkeypatch):
+    expected = code2text(layers())
+    monkeypatch.setattr(DomainTables, 'read_xlsx', staticmethod(no_excel))
+    pd.testing.assert_frame_equal(DomainTables().translate(layers()), expected)
+
+@needs_openpyxl
+def test_bundle_same_as_xlsx():
+    tables = DomainTables()
+    for name in xlsx_names(tables.folder):
+        expected = DomainTables.read_xlsx(os.path.join(tables.folder, f'{name}.xlsx'))
+        table = tables.table(name)
+        assert table.index.tolist() == expected.index.tolist(), name
+        assert table.tolist() == expected.tolist(), name
+
+@needs_openpyxl
+def test_compile_same_as_bundle(tmp_path):
+    bundle = str(tmp_path / 'domeintabellen.json')
+    build_domeintabellen.main([domainTables.folder, '--bundle', bundle])
+    with open(bundle, encoding='utf-8') as f, open(os.path.join(domainTables.folder, DomainTables.BUNDLE), encoding='utf-8') as g:
+        assert json.load(f) == json.load(g)
+
+@needs_openpyxl
+def test_changed_xlsx_read_again(tmp_path):
+    # een gewijzigd xlsx bestand wordt gelezen in plaats van de bundel
+    folder = tmp_path / 'domeintabellen'
+    folder.mkdir()
+    shutil.copy(os.path.join(domainTables.folder, 'Kleur.xlsx'), folder)
+    DomainTables(str(folder)).compile()
+    kleur = pd.read_excel(folder / 'Kleur.xlsx')
+    kleur.loc[kleur['ID'] == 1, 'Omschrijving'] = 'spierwit'
+    kleur.to_excel(folder / 'Kleur.xlsx', index=False)
+    assert DomainTables(str(folder)).table('Kleur')[1] == 'spierwit'
+
+def test_old_bundle_not_used(tmp_path, monkeypatch):
+    folder = tmp_path / 'domeintabellen'
+    folder.mkdir()
+    with open(os.path.join(domainTables.folder, DomainTables.BUNDLE), encoding='utf-8') as f:
+        bundle = json.load(f)
+    bundle['version'] = DomainTables.BUNDLE_VERSION - 1
+    (folder / DomainTables.BUNDLE).write_text(json.dumps(bundle), encoding='utf-8')
+    monkeypatch.setattr(DomainTables, 'read_xlsx', staticmethod(no_excel))
+    assert DomainTables(str(folder)).table('Kleur') is None
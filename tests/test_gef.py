@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pytest
+
+import gefxml_reader
+from gefxml_reader import Cpt, Bore, read_gef_header, parse_gef_data
+
+def test_read_gef_header(data):
+    header = read_gef_header(os.path.join(data, 'cpt.gef'))
+    assert header.get('TESTID') == 'DKM-cpt_small.gef'
+    assert len(header.keywords['COLUMNINFO']) == 6
+    assert header.columninfo[1] == {'unit': 'MPa', 'parameter': 'Conusweerstand', 'quantitynr': '2'}
+    assert header.columnvoid == {nr: -9999. for nr in range(6)}
+    assert header.xyid == {'coordsys': '31000', 'X': '121000.00', 'Y': '487000.00', 'dx': '0.01', 'dy': '0.01'}
+    assert header.measurementtexts['2'] == 'Testproject, projectnaam'
+
+def test_read_gef_header_from_bytes(data):
+    # uit de bytes van een ingelezen bestand komt dezelfde header als uit het bestand
+    with open(os.path.join(data, 'cpt.gef'), 'rb') as f:
+        content = f.read()
+    header = read_gef_header(content)
+    assert header == read_gef_header(os.path.join(data, 'cpt.gef'))
+    assert content[header.data_offset - len(b'#EOH=\n'):header.data_offset] == b'#EOH=\n'
+
+def test_cpt_gef_same_as_baseline(data, assert_expected):
+    cpt = Cpt()
+    cpt.load_gef(os.path.join(data, 'cpt.gef'), checkAddFrictionRatio=True, checkAddDepth=True)
+    assert_expected('cpt.gef', cpt, cpt.data)
+
+def test_bore_gef_same_as_baseline(data, assert_expected):
+    bore = Bore()
+    bore.load_gef(os.path.join(data, 'bore.gef'))
+    assert_expected('bore.gef', bore, bore.soillayers['veld'])
+
+def crlf_copy(data, name, folder):
+    # hetzelfde bestand met Windows regeleinden
+    gefFile = os.path.join(folder, name)
+    with open(os.path.join(data, name), 'rb') as f:
+        content = f.read().replace(b'\n', b'\r\n')
+    with open(gefFile, 'wb') as f:
+        f.write(content)
+    return gefFile
+
+def test_crlf_same_as_baseline(data, assert_expected, tmp_path):
+    # het datablok begint na de regel met #EOH, ook met \r\n als regeleinde
+    cpt = Cpt()
+    cpt.load_gef(crlf_copy(data, 'cpt.gef', tmp_path), checkAddFrictionRatio=True, checkAddDepth=True)
+    assert_expected('cpt.gef', cpt, cpt.data)
+    bore = Bore()
+    bore.load_gef(crlf_copy(data, 'bore.gef', tmp_path))
+    assert_expected('bore.gef', bore, bore.soillayers['veld'])
+
+def test_data_offset_skips_eoh_in_comment():
+    # alleen een #EOH aan het begin van een regel sluit de header af
+    content = b'#GEFID= 1, 1, 0\n#COMMENT= tot #EOH= gelezen\n#EOH=\n0.02;5.377;!\n'
+    header = read_gef_header(content)
+    assert content[header.data_offset:] == b'0.02;5.377;!\n'
+    assert header.comments == ['tot #EOH= gelezen']
+
+def test_data_offset_without_data(tmp_path):
+    # zonder datablok staat de offset aan het eind van het bestand
+    gefFile = tmp_path / 'cpt.gef'
+    gefFile.write_bytes(b'#GEFID= 1, 1, 0\n#TESTID= leeg\n#EOH=')
+    assert read_gef_header(str(gefFile)).data_offset == os.path.getsize(gefFile)
+    assert read_gef_header(gefFile.read_bytes()).data_offset == os.path.getsize(gefFile)
+
+def space_copy(data, folder):
+    # dezelfde sondering zonder #COLUMNSEPARATOR, de kolommen gescheiden door spaties
+    with open(os.path.join(data, 'cpt.gef'), 'rb') as f:
+        header, eoh, block = f.read().replace(b'#COLUMNSEPARATOR= ;\n', b'').partition(b'#EOH=\n')
+    gefFile = os.path.join(folder, 'cpt.gef')
+    with open(gefFile, 'wb') as f:
+        f.write(header + eoh + block.replace(b';', b' '))
+    return gefFile
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+@pytest.mark.parametrize('separator', ['semicolon', 'space'])
+def test_numpy_parser_same_as_baseline(data, assert_expected, tmp_path, monkeypatch, loadtxt, separator):
+    # beide manieren van inlezen (numpy >= 1.23 en ouder) geven hetzelfde als de oorspronkelijke parser
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    gefFile = os.path.join(data, 'cpt.gef') if separator == 'semicolon' else space_copy(data, tmp_path)
+    cpt = Cpt()
+    cpt.load_gef(gefFile, checkAddFrictionRatio=True, checkAddDepth=True)
+    assert_expected('cpt.gef', cpt, cpt.data)
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+def test_parse_gef_data(data, monkeypatch, loadtxt):
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    with open(os.path.join(data, 'cpt.gef'), 'rb') as f:
+        content = f.read()
+    header = read_gef_header(content)
+    values = parse_gef_data(content, header.data_offset, header.columnseparator, header.recordseparator, header.columnvoid, dtype=np.float32)
+    assert values.shape == (500, 6)
+    assert values.dtype == np.float32
+    # de dummy waarde -9999 is nan geworden
+    assert np.isnan(values[5, 1])
+    np.testing.assert_allclose(values[0], [0.02, 5.377, 0.0759, 1.41, 0.159, 0.02], rtol=1e-6)
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+def test_parse_gef_data_not_numeric(monkeypatch, loadtxt):
+    # een blok dat niet netjes numeriek is geeft een ValueError, dan leest pandas het in
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    content = b'#EOH=\n0.02;5.377;!\n0.04;;4.604;!\n'
+    with pytest.raises(ValueError):
+        parse_gef_data(content, len(b'#EOH=\n'), ';', '!')
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+def test_parse_gef_data_empty(monkeypatch, loadtxt):
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    for content in [b'', b'#EOH=\n\n']:
+        with pytest.raises(ValueError, match='geen data gevonden na #EOH'):
+            parse_gef_data(content, len(content))
+
+def test_empty_gef(tmp_path):
+    # van een leeg bestand kan geen mmap gemaakt worden, het gaat dan net zo mis als zonder datablok
+    emptyFile = tmp_path / 'leeg.gef'
+    emptyFile.write_bytes(b'')
+    withoutData = tmp_path / 'cpt.gef'
+    withoutData.write_bytes(b'#GEFID= 1, 1, 0\n#TESTID= leeg\n#EOH=')
+    with pytest.raises(ValueError) as expected:
+        Cpt().load_gef(str(withoutData))
+    with pytest.raises(type(expected.value), match=str(expected.value)):
+        Cpt().load_gef(str(emptyFile))
@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+
+from gefxml_reader import Cpt, Bore
+
+@pytest.mark.parametrize('name, loader', [('cpt.gef', 'load_gef'), ('cpt.xml', 'load_xml')])
+def test_lazy_cpt_same_as_eager(data, name, loader):
+    eager = Cpt()
+    getattr(eager, loader)(os.path.join(data, name), checkAddFrictionRatio=True, checkAddDepth=True)
+    lazy = Cpt()
+    getattr(lazy, loader)(os.path.join(data, name), checkAddFrictionRatio=True, checkAddDepth=True, lazy=True)
+    assert lazy._data is None
+    pd.testing.assert_frame_equal(lazy.data, eager.data)
+    assert (lazy.testid, lazy.finaldepth) == (eager.testid, eager.finaldepth)
+
+@pytest.mark.parametrize('name, loader', [('bore.gef', 'load_gef'), ('bore.xml', 'load_xml')])
+def test_lazy_bore_same_as_eager(data, name, loader):
+    eager = Bore()
+    getattr(eager, loader)(os.path.join(data, name))
+    lazy = Bore()
+    getattr(lazy, loader)(os.path.join(data, name), lazy=True)
+    assert lazy._soillayers is None
+    pd.testing.assert_frame_equal(lazy.soillayers['veld'], eager.soillayers['veld'])
+
+def test_release_data(data):
+    # na release_data wordt de data bij het volgende gebruik opnieuw ingelezen
+    cpt = Cpt()
+    cpt.load_gef(os.path.join(data, 'cpt.gef'))
+    expected = cpt.data.copy()
+    cpt.release_data()
+    assert cpt._data is None
+    pd.testing.assert_frame_equal(cpt.data, expected)
+
+def test_repr_does_not_parse(data):
+    cpt = Cpt()
+    cpt.load_gef(os.path.join(data, 'cpt.gef'), lazy=True)
+    repr(cpt)
+    assert cpt._data is None
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import gefxml_reader
+from gefxml_reader import Cpt, Bore, Multibore, load, read_gef_header, sniff
+
+SNIFFED = {
+    'cpt.gef': ('gef', 'cpt', '1.1.0', None),
+    'bore.gef': ('gef', 'bore', '1.1.0', None),
+    'cpt.xml': ('xml', 'cpt', '1.1', 'dispatchDataResponse'),
+    'bore.xml': ('xml', 'bore', '2.1', 'dispatchDataResponse'),
+    'dino.xml': ('xml', 'dino', None, 'dinoloket'),
+    'sikb.xml': ('xml', 'sikb', None, 'FeatureCollectionIMSIKB0101'),
+}
+
+@pytest.mark.parametrize('name', SNIFFED)
+def test_sniff(data, name):
+    result = sniff(os.path.join(data, name))
+    assert (result.format, result.kind, result.version, result.root) == SNIFFED[name]
+    with open(os.path.join(data, name), 'rb') as f:
+        assert sniff(f.read()) == result
+
+@pytest.mark.parametrize('name', SNIFFED)
+def test_type_same_as_baseline(data, name):
+    # zoals de oorspronkelijke type_from_gef en type_from_xml, alleen DINO is nu 'dino' in plaats van 'bore'
+    if name.endswith('.gef'):
+        kind = gefxml_reader.Test().type_from_gef(os.path.join(data, name))
+    else:
+        kind = gefxml_reader.Test().type_from_xml(os.path.join(data, name))
+    assert kind == {'cpt.gef': 'cpt', 'bore.gef': 'bore', 'cpt.xml': 'cpt', 'bore.xml': 'bore', 'dino.xml': 'dino', 'sikb.xml': 'sikb'}[name]
+
+@pytest.mark.parametrize('name', ['cpt.xml', 'bore.xml', 'sikb.xml'])
+def test_sniff_reads_only_the_start(data, tmp_path, name):
+    # alles na de eerste bytes wordt niet gelezen, ook niet als het geen geldige XML is
+    with open(os.path.join(data, name), 'rb') as f:
+        head = f.read(2048)
+    xmlFile = tmp_path / name
+    xmlFile.write_bytes(head + b'<<< geen xml >>>')
+    assert sniff(str(xmlFile), size=2048).kind == SNIFFED[name][1]
+
+def test_sniff_gef_header_longer_than_size(data):
+    # staat #EOH niet in de eerste bytes, dan wordt de header verder gelezen
+    result = sniff(os.path.join(data, 'cpt.gef'), size=100)
+    assert result.kind == 'cpt'
+    assert result.header == read_gef_header(os.path.join(data, 'cpt.gef'))
+
+def test_sniff_gef_without_gefid():
+    result = sniff(b'#PROCEDURECODE= GEF-CPT-Report, 1, 1, 2\n#EOH=\n0.02;5.377;!\n')
+    assert (result.format, result.kind, result.version) == ('gef', 'cpt', None)
+
+@pytest.mark.parametrize('name, kind', [('cpt.gef', Cpt), ('cpt.xml', Cpt), ('bore.gef', Bore), ('bore.xml', Bore), ('dino.xml', Bore)])
+def test_load_same_as_baseline(data, assert_expected, monkeypatch, name, kind):
+    # het bestand wordt één keer geopend, daarna worden de bytes gebruikt
+    opened = []
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return open(*args, **kwargs)
+    monkeypatch.setattr(gefxml_reader, 'open', counting_open, raising=False)
+
+    test = load(os.path.join(data, name), checkAddFrictionRatio=True, checkAddDepth=True)
+    assert opened == [os.path.join(data, name)]
+    assert type(test) is kind
+    assert test.filename == name.split('.')[0]
+    assert_expected(name, test, test.data if kind is Cpt else test.soillayers['veld'])
+
+def test_load_metadata_only(data):
+    cpt = load(os.path.join(data, 'cpt.xml'), metadataOnly=True)
+    assert (cpt.testid, cpt._data) == ('CPT000000012345', None)
+    bore = load(os.path.join(data, 'bore.gef'), metadataOnly=True)
+    assert (bore.testid, bore._soillayers) == ('B01', {})
+
+def test_load_sikb(data, workdir):
+    multibore = load(os.path.join(data, 'sikb.xml'), projectName='test')
+    expected = Multibore()
+    expected.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'test')
+    assert type(multibore) is Multibore
+    assert [bore.testid for bore in multibore.bores] == [bore.testid for bore in expected.bores]
+    assert multibore.errors == expected.errors
+
+def test_load_unknown_gef():
+    with pytest.raises(ValueError, match='onbekend soort GEF'):
+        load(b'#GEFID= 1, 1, 0\n#REPORTCODE= GEF-DISS-Report, 1, 0, 0\n#EOH=\n0.02;5.377;!\n')
@@ -0,0 +1,44 @@
+import json
+import os
+
+import pytest
+
+import gefxml_reader
+from gefxml_reader import Cpt, Bore
+
+TESTS = [(Cpt, 'cpt.gef', 'load_gef'), (Cpt, 'cpt.xml', 'load_xml'), (Bore, 'bore.gef', 'load_gef'), (Bore, 'bore.xml', 'load_xml')]
+
+def no_parsing(*args, **kwargs):
+    raise AssertionError('de data wordt ingelezen')
+
+@pytest.mark.parametrize('kind, name, loader', TESTS, ids=[name for _, name, _ in TESTS])
+def test_metadata_same_as_baseline(data, monkeypatch, kind, name, loader):
+    # zonder data is de einddiepte van een GEF onbekend of komt die uit de header, de rest is hetzelfde
+    monkeypatch.setattr(gefxml_reader, 'parse_gef_data', no_parsing)
+    monkeypatch.setattr(gefxml_reader, 'decode_bro_values', no_parsing)
+    test = kind()
+    getattr(test, loader)(os.path.join(data, name), metadataOnly=True)
+    with open(os.path.join(data, 'expected', f'{name}.json')) as f:
+        expected = json.load(f)['metadata']
+    if name.endswith('.gef'):
+        del expected['finaldepth']
+    assert {attr: getattr(test, attr) for attr in expected} == expected
+
+def test_gef_cpt_finaldepth_from_header(data):
+    cpt = Cpt()
+    cpt.load_gef(os.path.join(data, 'cpt.gef'), metadataOnly=True)
+    assert cpt.finaldepth == 10.
+
+@pytest.mark.parametrize('kind, name, stopTag', [(Cpt, 'cpt.xml', b'conePenetrationTest>'), (Bore, 'bore.xml', b'descriptiveBoreholeLog>')])
+def test_xml_metadata_stops_before_data(data, tmp_path, kind, name, stopTag):
+    # de XML wordt niet verder gelezen dan het begin van de metingen of lagen, een afgebroken bestand is dus genoeg
+    with open(os.path.join(data, name), 'rb') as f:
+        content = f.read()
+    xmlFile = tmp_path / name
+    xmlFile.write_bytes(content[:content.index(stopTag) + len(stopTag)])
+
+    test = kind()
+    test.load_xml(str(xmlFile), metadataOnly=True)
+    full = kind()
+    full.load_xml(os.path.join(data, name))
+    assert (test.testid, test.easting, test.northing, test.groundlevel, test.date) == (full.testid, full.easting, full.northing, full.groundlevel, full.date)
@@ -0,0 +1,131 @@
+import os
+from io import BytesIO
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import pyplot as plt
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+from matplotlib.patches import Rectangle
+
+from gefxml_reader import decimate_minmax, load
+
+def thin_layers(bore, thickness=0.05, nrOfLayers=40):
+    # veel dunne lagen, waarvan de beschrijvingen over elkaar heen vallen
+    layers = pd.concat([bore.soillayers['veld']] * (nrOfLayers // len(bore.soillayers['veld'])), ignore_index=True)
+    layers['upper'] = np.arange(len(layers)) * thickness
+    layers['lower'] = layers['upper'] + thickness
+    layers['upper_NAP'] = bore.groundlevel - layers['upper']
+    layers['lower_NAP'] = bore.groundlevel - layers['lower']
+    bore.soillayers['veld'] = layers
+    bore.finaldepth = layers['lower'].max()
+    return bore
+
+def test_bore_plot_keeps_every_description(data):
+    bore = thin_layers(load(os.path.join(data, 'bore.gef')))
+    fig = bore.make_figure()
+    soilNames = set(bore.soillayers['veld']['soilName'])
+    descriptions = [text for ax in fig.axes for text in ax.texts if text.get_text().split(',')[0] in soilNames]
+    assert len(descriptions) == len(bore.soillayers['veld'])
+
+def pixels(png):
+    return imread(BytesIO(png), format='png')
+
+def test_reused_cpt_figure_same_as_new(data):
+    # een hergebruikte figuur met de data van een andere sondering geeft precies dezelfde plot als een nieuwe figuur
+    cpts = [load(os.path.join(data, name)) for name in ['cpt.gef', 'cpt.xml']]
+    new = [pixels(cpt.render(reuseFigure=False)) for cpt in cpts]
+    for cpt, expected in zip(cpts + cpts, new + new):
+        np.testing.assert_array_equal(pixels(cpt.render(reuseFigure=True)), expected)
+
+COLORS = {0: "orange", 1: "yellow", 2: "green", 3: "", 4: "brown", 5: "grey", 6: "black"}
+HATCHES = {0: "ooo", 1: "...", 2: "///", 3:"", 4: "---", 5: "|||", 6: ""}
+
+def baseline_soilcolumn(ax, soillayers):
+    # de boorstaat zoals die eerder met een barh per component werd getekend
+    for upper, lower, component in reversed(list(zip(soillayers["upper_NAP"], soillayers["lower_NAP"], soillayers["components"]))):
+        left = 0
+        try:
+            for comp, nr in component.items():
+                ax.barh(lower, width=comp, left=left, height=upper-lower, color=COLORS[nr], hatch=HATCHES[nr], edgecolor="black", align="edge")
+                left += comp
+        except:
+            pass
+
+def rectangles(ax):
+    # per kleur en arcering de (links, onder, rechts, boven) van alle balken
+    rectangles = {}
+    for patch in ax.patches:
+        if isinstance(patch, Rectangle):
+            bars = [[patch.get_x(), patch.get_y(), patch.get_x() + patch.get_width(), patch.get_y() + patch.get_height()]]
+        else:
+            # een pad met alle balken, iedere balk is vier hoekpunten en een punt om te sluiten
+            corners = patch.get_path().vertices.reshape(-1, 5, 2)[:, :4]
+            bars = np.column_stack([corners.min(axis=1), corners.max(axis=1)])
+        key = (to_rgba(patch.get_facecolor()), patch.get_hatch())
+        rectangles.setdefault(key, []).extend(tuple(np.round(bar, 9)) for bar in bars)
+    return {key: sorted(value) for key, value in rectangles.items()}
+
+@pytest.mark.parametrize('name', ['bore.gef', 'bore.xml', 'dino.xml'])
+def test_soilcolumn_same_as_barh(data, name):
+    # dezelfde balken, kleuren, arceringen en grenzen van de as als met barh
+    bore = load(os.path.join(data, name))
+    soillayers = bore.soillayers['veld']
+    fig = Figure()
+    expected, ax = fig.subplots(1, 2)
+    baseline_soilcolumn(expected, soillayers)
+    bore.plot_soilcolumn(ax, soillayers, COLORS, HATCHES)
+    assert len(rectangles(ax)) > 0
+    assert rectangles(ax) == rectangles(expected)
+    assert ax.get_xlim() == expected.get_xlim()
+    assert ax.get_ylim() == expected.get_ylim()
+
+def test_decimate_minmax():
+    # per rij blijven het eerste, laatste, kleinste en grootste punt over, in de oorspronkelijke volgorde, nan blijft staan
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 30, 1000)
+    x[[100, 101, 500]] = np.nan
+    y = -np.arange(1000) * 0.001
+    rows = np.floor(np.arange(1000) / 10)
+    xKeep, yKeep = decimate_minmax(x, y, rows)
+    assert len(xKeep) < len(x) / 2
+    assert np.all(np.diff(yKeep) < 0)
+    assert np.isnan(xKeep).sum() == 3
+    for row in np.unique(rows):
+        inRow = (rows == row) & ~np.isnan(x)
+        kept = np.isin(y, yKeep) & inRow
+        assert np.nanmin(x[kept]) == np.nanmin(x[inRow]) and np.nanmax(x[kept]) == np.nanmax(x[inRow])
+        assert kept[np.flatnonzero(inRow)[[0, -1]]].all()
+
+def test_decimated_plot_same_as_full(data):
+    # een sondering met minder punten dan pixelrijen blijft gelijk
+    cpt = load(os.path.join(data, 'cpt.gef'))
+    np.testing.assert_array_equal(pixels(cpt.render(decimate=True)), pixels(cpt.render()))
+
+    # een dichte sondering, uitgedund tot de resolutie van de png, verschilt alleen in de anti-aliasing van de randen
+    depth = np.arange(1, 20001) * 0.0005
+    cpt.data = pd.DataFrame({'penetrationLength': depth, 'depth': depth, 'coneResistance': 10 + 5 * np.sin(depth), 'localFriction': 0.1 + 0.05 * np.sin(depth * 3),
+                             'frictionRatio': 2 + np.sin(depth * 2), 'porePressureU2': 0.1 * depth})
+    full = pixels(cpt.render())
+    decimated = pixels(cpt.render(decimate=True))
+    assert np.abs(full - decimated).max() < 0.2
+
+def test_render_in_threads(data):
+    # zonder pyplot is er geen gedeelde toestand, in threads komen dezelfde plots als na elkaar
+    tests = [load(os.path.join(data, name)) for name in ['cpt.gef', 'cpt.xml', 'bore.gef', 'bore.xml']] * 2
+    expected = [pixels(test.render()) for test in tests]
+    with ThreadPool(4) as pool:
+        rendered = pool.map(lambda test: test.render(), tests)
+    for png, pixelsExpected in zip(rendered, expected):
+        np.testing.assert_array_equal(pixels(png), pixelsExpected)
+    assert plt.get_fignums() == []
+
+def test_render_to_file(data, tmp_path):
+    bore = load(os.path.join(data, 'bore.gef'))
+    pngFile = tmp_path / 'bore.png'
+    with open(pngFile, 'wb') as f:
+        bore.render(file=f)
+    np.testing.assert_array_equal(pixels(pngFile.read_bytes()), pixels(bore.render()))
@@ -0,0 +1,135 @@
+import json
+import os
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from gefxml_reader import Multibore, SikbIndex, iter_sikb0101
+
+NAMESPACES = 'xmlns:imsikb0101="http://www.sikb.nl/imsikb0101" xmlns:immetingen="http://www.sikb.nl/immetingen" xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:xlink="http://www.w3.org/1999/xlink"'
+
+def member(feature):
+    return f'<imsikb0101:featureMember>{feature}</imsikb0101:featureMember>'
+
+def depth(kind, value):
+    return f'<immetingen:{kind}><immetingen:value uom="urn:immetingen:Eenheid:id:19">{value}</immetingen:value></immetingen:{kind}>'
+
+def bore_features(nr):
+    # een boring met een laag en een filter, de analyse staat voor het monster, dus het monster is het laatste feature
+    bh = f'BH{nr}'
+    return [
+        member(f'<imsikb0101:Borehole gml:id="{bh}"><immetingen:name>B{nr}</immetingen:name>'
+               f'<imsikb0101:groundLevel><immetingen:value uom="urn:immetingen:Eenheid:id:19">100</immetingen:value></imsikb0101:groundLevel>'
+               f'<immetingen:relatedSamplingFeature xlink:href="#{bh}L0"/><immetingen:relatedSamplingFeature xlink:href="#{bh}F0"/></imsikb0101:Borehole>'),
+        member(f'<imsikb0101:Layer gml:id="{bh}L0">{depth("upperDepth", 0)}{depth("lowerDepth", 50)}<immetingen:relatedObservation xlink:href="#{bh}L0C0"/></imsikb0101:Layer>'),
+        member(f'<immetingen:Characteristic gml:id="{bh}L0C0"><immetingen:alphanumericValue>urn:immetingen:Grondsoort:id:1</immetingen:alphanumericValue></immetingen:Characteristic>'),
+        member(f'<imsikb0101:Filter gml:id="{bh}F0">{depth("upperDepth", 100)}{depth("lowerDepth", 200)}<immetingen:relatedSamplingFeature xlink:href="#{bh}S0"/></imsikb0101:Filter>'),
+        member(f'<immetingen:Analysis gml:id="{bh}A0"><immetingen:parameter>urn:immetingen:parameter:id:100</immetingen:parameter></immetingen:Analysis>'),
+        member(f'<imsikb0101:Sample gml:id="{bh}S0"><immetingen:relatedObservation xlink:href="#{bh}A0"/></imsikb0101:Sample>'),
+    ]
+
+def sikb_xml(nrOfBores):
+    features = [feature for nr in range(nrOfBores) for feature in bore_features(nr)]
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<imsikb0101:FeatureCollectionIMSIKB0101 {NAMESPACES}>{"".join(features)}</imsikb0101:FeatureCollectionIMSIKB0101>'.encode('utf-8')
+
+def test_stream_yields_bore_that_ends_on_sample():
+    # een boring komt zodra het laatste feature (hier een monster) is ingelezen, niet pas aan het eind van het bestand
+    index = SikbIndex()
+    openBores = []
+    for boreId in index.stream(BytesIO(sikb_xml(3))):
+        openBores.append((boreId, sorted(index.boreXYZ)))
+        index.discard(boreId)
+    assert openBores == [('BH0', ['BH0']), ('BH1', ['BH1']), ('BH2', ['BH2'])]
+
+def test_stream_keeps_only_relations(data):
+    index = SikbIndex()
+    for boreId in index.stream(os.path.join(data, 'sikb.xml')):
+        index.discard(boreId)
+    for table in [index.properties, index.observations, index.uppers, index.lowers, index.boreXYZ, index.members, index.parts]:
+        assert len(table) == 0
+
+def test_iter_sikb0101_same_as_load(data, workdir):
+    multibore = Multibore()
+    multibore.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'test')
+    errors = {}
+    bores = {bore.testid: bore for bore in iter_sikb0101(os.path.join(data, 'sikb.xml'), batchSize=2, errors=errors)}
+
+    assert errors == multibore.errors
+    assert sorted(bores) == sorted(bore.testid for bore in multibore.bores)
+    for bore in multibore.bores:
+        streamed = bores[bore.testid]
+        assert (streamed.easting, streamed.northing, streamed.groundlevel, streamed.finaldepth) == (bore.easting, bore.northing, bore.groundlevel, bore.finaldepth)
+        pd.testing.assert_frame_equal(streamed.soillayers['veld'], bore.soillayers['veld'])
+
+def test_iter_sikb0101_errors(data):
+    # zonder errors stopt een boring met een fout het lezen, met de id van de boring in de melding
+    errors = {}
+    list(iter_sikb0101(os.path.join(data, 'sikb.xml'), errors=errors))
+    assert len(errors) > 0
+    boreId = next(iter(errors))
+    with pytest.raises(ValueError, match=f'boring {boreId}: '):
+        list(iter_sikb0101(os.path.join(data, 'sikb.xml')))
+
+def test_load_xml_sikb0101_same_as_baseline(data, workdir):
+    # de boringen en lagen zoals de oorspronkelijke parser ze gaf, de boringen die daar mislukten staan nu in errors
+    multibore = Multibore()
+    multibore.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'test')
+    with open(os.path.join(data, 'expected', 'sikb.xml.json')) as f:
+        expected = json.load(f)['bores']
+    assert len(multibore.bores) == len(expected)
+    for bore, expectedBore in zip(multibore.bores, expected):
+        assert {attr: getattr(bore, attr) for attr in expectedBore['metadata']} == expectedBore['metadata']
+        assert json.loads(bore.soillayers['veld'].to_json(orient='split')) == expectedBore['data']
+    assert sorted(multibore.errors) == ['BH5', 'BH6', 'BH7']
+    assert os.path.exists(os.path.join('output', 'test', 'sikb.csv'))
+
+def test_load_xml_sikb0101_from_string(data, workdir):
+    multibore = Multibore()
+    multibore.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'test')
+    with open(os.path.join(data, 'sikb.xml'), encoding='utf-8') as f:
+        fromString = Multibore()
+        fromString.load_xml_sikb0101(f.read(), 'test', fromFile=False, fileName='sikb')
+    assert [bore.testid for bore in fromString.bores] == [bore.testid for bore in multibore.bores]
+    for bore, expected in zip(fromString.bores, multibore.bores):
+        pd.testing.assert_frame_equal(bore.soillayers['veld'], expected.soillayers['veld'])
+
+@pytest.mark.parametrize('batchSize', [1, 3, 100])
+def test_iter_sikb0101_same_as_baseline(data, batchSize):
+    # de volgorde kan anders zijn, de boringen zijn dezelfde als bij de oorspronkelijke parser
+    with open(os.path.join(data, 'expected', 'sikb.xml.json')) as f:
+        expected = {bore['metadata']['testid']: bore for bore in json.load(f)['bores']}
+    errors = {}
+    bores = {bore.testid: bore for bore in iter_sikb0101(os.path.join(data, 'sikb.xml'), batchSize=batchSize, errors=errors)}
+    assert sorted(bores) == sorted(expected)
+    for testid, bore in bores.items():
+        assert {attr: getattr(bore, attr) for attr in expected[testid]['metadata']} == expected[testid]['metadata']
+        assert json.loads(bore.soillayers['veld'].to_json(orient='split')) == expected[testid]['data']
+    assert sorted(errors) == ['BH5', 'BH6', 'BH7']
+
+@pytest.mark.parametrize('poolType, chunksize', [('thread', None), ('thread', 1), ('process', None), ('process', 3)])
+def test_load_xml_sikb0101_pool_same_as_serial(data, workdir, poolType, chunksize):
+    # in een pool komen dezelfde boringen, in dezelfde volgorde, met dezelfde fouten en uitvoer als zonder pool
+    serial = Multibore()
+    serial.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'serieel')
+    pooled = Multibore()
+    pooled.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'pool', workers=2, poolType=poolType, chunksize=chunksize)
+    assert [bore.testid for bore in pooled.bores] == [bore.testid for bore in serial.bores]
+    for bore, expected in zip(pooled.bores, serial.bores):
+        assert (bore.easting, bore.northing, bore.groundlevel) == (expected.easting, expected.northing, expected.groundlevel)
+        pd.testing.assert_frame_equal(bore.soillayers['veld'], expected.soillayers['veld'])
+    assert pooled.errors == serial.errors
+    assert sorted(os.listdir(os.path.join('output', 'pool', 'sikb'))) == sorted(os.listdir(os.path.join('output', 'serieel', 'sikb')))
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join('output', 'pool', 'sikb.csv'), sep=';'), pd.read_csv(os.path.join('output', 'serieel', 'sikb.csv'), sep=';'))
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_xml_sikb0101_progress(data, workdir, capsys, workers):
+    # de voortgang gaat naar progress, er wordt niets geprint
+    calls = []
+    multibore = Multibore()
+    multibore.load_xml_sikb0101(os.path.join(data, 'sikb.xml'), 'test', workers=workers, poolType='thread', progress=lambda nr, total, result: calls.append((nr, total, result['boreId'])))
+    assert capsys.readouterr().out == ''
+    assert [nr for nr, total, boreId in calls] == list(range(1, len(calls) + 1))
+    assert {total for nr, total, boreId in calls} == {len(calls)}
+    assert len(calls) == len(multibore.bores) + len(multibore.errors)
+    assert set(multibore.errors) <= {boreId for nr, total, boreId in calls}
@@ -0,0 +1,114 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import gefxml_reader
+from gefxml_reader import Cpt, Bore, BRO_CPT_COLUMNS, decode_bro_values, element_texts, localname, tag_kind
+
+REMOVED_LAYER = '<removedLayer>\n    <cptcommon:sequenceNumber>1</cptcommon:sequenceNumber>\n    <cptcommon:upperBoundary>0.0</cptcommon:upperBoundary>\n    <cptcommon:description>zand\n     met puin</cptcommon:description>\n</removedLayer>'
+
+def read_text(data, name):
+    with open(os.path.join(data, name), encoding='utf-8') as f:
+        return f.read()
+
+def test_cpt_xml_same_as_baseline(data, assert_expected):
+    # de values van de dissipatietest na de sondering horen niet bij de meetwaarden
+    cpt = Cpt()
+    cpt.load_xml(os.path.join(data, 'cpt.xml'), checkAddFrictionRatio=True, checkAddDepth=True)
+    assert_expected('cpt.xml', cpt, cpt.data)
+    assert cpt.filename == 'cpt'
+
+@pytest.mark.parametrize('encode', [False, True], ids=['str', 'bytes'])
+def test_cpt_xml_from_string(data, assert_expected, encode):
+    xml = read_text(data, 'cpt.xml')
+    cpt = Cpt()
+    cpt.load_xml(xml.encode('utf-8') if encode else xml, checkAddFrictionRatio=True, checkAddDepth=True, fromFile=False)
+    assert_expected('cpt.xml', cpt, cpt.data)
+
+def test_cpt_xml_removed_layers(data, tmp_path):
+    # de elementen binnen removedLayer worden pas leeggemaakt als removedLayer zelf gelezen is
+    xml = read_text(data, 'cpt.xml').replace('</cptcommon:conePenetrationTest>', f'</cptcommon:conePenetrationTest>{REMOVED_LAYER}', 1)
+    cpt = Cpt()
+    cpt.load_xml(xml, fromFile=False)
+    assert cpt.removedlayers == {'removedLayer': '', 'sequenceNumber': '1', 'upperBoundary': '0.0', 'description': 'zandmet puin'}
+
+def test_bore_xml_same_as_baseline(data, assert_expected):
+    bore = Bore()
+    bore.load_xml(os.path.join(data, 'bore.xml'))
+    assert_expected('bore.xml', bore, bore.soillayers['veld'])
+
+def test_dino_xml_same_as_baseline(data, assert_expected):
+    bore = Bore()
+    bore.load_dino_xml13(os.path.join(data, 'dino.xml'))
+    assert_expected('dino.xml', bore, bore.soillayers['veld'])
+
+@pytest.mark.parametrize('kind, name, prefix', [(Cpt, 'cpt.xml', 'cptcommon'), (Bore, 'bore.xml', 'bhrgtcom')])
+def test_other_namespace_prefix(data, assert_expected, kind, name, prefix):
+    # de elementen worden op naam zonder namespace herkend, het voorvoegsel maakt niet uit
+    xml = read_text(data, name).replace(f'{prefix}:', 'x:').replace(f'xmlns:{prefix}=', 'xmlns:x=')
+    test = kind()
+    if kind is Cpt:
+        test.load_xml(xml, checkAddFrictionRatio=True, checkAddDepth=True, fromFile=False)
+        assert_expected(name, test, test.data)
+    else:
+        test.load_xml(xml, fromFile=False)
+        assert_expected(name, test, test.soillayers['veld'])
+
+@pytest.mark.parametrize('name', ['cpt.xml', 'bore.xml', 'sikb.xml'])
+def test_element_texts_same_as_regex(data, name):
+    # zoals de teksten eerder met re.sub werden bepaald
+    root = ET.parse(os.path.join(data, name)).getroot()
+    for element in root.iter():
+        assert localname(element.tag) == re.sub(r'{.*}', '', element.tag)
+        assert element_texts(element) == {re.sub(r'{.*}', '', p.tag): re.sub(r'\n\s*', '', p.text) for p in element.iter() if p.text is not None}
+        assert element_texts(element, removeWhitespace=True) == {re.sub(r'{.*}', '', p.tag): re.sub(r'\s*', '', p.text) for p in element.iter() if p.text is not None}
+
+def test_tag_kind():
+    kinds = ('Borehole', 'reportNumber', 'featureMember')
+    assert tag_kind('{http://www.sikb.nl/imsikb0101}Borehole', kinds) == 'Borehole'
+    assert tag_kind('{http://www.sikb.nl/imsikb0101}featureMember', kinds) == 'featureMember'
+    assert tag_kind('{http://www.sikb.nl/imsikb0101}Layer', kinds) is None
+
+def cpt_values(data):
+    # de tekst met meetwaarden van de sondering, zonder die van de dissipatietest
+    root = ET.parse(os.path.join(data, 'cpt.xml')).getroot()
+    return next(element for element in root.iter() if localname(element.tag) == 'conePenetrationTest').find('.//{*}values').text
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+def test_decode_bro_values_same_as_pandas(data, monkeypatch, loadtxt):
+    # zoals de values eerder met pandas werden ingelezen
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    values = cpt_values(data)
+    expected = pd.read_csv(StringIO(values), names=BRO_CPT_COLUMNS, sep=",", lineterminator=';')
+    expected.replace(-999999, np.nan, inplace=True)
+    np.testing.assert_array_equal(decode_bro_values(values), expected.to_numpy())
+    columns = ['depth', 'coneResistance', 'frictionRatio']
+    np.testing.assert_array_equal(decode_bro_values(values, columns), expected[columns].to_numpy())
+    np.testing.assert_array_equal(decode_bro_values(values, columns, np.float32), expected[columns].to_numpy(np.float32))
+
+@pytest.mark.parametrize('loadtxt', [True, False], ids=['loadtxt', 'fromstring'])
+def test_decode_bro_values_not_numeric(monkeypatch, loadtxt):
+    # een ontbrekende waarde geeft een ValueError, dan leest pandas het in
+    monkeypatch.setattr(gefxml_reader, 'NUMPY_LOADTXT_C', loadtxt)
+    line = ','.join(['1.0'] * len(BRO_CPT_COLUMNS))
+    with pytest.raises(ValueError):
+        decode_bro_values(f'{line};{line[4:]};')
+    with pytest.raises(KeyError):
+        decode_bro_values(f'{line};', ['diepte'])
+
+def test_cpt_xml_columns(data):
+    # met columns worden alleen die kolommen omgezet, de waarden zijn gelijk aan die van alle kolommen
+    full = Cpt()
+    full.load_xml(os.path.join(data, 'cpt.xml'))
+    columns = ['depth', 'coneResistance', 'localFriction']
+    cpt = Cpt()
+    cpt.load_xml(os.path.join(data, 'cpt.xml'), columns=columns)
+    pd.testing.assert_frame_equal(cpt.data, full.data[columns])
+    cpt = Cpt()
+    cpt.load_xml(os.path.join(data, 'cpt.xml'), columns=columns, dtype=np.float32)
+    pd.testing.assert_frame_equal(cpt.data, full.data[columns].astype(np.float32))